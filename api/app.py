@@ -25,9 +25,12 @@ async def or_middleware(request: Request, call_next):
         if helper.TRACK_TIME:
             import time
             now = int(time.time() * 1000)
+        queries = pg_client.track_request()
         response: StreamingResponse = await call_next(request)
+        pg_client.finish_request(queries, request.scope.get("endpoint"))
         if helper.TRACK_TIME:
-            print(f"Execution time: {int(time.time() * 1000) - now} ms")
+            print(f"Execution time: {int(time.time() * 1000) - now} ms, "
+                  f"DB: {queries.seconds * 1000:.0f} ms in {queries.count} queries")
     except Exception as e:
         pg_client.close()
         raise e
@@ -35,6 +38,16 @@ async def or_middleware(request: Request, call_next):
     return response
 
 
+@app.on_event("startup")
+async def startup():
+    await pg_client.make_async_pool()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await pg_client.close_async_pool()
+
+
 origins = [
     "*",
 ]
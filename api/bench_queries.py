@@ -0,0 +1,106 @@
+"""
+Times the queries run the most by the API, once sent as they are and once as prepared statements:
+
+    python bench_queries.py [-n 1000] [--project-id ID] [--session-id ID] [--user-id ID]
+
+Run it from api/ with the usual env (pg_host, pg_dbname...). The queries are the ones of every authenticated
+request (users, tenants, projects) and of a session replay (metadata, session, events, errors, resources,
+issues). Without ids, the latest session of the database is used, with its project and the first user.
+Nothing is written.
+"""
+import argparse
+import time
+
+from chalicelib.core import users, tenants, projects, metadata, sessions, events, resources, issues, \
+    sessions_favorite_viewed
+from chalicelib.utils import pg_client
+
+
+def get_defaults(args):
+    with pg_client.PostgresClient() as cur:
+        if args.session_id is None:
+            cur.execute("""SELECT session_id, project_id
+                           FROM public.sessions
+                           ORDER BY start_ts DESC
+                           LIMIT 1;""")
+            row = cur.fetchone()
+            args.session_id, args.project_id = row["session_id"], row["project_id"]
+        if args.user_id is None:
+            cur.execute("SELECT user_id FROM public.users WHERE deleted_at IS NULL ORDER BY user_id LIMIT 1;")
+            args.user_id = cur.fetchone()["user_id"]
+        # users have no tenant_id in the FOSS edition, there is one tenant
+        cur.execute(cur.mogrify("SELECT * FROM public.users WHERE user_id = %(user_id)s;",
+                                {"user_id": args.user_id}))
+        row = cur.fetchone()
+        args.tenant_id = row.get("tenant_id", 1) if row is not None else 1
+    args.project_key = projects.get_project_key(args.project_id)
+
+
+def get_queries(a):
+    return [
+        ("users.get", lambda: users.get(user_id=a.user_id, tenant_id=a.tenant_id)),
+        ("users.auth_exists", lambda: users.auth_exists(user_id=a.user_id, tenant_id=a.tenant_id,
+                                                        jwt_iat=0, jwt_aud="front")),
+        ("tenants.get_by_tenant_id", lambda: tenants.get_by_tenant_id(a.tenant_id)),
+        ("projects.get_project", lambda: projects.get_project(tenant_id=a.tenant_id, project_id=a.project_id,
+                                                              include_gdpr=True)),
+        ("projects.get_project_by_key", lambda: projects.get_project_by_key(tenant_id=a.tenant_id,
+                                                                            project_key=a.project_key)),
+        ("projects.get_project_key", lambda: projects.get_project_key(a.project_id)),
+        ("projects.get_internal_project_id", lambda: projects.get_internal_project_id(a.project_key)),
+        ("projects.get_gdpr", lambda: projects.get_gdpr(a.project_id)),
+        ("projects.get_capture_status", lambda: projects.get_capture_status(a.project_id)),
+        ("metadata.get", lambda: metadata.get(a.project_id)),
+        ("sessions.get_by_id2_pg", lambda: sessions.get_by_id2_pg(project_id=a.project_id, session_id=a.session_id,
+                                                                  user_id=a.user_id, include_fav_viewed=True,
+                                                                  group_metadata=True)),
+        ("events.get_by_sessionId2_pg (3 queries)",
+         lambda: events.get_by_sessionId2_pg(session_id=a.session_id, project_id=a.project_id)),
+        ("events.get_errors_by_session_id", lambda: events.get_errors_by_session_id(a.session_id)),
+        ("events.get_customs_by_sessionId2_pg",
+         lambda: events.get_customs_by_sessionId2_pg(session_id=a.session_id, project_id=a.project_id)),
+        ("resources.get_by_session_id", lambda: resources.get_by_session_id(session_id=a.session_id,
+                                                                            project_id=a.project_id)),
+        ("issues.get_by_session_id", lambda: issues.get_by_session_id(a.session_id)),
+        ("sessions_favorite_viewed.favorite_session_exists",
+         lambda: sessions_favorite_viewed.favorite_session_exists(user_id=a.user_id, session_id=a.session_id)),
+    ]
+
+
+def run(call, n):
+    # the first calls prepare the statements on the connections of the pool
+    for _ in range(min(n, 20)):
+        call()
+    start = time.perf_counter()
+    for _ in range(n):
+        call()
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", type=int, default=1000, help="calls per query and mode")
+    parser.add_argument("--project-id", type=int)
+    parser.add_argument("--session-id", type=int)
+    parser.add_argument("--user-id", type=int)
+    args = parser.parse_args()
+    if (args.session_id is None) != (args.project_id is None):
+        parser.error("--project-id and --session-id go together")
+    get_defaults(args)
+
+    print(f"project {args.project_id}, session {args.session_id}, user {args.user_id}, {args.n} calls")
+    print(f"{'query':<50} {'plain ms':>9} {'prepared ms':>12} {'speedup':>8}")
+    totals = [0, 0]
+    for name, call in get_queries(args):
+        pg_client.PG_PREPARED_STATEMENTS = False
+        plain = run(call, args.n)
+        pg_client.PG_PREPARED_STATEMENTS = True
+        prepared = run(call, args.n)
+        totals[0] += plain
+        totals[1] += prepared
+        print(f"{name:<50} {plain * 1000:>9.3f} {prepared * 1000:>12.3f} {plain / prepared:>7.2f}x")
+    print(f"{'total':<50} {totals[0] * 1000:>9.3f} {totals[1] * 1000:>12.3f} {totals[0] / totals[1]:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -65,51 +65,77 @@ def create_dashboard(project_id, user_id, data: schemas.CreateDashboardSchema):
     return {"data": get_dashboard(project_id=project_id, user_id=user_id, dashboard_id=row["dashboard_id"])}
 
 
+def __get_dashboards_query(project_id, user_id):
+    pg_query = f"""SELECT *
+                    FROM dashboards
+                    WHERE deleted_at ISNULL
+                      AND project_id = %(projectId)s
+                      AND (user_id = %(userId)s OR is_public);"""
+    return pg_query, {"userId": user_id, "projectId": project_id}
+
+
 def get_dashboards(project_id, user_id):
     with pg_client.PostgresClient() as cur:
-        pg_query = f"""SELECT *
-                        FROM dashboards
-                        WHERE deleted_at ISNULL
-                          AND project_id = %(projectId)s
-                          AND (user_id = %(userId)s OR is_public);"""
-        params = {"userId": user_id, "projectId": project_id}
-        cur.execute(cur.mogrify(pg_query, params))
+        cur.execute(cur.mogrify(*__get_dashboards_query(project_id=project_id, user_id=user_id)))
         rows = cur.fetchall()
     return helper.list_to_camel_case(rows)
 
 
+async def get_dashboards_async(project_id, user_id):
+    async with pg_client.AsyncPostgresClient() as cur:
+        await cur.execute(cur.mogrify(*__get_dashboards_query(project_id=project_id, user_id=user_id)))
+        rows = await cur.fetchall()
+    return helper.list_to_camel_case(rows)
+
+
+def __get_dashboard_query(project_id, user_id, dashboard_id):
+    pg_query = """SELECT dashboards.*, all_metric_widgets.widgets AS widgets
+                    FROM dashboards
+                             LEFT JOIN LATERAL (SELECT COALESCE(JSONB_AGG(raw_metrics), '[]') AS widgets
+                                                FROM (SELECT dashboard_widgets.*, metrics.*, metric_series.series
+                                                      FROM metrics
+                                                               INNER JOIN dashboard_widgets USING (metric_id)
+                                                               LEFT JOIN LATERAL (SELECT COALESCE(JSONB_AGG(metric_series.* ORDER BY index),'[]') AS series
+                                                                                  FROM metric_series
+                                                                                  WHERE metric_series.metric_id = metrics.metric_id
+                                                                                    AND metric_series.deleted_at ISNULL
+                                                          ) AS metric_series ON (TRUE)
+                                                      WHERE dashboard_widgets.dashboard_id = dashboards.dashboard_id
+                                                        AND metrics.deleted_at ISNULL
+                                                        AND (metrics.project_id = %(projectId)s OR metrics.project_id ISNULL)) AS raw_metrics
+                        ) AS all_metric_widgets ON (TRUE)
+                    WHERE dashboards.deleted_at ISNULL
+                      AND dashboards.project_id = %(projectId)s
+                      AND dashboard_id = %(dashboard_id)s
+                      AND (dashboards.user_id = %(userId)s OR is_public);"""
+    return pg_query, {"userId": user_id, "projectId": project_id, "dashboard_id": dashboard_id}
+
+
+def __format_dashboard(row):
+    if row is not None:
+        row["created_at"] = TimeUTC.datetime_to_timestamp(row["created_at"])
+        for w in row["widgets"]:
+            w["created_at"] = TimeUTC.datetime_to_timestamp(w["created_at"])
+            w["edited_at"] = TimeUTC.datetime_to_timestamp(w["edited_at"])
+            for s in w["series"]:
+                s["created_at"] = TimeUTC.datetime_to_timestamp(s["created_at"])
+    return helper.dict_to_camel_case(row)
+
+
 def get_dashboard(project_id, user_id, dashboard_id):
     with pg_client.PostgresClient() as cur:
-        pg_query = """SELECT dashboards.*, all_metric_widgets.widgets AS widgets
-                        FROM dashboards
-                                 LEFT JOIN LATERAL (SELECT COALESCE(JSONB_AGG(raw_metrics), '[]') AS widgets
-                                                    FROM (SELECT dashboard_widgets.*, metrics.*, metric_series.series
-                                                          FROM metrics
-                                                                   INNER JOIN dashboard_widgets USING (metric_id)
-                                                                   LEFT JOIN LATERAL (SELECT COALESCE(JSONB_AGG(metric_series.* ORDER BY index),'[]') AS series
-                                                                                      FROM metric_series
-                                                                                      WHERE metric_series.metric_id = metrics.metric_id
-                                                                                        AND metric_series.deleted_at ISNULL
-                                                              ) AS metric_series ON (TRUE)
-                                                          WHERE dashboard_widgets.dashboard_id = dashboards.dashboard_id
-                                                            AND metrics.deleted_at ISNULL
-                                                            AND (metrics.project_id = %(projectId)s OR metrics.project_id ISNULL)) AS raw_metrics
-                            ) AS all_metric_widgets ON (TRUE)
-                        WHERE dashboards.deleted_at ISNULL
-                          AND dashboards.project_id = %(projectId)s
-                          AND dashboard_id = %(dashboard_id)s
-                          AND (dashboards.user_id = %(userId)s OR is_public);"""
-        params = {"userId": user_id, "projectId": project_id, "dashboard_id": dashboard_id}
-        cur.execute(cur.mogrify(pg_query, params))
+        cur.execute(cur.mogrify(*__get_dashboard_query(project_id=project_id, user_id=user_id,
+                                                       dashboard_id=dashboard_id)))
         row = cur.fetchone()
-        if row is not None:
-            row["created_at"] = TimeUTC.datetime_to_timestamp(row["created_at"])
-            for w in row["widgets"]:
-                w["created_at"] = TimeUTC.datetime_to_timestamp(w["created_at"])
-                w["edited_at"] = TimeUTC.datetime_to_timestamp(w["edited_at"])
-                for s in w["series"]:
-                    s["created_at"] = TimeUTC.datetime_to_timestamp(s["created_at"])
-    return helper.dict_to_camel_case(row)
+    return __format_dashboard(row)
+
+
+async def get_dashboard_async(project_id, user_id, dashboard_id):
+    async with pg_client.AsyncPostgresClient() as cur:
+        await cur.execute(cur.mogrify(*__get_dashboard_query(project_id=project_id, user_id=user_id,
+                                                             dashboard_id=dashboard_id)))
+        row = await cur.fetchone()
+    return __format_dashboard(row)
 
 
 def delete_dashboard(project_id, user_id, dashboard_id):
@@ -8,7 +8,7 @@ from chalicelib.utils.event_filter_definition import SupportedFilter, Event
 
 def get_customs_by_sessionId2_pg(session_id, project_id):
     with pg_client.PostgresClient() as cur:
-        cur.execute(cur.mogrify("""\
+        cur.execute_prepared("""\
             SELECT 
                 c.*,
                 'CUSTOM' AS type
@@ -16,8 +16,7 @@ def get_customs_by_sessionId2_pg(session_id, project_id):
             WHERE 
               c.session_id = %(session_id)s
             ORDER BY c.timestamp;""",
-                                {"project_id": project_id, "session_id": session_id})
-                    )
+                             {"project_id": project_id, "session_id": session_id})
         rows = cur.fetchall()
     return helper.dict_to_camel_case(rows)
 
@@ -51,7 +50,7 @@ def __get_grouped_clickrage(rows, session_id):
 
 def get_by_sessionId2_pg(session_id, project_id, group_clickrage=False):
     with pg_client.PostgresClient() as cur:
-        cur.execute(cur.mogrify("""\
+        cur.execute_prepared("""\
             SELECT 
                 c.*,
                 'CLICK' AS type
@@ -59,13 +58,12 @@ def get_by_sessionId2_pg(session_id, project_id, group_clickrage=False):
             WHERE 
               c.session_id = %(session_id)s
             ORDER BY c.timestamp;""",
-                                {"project_id": project_id, "session_id": session_id})
-                    )
+                             {"project_id": project_id, "session_id": session_id})
         rows = cur.fetchall()
         if group_clickrage:
             rows = __get_grouped_clickrage(rows=rows, session_id=session_id)
 
-        cur.execute(cur.mogrify("""
+        cur.execute_prepared("""
             SELECT 
                 i.*,
                 'INPUT' AS type
@@ -73,10 +71,9 @@ def get_by_sessionId2_pg(session_id, project_id, group_clickrage=False):
             WHERE 
               i.session_id = %(session_id)s
             ORDER BY i.timestamp;""",
-                                {"project_id": project_id, "session_id": session_id})
-                    )
+                             {"project_id": project_id, "session_id": session_id})
         rows += cur.fetchall()
-        cur.execute(cur.mogrify("""\
+        cur.execute_prepared("""\
             SELECT 
                 l.*,
                 l.path AS value,
@@ -85,7 +82,7 @@ def get_by_sessionId2_pg(session_id, project_id, group_clickrage=False):
             FROM events.pages AS l
             WHERE 
               l.session_id = %(session_id)s
-            ORDER BY l.timestamp;""", {"project_id": project_id, "session_id": session_id}))
+            ORDER BY l.timestamp;""", {"project_id": project_id, "session_id": session_id})
         rows += cur.fetchall()
         rows = helper.list_to_camel_case(rows)
         rows = sorted(rows, key=lambda k: (k["timestamp"], k["messageId"]))
@@ -466,12 +463,12 @@ def search(text, event_type, project_id, source, key):
 
 def get_errors_by_session_id(session_id):
     with pg_client.PostgresClient() as cur:
-        cur.execute(cur.mogrify(f"""\
+        cur.execute_prepared(f"""\
                     SELECT er.*,ur.*, er.timestamp - s.start_ts AS time
                     FROM {event_type.ERROR.table} AS er INNER JOIN public.errors AS ur USING (error_id) INNER JOIN public.sessions AS s USING (session_id)
                     WHERE
                       er.session_id = %(session_id)s
-                    ORDER BY timestamp;""", {"session_id": session_id}))
+                    ORDER BY timestamp;""", {"session_id": session_id})
         errors = cur.fetchall()
         for e in errors:
             e["stacktrace_parsed_at"] = TimeUTC.datetime_to_timestamp(e["stacktrace_parsed_at"])
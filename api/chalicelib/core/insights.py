@@ -46,7 +46,7 @@ def journey(project_id, startTimestamp=TimeUTC.now(delta_days=-1), endTimestamp=
             pg_sub_query_subset.append(f"sessions.user_id = %(user_id)s")
             extra_values["user_id"] = f["value"]
 
-    with pg_client.PostgresClient() as cur:
+    with pg_client.PostgresClient(read_only=True) as cur:
         pg_query = f"""SELECT source_event,
                                target_event,
                                count(*) AS      value
@@ -188,7 +188,7 @@ def users_retention(project_id, startTimestamp=TimeUTC.now(delta_days=-70), endT
                                      time_constraint=True)
     pg_sub_query.append("user_id IS NOT NULL")
     pg_sub_query.append("DATE_TRUNC('week', to_timestamp(start_ts / 1000)) = to_timestamp(%(startTimestamp)s / 1000)")
-    with pg_client.PostgresClient() as cur:
+    with pg_client.PostgresClient(read_only=True) as cur:
         pg_query = f"""SELECT FLOOR(DATE_PART('day', connexion_week - DATE_TRUNC('week', to_timestamp(%(startTimestamp)s / 1000)::timestamp)) / 7)::integer AS week,
                                COUNT(DISTINCT connexions_list.user_id)                                     AS users_count,
                                ARRAY_AGG(DISTINCT connexions_list.user_id)                                 AS connected_users
@@ -235,7 +235,7 @@ def users_acquisition(project_id, startTimestamp=TimeUTC.now(delta_days=-70), en
     pg_sub_query = __get_constraints(project_id=project_id, data=args, duration=True, main_table="sessions",
                                      time_constraint=True)
     pg_sub_query.append("user_id IS NOT NULL")
-    with pg_client.PostgresClient() as cur:
+    with pg_client.PostgresClient(read_only=True) as cur:
         pg_query = f"""SELECT EXTRACT(EPOCH FROM first_connexion_week::date)::bigint*1000 AS first_connexion_week,
                                FLOOR(DATE_PART('day', connexion_week - first_connexion_week) / 7)::integer AS week,
                                COUNT(DISTINCT connexions_list.user_id)                            AS users_count,
@@ -301,7 +301,7 @@ def feature_retention(project_id, startTimestamp=TimeUTC.now(delta_days=-70), en
     event_column = JOURNEY_TYPES[event_type]["column"]
     pg_sub_query.append(f"feature.{event_column} = %(value)s")
 
-    with pg_client.PostgresClient() as cur:
+    with pg_client.PostgresClient(read_only=True) as cur:
         if default:
             # get most used value
             pg_query = f"""SELECT {event_column} AS value, COUNT(*) AS count
@@ -392,7 +392,7 @@ def feature_acquisition(project_id, startTimestamp=TimeUTC.now(delta_days=-70),
 
     pg_sub_query.append(f"feature.{event_column} = %(value)s")
 
-    with pg_client.PostgresClient() as cur:
+    with pg_client.PostgresClient(read_only=True) as cur:
         if default:
             # get most used value
             pg_query = f"""SELECT {event_column} AS value, COUNT(*) AS count
@@ -475,7 +475,7 @@ def feature_popularity_frequency(project_id, startTimestamp=TimeUTC.now(delta_da
             pg_sub_query.append(f"sessions.user_id = %(user_id)s")
             extra_values["user_id"] = f["value"]
 
-    with pg_client.PostgresClient() as cur:
+    with pg_client.PostgresClient(read_only=True) as cur:
         pg_query = f"""SELECT  COUNT(DISTINCT user_id) AS count
                         FROM sessions
                         WHERE {" AND ".join(pg_sub_query)}
@@ -542,7 +542,7 @@ def feature_adoption(project_id, startTimestamp=TimeUTC.now(delta_days=-70), end
             extra_values["user_id"] = f["value"]
     event_table = JOURNEY_TYPES[event_type]["table"]
     event_column = JOURNEY_TYPES[event_type]["column"]
-    with pg_client.PostgresClient() as cur:
+    with pg_client.PostgresClient(read_only=True) as cur:
         pg_query = f"""SELECT  COUNT(DISTINCT user_id) AS count
                         FROM sessions
                         WHERE {" AND ".join(pg_sub_query)}
@@ -612,7 +612,7 @@ def feature_adoption_top_users(project_id, startTimestamp=TimeUTC.now(delta_days
             extra_values["user_id"] = f["value"]
     event_table = JOURNEY_TYPES[event_type]["table"]
     event_column = JOURNEY_TYPES[event_type]["column"]
-    with pg_client.PostgresClient() as cur:
+    with pg_client.PostgresClient(read_only=True) as cur:
         pg_sub_query.append("feature.timestamp >= %(startTimestamp)s")
         pg_sub_query.append("feature.timestamp < %(endTimestamp)s")
         if default:
@@ -673,7 +673,7 @@ def feature_adoption_daily_usage(project_id, startTimestamp=TimeUTC.now(delta_da
             extra_values["user_id"] = f["value"]
     event_table = JOURNEY_TYPES[event_type]["table"]
     event_column = JOURNEY_TYPES[event_type]["column"]
-    with pg_client.PostgresClient() as cur:
+    with pg_client.PostgresClient(read_only=True) as cur:
         pg_sub_query_chart.append("feature.timestamp >= %(startTimestamp)s")
         pg_sub_query_chart.append("feature.timestamp < %(endTimestamp)s")
         pg_sub_query.append("feature.timestamp >= %(startTimestamp)s")
@@ -735,7 +735,7 @@ def feature_intensity(project_id, startTimestamp=TimeUTC.now(delta_days=-70), en
             pg_sub_query.append(f"sessions.user_id = %(user_id)s")
             extra_values["user_id"] = f["value"]
     pg_sub_query.append(f"length({event_column})>2")
-    with pg_client.PostgresClient() as cur:
+    with pg_client.PostgresClient(read_only=True) as cur:
         pg_query = f"""SELECT {event_column} AS value, AVG(DISTINCT session_id) AS avg
                     FROM {event_table} AS feature INNER JOIN sessions USING (session_id)
                     WHERE {" AND ".join(pg_sub_query)}
@@ -770,7 +770,7 @@ def users_active(project_id, startTimestamp=TimeUTC.now(delta_days=-70), endTime
             pg_sub_query_chart.append(f"sessions.user_id = %(user_id)s")
             extra_values["user_id"] = f["value"]
 
-    with pg_client.PostgresClient() as cur:
+    with pg_client.PostgresClient(read_only=True) as cur:
         pg_query = f"""SELECT AVG(count) AS avg, JSONB_AGG(chart) AS chart
                         FROM (SELECT generated_timestamp       AS timestamp,
                                      COALESCE(COUNT(users), 0) AS count
@@ -801,7 +801,7 @@ def users_power(project_id, startTimestamp=TimeUTC.now(delta_days=-70), endTimes
     pg_sub_query = __get_constraints(project_id=project_id, time_constraint=True, chart=False, data=args)
     pg_sub_query.append("user_id IS NOT NULL")
 
-    with pg_client.PostgresClient() as cur:
+    with pg_client.PostgresClient(read_only=True) as cur:
         pg_query = f"""SELECT AVG(count) AS avg, JSONB_AGG(day_users_partition) AS partition
                         FROM (SELECT number_of_days, COUNT(user_id) AS count
                               FROM (SELECT user_id, COUNT(DISTINCT DATE_TRUNC('day', to_timestamp(start_ts / 1000))) AS number_of_days
@@ -845,7 +845,7 @@ def users_slipping(project_id, startTimestamp=TimeUTC.now(delta_days=-70), endTi
     event_column = JOURNEY_TYPES[event_type]["column"]
     pg_sub_query.append(f"feature.{event_column} = %(value)s")
 
-    with pg_client.PostgresClient() as cur:
+    with pg_client.PostgresClient(read_only=True) as cur:
         if default:
             # get most used value
             pg_query = f"""SELECT {event_column} AS value, COUNT(*) AS count
@@ -901,7 +901,7 @@ def search(text, feature_type, project_id, platform=None):
               "value": helper.string_to_sql_like(text.lower()),
               "platform_0": platform}
     if feature_type == "ALL":
-        with pg_client.PostgresClient() as cur:
+        with pg_client.PostgresClient(read_only=True) as cur:
             sub_queries = []
             for e in JOURNEY_TYPES:
                 sub_queries.append(f"""(SELECT DISTINCT {JOURNEY_TYPES[e]["column"]} AS value, '{e}' AS "type"
@@ -913,7 +913,7 @@ def search(text, feature_type, project_id, platform=None):
             cur.execute(cur.mogrify(pg_query, params))
             rows = cur.fetchall()
     elif JOURNEY_TYPES.get(feature_type) is not None:
-        with pg_client.PostgresClient() as cur:
+        with pg_client.PostgresClient(read_only=True) as cur:
             pg_query = f"""SELECT DISTINCT {JOURNEY_TYPES[feature_type]["column"]} AS value, '{feature_type}' AS "type"
                              FROM {JOURNEY_TYPES[feature_type]["table"]} INNER JOIN public.sessions USING(session_id)
                              WHERE {" AND ".join(pg_sub_query)} AND {JOURNEY_TYPES[feature_type]["column"]} ILIKE %(value)s
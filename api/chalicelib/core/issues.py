@@ -46,15 +46,13 @@ def get(project_id, issue_id):
 
 def get_by_session_id(session_id, issue_type=None):
     with pg_client.PostgresClient() as cur:
-        cur.execute(
-            cur.mogrify(f"""\
+        cur.execute_prepared(f"""\
                     SELECT *
                     FROM events_common.issues
                              INNER JOIN public.issues USING (issue_id)
                     WHERE session_id = %(session_id)s {"AND type = %(type)s" if issue_type is not None else ""}
                     ORDER BY timestamp;""",
-                        {"session_id": session_id, "type": issue_type})
-        )
+                             {"session_id": session_id, "type": issue_type})
         return helper.list_to_camel_case(cur.fetchall())
 
 
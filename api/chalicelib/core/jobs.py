@@ -1,6 +1,11 @@
+from itertools import islice
+
 from chalicelib.utils import pg_client, helper
 from chalicelib.utils.TimeUTC import TimeUTC
-from chalicelib.core import sessions, sessions_mobs
+from chalicelib.core import sessions, sessions_mobs, search_cache
+
+# sessions deleted at a time by a DELETE_USER_DATA job
+DELETE_BATCH_SIZE = 1000
 
 
 class Actions:
@@ -139,12 +144,15 @@ def execute_jobs():
         print(f"job can be executed {job['id']}")
         try:
             if job["action"] == Actions.DELETE_USER_DATA:
-                session_ids = sessions.get_session_ids_by_user_ids(
+                all_session_ids = sessions.get_session_ids_by_user_ids(
                     project_id=job["projectId"], user_ids=job["referenceId"]
                 )
-
-                sessions.delete_sessions_by_session_ids(session_ids)
-                sessions_mobs.delete_mobs(session_ids)
+                session_ids = list(islice(all_session_ids, DELETE_BATCH_SIZE))
+                while len(session_ids) > 0:
+                    sessions.delete_sessions_by_session_ids(session_ids)
+                    sessions_mobs.delete_mobs(session_ids)
+                    session_ids = list(islice(all_session_ids, DELETE_BATCH_SIZE))
+                search_cache.invalidate(job["projectId"])
             else:
                 raise Exception(f"The action {job['action']} not supported.")
 
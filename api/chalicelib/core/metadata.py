@@ -1,6 +1,6 @@
 import re
 
-from chalicelib.core import projects
+from chalicelib.core import projects, search_cache
 from chalicelib.utils import pg_client, dev
 
 MAX_INDEXES = 10
@@ -10,24 +10,36 @@ def _get_column_names():
     return [f"metadata_{i}" for i in range(1, MAX_INDEXES + 1)]
 
 
-def get(project_id):
-    with pg_client.PostgresClient() as cur:
-        cur.execute(
-            cur.mogrify(
-                f"""\
+def __get_query(project_id):
+    return f"""\
             SELECT  
                 {",".join(_get_column_names())}
             FROM public.projects
             WHERE project_id = %(project_id)s AND deleted_at ISNULL 
-            LIMIT 1;""", {"project_id": project_id})
-        )
+            LIMIT 1;""", {"project_id": project_id}
+
+
+def __get_keys(metas):
+    results = []
+    if metas is not None:
+        for i, k in enumerate(metas.keys()):
+            if metas[k] is not None:
+                results.append({"key": metas[k], "index": i + 1})
+    return results
+
+
+def get(project_id):
+    with pg_client.PostgresClient() as cur:
+        cur.execute_prepared(*__get_query(project_id))
         metas = cur.fetchone()
-        results = []
-        if metas is not None:
-            for i, k in enumerate(metas.keys()):
-                if metas[k] is not None:
-                    results.append({"key": metas[k], "index": i + 1})
-        return results
+    return __get_keys(metas)
+
+
+async def get_async(project_id):
+    async with pg_client.AsyncPostgresClient() as cur:
+        await cur.execute(cur.mogrify(*__get_query(project_id)))
+        metas = await cur.fetchone()
+    return __get_keys(metas)
 
 
 def get_batch(project_ids):
@@ -91,6 +103,7 @@ def __edit(project_id, col_index, colname, new_name):
                                     {"project_id": project_id, "value": new_name}))
             new_name = cur.fetchone()[colname]
             old_metas[col_index]["key"] = new_name
+    search_cache.invalidate(project_id)
     return {"data": old_metas[col_index]}
 
 
@@ -119,6 +132,7 @@ def delete(tenant_id, project_id, index: int):
                                 """,
                             {"project_id": project_id})
         cur.execute(query=query)
+    search_cache.invalidate(project_id)
 
     return {"data": get(project_id)}
 
@@ -134,6 +148,7 @@ def add(tenant_id, project_id, new_name):
                 f"""UPDATE public.projects SET {colname}= %(key)s WHERE project_id =%(project_id)s RETURNING {colname};""",
                 {"key": new_name, "project_id": project_id}))
         col_val = cur.fetchone()[colname]
+    search_cache.invalidate(project_id)
     return {"data": {"key": col_val, "index": index}}
 
 
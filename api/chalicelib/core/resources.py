@@ -18,6 +18,6 @@ def get_by_session_id(session_id, project_id):
                 FROM events.resources INNER JOIN sessions USING (session_id)
                 WHERE session_id = %(session_id)s AND project_id= %(project_id)s;"""
         params = {"session_id": session_id, "project_id": project_id}
-        cur.execute(cur.mogrify(ch_query, params))
+        cur.execute_prepared(ch_query, params)
         rows = cur.fetchall()
         return helper.list_to_camel_case(rows)
@@ -0,0 +1,232 @@
+"""
+Cache of the sessions search results.
+
+The same search runs again and again: dashboards refresh their widgets, a saved search is opened by the whole
+team, every page and sort of the sessions list runs it. The functions decorated with cached() keep their results
+for search_cache_ttl seconds under a key made of:
+
+- the payload without its dates, with its keys sorted, and the other arguments of the function,
+- the dates rounded to search_cache_bucket seconds: "the last 7 days" of a dashboard stays the same search,
+  answered with the results of its first run in the bucket,
+- the project and its watermark: the start of its latest session, checked every search_cache_watermark_ttl
+  seconds, and a generation bumped by invalidate() when something else than the ingestion changes the results
+  (favorites, viewed sessions, metadata keys, deleted sessions). The results of a project stop being reachable
+  when a new session starts or when it is invalidated, they age out of the cache.
+
+The watermark only moves when a session starts: the sessions still being ingested keep their duration, events,
+errors and issues of the cached results, up to search_cache_ttl seconds old.
+
+The results are kept as JSON in a LRU of search_cache_size entries per process, or in Redis (or a server speaking
+its protocol) when search_cache_redis is set, shared by all the processes: its maxmemory-policy (allkeys-lru)
+bounds it. The redis package is only needed then. search_cache_ttl=0 disables the cache.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from decouple import config
+from starlette.concurrency import run_in_threadpool
+
+from chalicelib.utils import pg_client, prometheus
+
+SEARCH_CACHE_TTL = config("search_cache_ttl", cast=int, default=60)
+SEARCH_CACHE_SIZE = config("search_cache_size", cast=int, default=1000)
+SEARCH_CACHE_BUCKET = config("search_cache_bucket", cast=int, default=60)
+SEARCH_CACHE_WATERMARK_TTL = config("search_cache_watermark_ttl", cast=float, default=10)
+SEARCH_CACHE_REDIS = config("search_cache_redis", default="")
+REDIS_PREFIX = "search_cache:"
+
+lookups = prometheus.Counter("search_cache_lookups_total", "Lookups of the search cache, by function and result",
+                             labels=("function", "result"))
+invalidations = prometheus.Counter("search_cache_invalidations_total", "Invalidations of the results of a project")
+
+
+class MemoryBackend:
+    def __init__(self, size):
+        self.size = size
+        # key: (expires_at, value), the least recently used first
+        self.entries = OrderedDict()
+        self.generations = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def get_generation(self, project_id):
+        return self.generations.get(project_id, 0)
+
+    def invalidate(self, project_id):
+        with self.lock:
+            self.generations[project_id] = self.generations.get(project_id, 0) + 1
+            # they can't be reached anymore, free them now
+            for key in [k for k in self.entries if k.startswith(f"{project_id}:")]:
+                del self.entries[key]
+
+
+class RedisBackend:
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+
+    def get(self, key):
+        return self.client.get(REDIS_PREFIX + key)
+
+    def set(self, key, value, ttl):
+        self.client.set(REDIS_PREFIX + key, value, ex=ttl)
+
+    def get_generation(self, project_id):
+        return int(self.client.get(f"{REDIS_PREFIX}{project_id}:generation") or 0)
+
+    def invalidate(self, project_id):
+        self.client.incr(f"{REDIS_PREFIX}{project_id}:generation")
+
+
+def __get_backend():
+    if len(SEARCH_CACHE_REDIS) > 0:
+        try:
+            return RedisBackend(SEARCH_CACHE_REDIS)
+        except ImportError:
+            print("search_cache_redis is set but the redis package is not installed, caching in-process")
+    return MemoryBackend(SEARCH_CACHE_SIZE)
+
+
+backend = __get_backend()
+if isinstance(backend, MemoryBackend):
+    entries = prometheus.Gauge("search_cache_entries", "Results in the in-process search cache",
+                               collect=lambda: {(): len(backend.entries)})
+
+problem = None
+
+
+def __report(error):
+    global problem
+    # once per outage, not on every search
+    if (error is None) != (problem is None):
+        print(f"search cache {'is usable again' if error is None else f'failed: {error!r}'}")
+    problem = error
+
+
+# project_id: (checked_at, start_ts of the latest session)
+watermarks = {}
+
+
+def get_watermark(project_id):
+    checked = watermarks.get(project_id)
+    if checked is None or time.monotonic() - checked[0] > SEARCH_CACHE_WATERMARK_TTL:
+        with pg_client.PostgresClient() as cur:
+            cur.execute_prepared("""SELECT COALESCE(MAX(start_ts), 0) AS watermark
+                                    FROM public.sessions
+                                    WHERE project_id = %(project_id)s;""",
+                                 {"project_id": project_id})
+            checked = watermarks[project_id] = (time.monotonic(), cur.fetchone()["watermark"])
+    return f"{checked[1]}.{backend.get_generation(project_id)}"
+
+
+def get_key(name, project_id, data, arguments):
+    bucket = SEARCH_CACHE_BUCKET * 1000
+    search = {"function": name,
+              "payload": data.dict(exclude={"startDate", "endDate"}),
+              "startDate": data.startDate // bucket if data.startDate is not None else None,
+              "endDate": data.endDate // bucket if data.endDate is not None else None,
+              "arguments": arguments}
+    digest = hashlib.sha1(json.dumps(search, sort_keys=True, default=str).encode("UTF-8")).hexdigest()
+    return f"{project_id}:{get_watermark(project_id)}:{digest}"
+
+
+def lookup(name, arguments):
+    """
+    The key of a search and its cached results, None if they aren't
+    """
+    arguments = dict(arguments)
+    project_id = arguments.pop("project_id")
+    data = arguments.pop("data")
+    try:
+        key = get_key(name, project_id, data, arguments)
+        value = backend.get(key)
+        __report(None)
+    except Exception as e:
+        __report(e)
+        return None, None
+    lookups.inc(function=name, result="miss" if value is None else "hit")
+    return key, json.loads(value) if value is not None else None
+
+
+def store(key, result):
+    if key is None:
+        return
+    try:
+        backend.set(key, json.dumps(result), SEARCH_CACHE_TTL)
+        __report(None)
+    except Exception as e:
+        __report(e)
+
+
+def invalidate(project_id):
+    """
+    Forget the results of the project, for changes the watermark doesn't see
+    """
+    if SEARCH_CACHE_TTL <= 0:
+        return
+    try:
+        backend.invalidate(project_id)
+        __report(None)
+    except Exception as e:
+        __report(e)
+    invalidations.inc()
+
+
+def cached(name):
+    """
+    Cache the results of a search function taking the payload as data and a project_id, sync or async.
+    The key is computed before the call, the search functions change their payload.
+    :param name: functions with the same results share their name
+    """
+
+    def decorator(f):
+        if SEARCH_CACHE_TTL <= 0:
+            return f
+        signature = inspect.signature(f)
+
+        def get_arguments(args, kwargs):
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            return arguments.arguments
+
+        if inspect.iscoroutinefunction(f):
+            @functools.wraps(f)
+            async def wrapper(*args, **kwargs):
+                key, result = await run_in_threadpool(lookup, name, get_arguments(args, kwargs))
+                if result is None:
+                    result = await f(*args, **kwargs)
+                    await run_in_threadpool(store, key, result)
+                return result
+        else:
+            @functools.wraps(f)
+            def wrapper(*args, **kwargs):
+                key, result = lookup(name, get_arguments(args, kwargs))
+                if result is None:
+                    result = f(*args, **kwargs)
+                    store(key, result)
+                return result
+        return wrapper
+
+    return decorator
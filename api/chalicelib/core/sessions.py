@@ -1,8 +1,10 @@
 from typing import List
 
+from starlette.concurrency import run_in_threadpool
+
 import schemas
 from chalicelib.core import events, metadata, events_ios, \
-    sessions_mobs, issues, projects, errors, resources, assist, performance_event
+    sessions_mobs, issues, projects, errors, resources, assist, performance_event, sessions_query, search_cache
 from chalicelib.utils import pg_client, helper, metrics_helper
 
 SESSION_PROJECTION_COLS = """s.project_id,
@@ -39,72 +41,91 @@ def __group_metadata(session, project_metadata):
     return meta
 
 
+def __get_session_query(project_id, session_id, user_id, include_fav_viewed, group_metadata):
+    extra_query = []
+    if include_fav_viewed:
+        extra_query.append("""COALESCE((SELECT TRUE
+                             FROM public.user_favorite_sessions AS fs
+                             WHERE s.session_id = fs.session_id
+                               AND fs.user_id = %(userId)s), FALSE) AS favorite""")
+        extra_query.append("""COALESCE((SELECT TRUE
+                             FROM public.user_viewed_sessions AS fs
+                             WHERE s.session_id = fs.session_id
+                               AND fs.user_id = %(userId)s), FALSE) AS viewed""")
+    return f"""\
+        SELECT
+            s.*,
+            s.session_id::text AS session_id,
+            (SELECT project_key FROM public.projects WHERE project_id = %(project_id)s LIMIT 1) AS project_key
+            {"," if len(extra_query) > 0 else ""}{",".join(extra_query)}
+            {(",json_build_object(" + ",".join([f"'{m}',p.{m}" for m in metadata._get_column_names()]) + ") AS project_metadata") if group_metadata else ''}
+        FROM public.sessions AS s {"INNER JOIN public.projects AS p USING (project_id)" if group_metadata else ""}
+        WHERE s.project_id = %(project_id)s
+            AND s.session_id = %(session_id)s;""", \
+        {"project_id": project_id, "session_id": session_id, "userId": user_id}
+
+
+def __complete_session(data, project_id, session_id, full_data, live):
+    if data is not None:
+        data = helper.dict_to_camel_case(data)
+        if full_data:
+            if data["platform"] == 'ios':
+                data['events'] = events_ios.get_by_sessionId(project_id=project_id, session_id=session_id)
+                for e in data['events']:
+                    if e["type"].endswith("_IOS"):
+                        e["type"] = e["type"][:-len("_IOS")]
+                data['crashes'] = events_ios.get_crashes_by_session_id(session_id=session_id)
+                data['userEvents'] = events_ios.get_customs_by_sessionId(project_id=project_id,
+                                                                         session_id=session_id)
+                data['mobsUrl'] = sessions_mobs.get_ios(sessionId=session_id)
+            else:
+                data['events'] = events.get_by_sessionId2_pg(project_id=project_id, session_id=session_id,
+                                                             group_clickrage=True)
+                all_errors = events.get_errors_by_session_id(session_id=session_id)
+                data['stackEvents'] = [e for e in all_errors if e['source'] != "js_exception"]
+                # to keep only the first stack
+                data['errors'] = [errors.format_first_stack_frame(e) for e in all_errors if
+                                  e['source'] == "js_exception"][
+                                 :500]  # limit the number of errors to reduce the response-body size
+                data['userEvents'] = events.get_customs_by_sessionId2_pg(project_id=project_id,
+                                                                         session_id=session_id)
+                data['mobsUrl'] = sessions_mobs.get_web(sessionId=session_id)
+                data['resources'] = resources.get_by_session_id(session_id=session_id, project_id=project_id)
+
+            data['metadata'] = __group_metadata(project_metadata=data.pop("projectMetadata"), session=data)
+            data['issues'] = issues.get_by_session_id(session_id=session_id)
+            data['live'] = live and assist.is_live(project_id=project_id,
+                                                   session_id=session_id,
+                                                   project_key=data["projectKey"])
+        data["inDB"] = True
+        return data
+    else:
+        return assist.get_live_session_by_id(project_id=project_id, session_id=session_id)
+
+
 def get_by_id2_pg(project_id, session_id, user_id, full_data=False, include_fav_viewed=False, group_metadata=False,
                   live=True):
     with pg_client.PostgresClient() as cur:
-        extra_query = []
-        if include_fav_viewed:
-            extra_query.append("""COALESCE((SELECT TRUE
-                                 FROM public.user_favorite_sessions AS fs
-                                 WHERE s.session_id = fs.session_id
-                                   AND fs.user_id = %(userId)s), FALSE) AS favorite""")
-            extra_query.append("""COALESCE((SELECT TRUE
-                                 FROM public.user_viewed_sessions AS fs
-                                 WHERE s.session_id = fs.session_id
-                                   AND fs.user_id = %(userId)s), FALSE) AS viewed""")
-        query = cur.mogrify(
-            f"""\
-            SELECT
-                s.*,
-                s.session_id::text AS session_id,
-                (SELECT project_key FROM public.projects WHERE project_id = %(project_id)s LIMIT 1) AS project_key
-                {"," if len(extra_query) > 0 else ""}{",".join(extra_query)}
-                {(",json_build_object(" + ",".join([f"'{m}',p.{m}" for m in metadata._get_column_names()]) + ") AS project_metadata") if group_metadata else ''}
-            FROM public.sessions AS s {"INNER JOIN public.projects AS p USING (project_id)" if group_metadata else ""}
-            WHERE s.project_id = %(project_id)s
-                AND s.session_id = %(session_id)s;""",
-            {"project_id": project_id, "session_id": session_id, "userId": user_id}
-        )
-        # print("===============")
-        # print(query)
-        cur.execute(query=query)
-
+        cur.execute_prepared(*__get_session_query(project_id=project_id, session_id=session_id, user_id=user_id,
+                                                  include_fav_viewed=include_fav_viewed,
+                                                  group_metadata=group_metadata))
         data = cur.fetchone()
-        if data is not None:
-            data = helper.dict_to_camel_case(data)
-            if full_data:
-                if data["platform"] == 'ios':
-                    data['events'] = events_ios.get_by_sessionId(project_id=project_id, session_id=session_id)
-                    for e in data['events']:
-                        if e["type"].endswith("_IOS"):
-                            e["type"] = e["type"][:-len("_IOS")]
-                    data['crashes'] = events_ios.get_crashes_by_session_id(session_id=session_id)
-                    data['userEvents'] = events_ios.get_customs_by_sessionId(project_id=project_id,
-                                                                             session_id=session_id)
-                    data['mobsUrl'] = sessions_mobs.get_ios(sessionId=session_id)
-                else:
-                    data['events'] = events.get_by_sessionId2_pg(project_id=project_id, session_id=session_id,
-                                                                 group_clickrage=True)
-                    all_errors = events.get_errors_by_session_id(session_id=session_id)
-                    data['stackEvents'] = [e for e in all_errors if e['source'] != "js_exception"]
-                    # to keep only the first stack
-                    data['errors'] = [errors.format_first_stack_frame(e) for e in all_errors if
-                                      e['source'] == "js_exception"][
-                                     :500]  # limit the number of errors to reduce the response-body size
-                    data['userEvents'] = events.get_customs_by_sessionId2_pg(project_id=project_id,
-                                                                             session_id=session_id)
-                    data['mobsUrl'] = sessions_mobs.get_web(sessionId=session_id)
-                    data['resources'] = resources.get_by_session_id(session_id=session_id, project_id=project_id)
-
-                data['metadata'] = __group_metadata(project_metadata=data.pop("projectMetadata"), session=data)
-                data['issues'] = issues.get_by_session_id(session_id=session_id)
-                data['live'] = live and assist.is_live(project_id=project_id,
-                                                       session_id=session_id,
-                                                       project_key=data["projectKey"])
-            data["inDB"] = True
-            return data
-        else:
-            return assist.get_live_session_by_id(project_id=project_id, session_id=session_id)
+    return __complete_session(data, project_id=project_id, session_id=session_id, full_data=full_data, live=live)
+
+
+async def get_by_id2_pg_async(project_id, session_id, user_id, full_data=False, include_fav_viewed=False,
+                              group_metadata=False, live=True):
+    async with pg_client.AsyncPostgresClient() as cur:
+        query = cur.mogrify(*__get_session_query(project_id=project_id, session_id=session_id, user_id=user_id,
+                                                 include_fav_viewed=include_fav_viewed,
+                                                 group_metadata=group_metadata))
+        await cur.execute(query)
+        data = await cur.fetchone()
+    if data is not None and not full_data:
+        return __complete_session(data, project_id=project_id, session_id=session_id, full_data=False, live=live)
+    # events, errors, mobs urls and assist are still fetched by sync clients
+    return await run_in_threadpool(__complete_session, data, project_id=project_id, session_id=session_id,
+                                   full_data=full_data, live=live)
 
 
 def __get_sql_operator(op: schemas.SearchEventOperator):
@@ -168,8 +189,8 @@ def _isUndefined_operator(op: schemas.SearchEventOperator):
     return op in [schemas.SearchEventOperator._is_undefined]
 
 
-def search2_pg(data: schemas.SessionsSearchPayloadSchema, project_id, user_id, errors_only=False,
-               error_status=schemas.ErrorStatus.all, count_only=False, issue=None):
+def __get_search_query(data: schemas.SessionsSearchPayloadSchema, project_id, user_id, errors_only, error_status,
+                       count_only, issue, meta_keys):
     full_args, query_part = search_query_parts(data=data, error_status=error_status, errors_only=errors_only,
                                                favorite_only=data.bookmarked, issue=issue, project_id=project_id,
                                                user_id=user_id)
@@ -180,10 +201,8 @@ def search2_pg(data: schemas.SessionsSearchPayloadSchema, project_id, user_id, e
         full_args["sessions_limit_s"] = 1
         full_args["sessions_limit_e"] = 200
 
-    meta_keys = []
-    with pg_client.PostgresClient() as cur:
-        if errors_only:
-            main_query = cur.mogrify(f"""SELECT DISTINCT er.error_id, ser.status, ser.parent_error_id, ser.payload,
+    if errors_only:
+        main_query = f"""SELECT DISTINCT er.error_id, ser.status, ser.parent_error_id, ser.payload,
                                         COALESCE((SELECT TRUE
                                          FROM public.user_favorite_sessions AS fs
                                          WHERE s.session_id = fs.session_id
@@ -192,26 +211,25 @@ def search2_pg(data: schemas.SessionsSearchPayloadSchema, project_id, user_id, e
                                                      FROM public.user_viewed_errors AS ve
                                                      WHERE er.error_id = ve.error_id
                                                        AND ve.user_id = %(userId)s LIMIT 1), FALSE) AS viewed
-                                {query_part};""", full_args)
+                                {query_part};"""
 
-        elif count_only:
-            main_query = cur.mogrify(f"""SELECT COUNT(DISTINCT s.session_id) AS count_sessions, 
+    elif count_only:
+        main_query = f"""SELECT COUNT(DISTINCT s.session_id) AS count_sessions, 
                                                 COUNT(DISTINCT s.user_uuid) AS count_users
-                                        {query_part};""", full_args)
-        elif data.group_by_user:
-            g_sort = "count(full_sessions)"
-            if data.order is None:
-                data.order = "DESC"
-            else:
-                data.order = data.order.upper()
-            if data.sort is not None and data.sort != 'sessionsCount':
-                sort = helper.key_to_snake_case(data.sort)
-                g_sort = f"{'MIN' if data.order == 'DESC' else 'MAX'}({sort})"
-            else:
-                sort = 'start_ts'
+                                        {query_part};"""
+    elif data.group_by_user:
+        g_sort = "count(full_sessions)"
+        if data.order is None:
+            data.order = "DESC"
+        else:
+            data.order = data.order.upper()
+        if data.sort is not None and data.sort != 'sessionsCount':
+            sort = helper.key_to_snake_case(data.sort)
+            g_sort = f"{'MIN' if data.order == 'DESC' else 'MAX'}({sort})"
+        else:
+            sort = 'start_ts'
 
-            meta_keys = metadata.get(project_id=project_id)
-            main_query = cur.mogrify(f"""SELECT COUNT(*) AS count,
+        main_query = f"""SELECT COUNT(*) AS count,
                                                 COALESCE(JSONB_AGG(users_sessions) 
                                                     FILTER (WHERE rn>%(sessions_limit_s)s AND rn<=%(sessions_limit_e)s), '[]'::JSONB) AS sessions
                                         FROM (SELECT user_id,
@@ -226,18 +244,16 @@ def search2_pg(data: schemas.SessionsSearchPayloadSchema, project_id, user_id, e
                                                     ) AS filtred_sessions
                                                 ) AS full_sessions
                                                 GROUP BY user_id
-                                            ) AS users_sessions;""",
-                                     full_args)
-        else:
-            if data.order is None:
-                data.order = "DESC"
-            sort = 'session_id'
-            if data.sort is not None and data.sort != "session_id":
-                # sort += " " + data.order + "," + helper.key_to_snake_case(data.sort)
-                sort = helper.key_to_snake_case(data.sort)
-
-            meta_keys = metadata.get(project_id=project_id)
-            main_query = cur.mogrify(f"""SELECT COUNT(full_sessions) AS count, 
+                                            ) AS users_sessions;"""
+    else:
+        if data.order is None:
+            data.order = "DESC"
+        sort = 'session_id'
+        if data.sort is not None and data.sort != "session_id":
+            # sort += " " + data.order + "," + helper.key_to_snake_case(data.sort)
+            sort = helper.key_to_snake_case(data.sort)
+
+        main_query = f"""SELECT COUNT(full_sessions) AS count, 
                                                 COALESCE(JSONB_AGG(full_sessions) 
                                                     FILTER (WHERE rn>%(sessions_limit_s)s AND rn<=%(sessions_limit_e)s), '[]'::JSONB) AS sessions
                                             FROM (SELECT *, ROW_NUMBER() OVER (ORDER BY {sort} {data.order}, issue_score DESC) AS rn
@@ -245,30 +261,26 @@ def search2_pg(data: schemas.SessionsSearchPayloadSchema, project_id, user_id, e
                                                                 {"," if len(meta_keys) > 0 else ""}{",".join([f'metadata_{m["index"]}' for m in meta_keys])}
                                             {query_part}
                                             ORDER BY s.session_id desc) AS filtred_sessions
-                                            ORDER BY {sort} {data.order}, issue_score DESC) AS full_sessions;""",
-                                     full_args)
-        # print("--------------------")
-        # print(main_query)
-        # print("--------------------")
-        try:
-            cur.execute(main_query)
-        except Exception as err:
-            print("--------- SESSIONS SEARCH QUERY EXCEPTION -----------")
-            print(main_query)
-            print("--------- PAYLOAD -----------")
-            print(data.dict())
-            print("--------------------")
-            raise err
-        if errors_only:
-            return helper.list_to_camel_case(cur.fetchall())
+                                            ORDER BY {sort} {data.order}, issue_score DESC) AS full_sessions;"""
+    return main_query, full_args
+
 
-        sessions = cur.fetchone()
-        if count_only:
-            return helper.dict_to_camel_case(sessions)
+def __print_search_exception(main_query, data: schemas.SessionsSearchPayloadSchema):
+    print("--------- SESSIONS SEARCH QUERY EXCEPTION -----------")
+    print(main_query)
+    print("--------- PAYLOAD -----------")
+    print(data.dict())
+    print("--------------------")
 
-        total = sessions["count"]
-        sessions = sessions["sessions"]
 
+def __format_search_result(data: schemas.SessionsSearchPayloadSchema, result, errors_only, count_only, meta_keys):
+    if errors_only:
+        return helper.list_to_camel_case(result)
+    if count_only:
+        return helper.dict_to_camel_case(result)
+
+    total = result["count"]
+    sessions = result["sessions"]
     if data.group_by_user:
         for i, s in enumerate(sessions):
             sessions[i] = {**s.pop("last_session")[0], **s}
@@ -288,6 +300,46 @@ def search2_pg(data: schemas.SessionsSearchPayloadSchema, project_id, user_id, e
     }
 
 
+@search_cache.cached("search2_pg")
+def search2_pg(data: schemas.SessionsSearchPayloadSchema, project_id, user_id, errors_only=False,
+               error_status=schemas.ErrorStatus.all, count_only=False, issue=None):
+    meta_keys = [] if errors_only or count_only else metadata.get(project_id=project_id)
+    main_query, full_args = __get_search_query(data=data, project_id=project_id, user_id=user_id,
+                                               errors_only=errors_only, error_status=error_status,
+                                               count_only=count_only, issue=issue, meta_keys=meta_keys)
+    with pg_client.PostgresClient() as cur:
+        main_query = cur.mogrify(main_query, full_args)
+        # print("--------------------")
+        # print(main_query)
+        # print("--------------------")
+        try:
+            cur.execute(main_query)
+        except Exception as err:
+            __print_search_exception(main_query, data)
+            raise err
+        result = cur.fetchall() if errors_only else cur.fetchone()
+    return __format_search_result(data, result, errors_only=errors_only, count_only=count_only, meta_keys=meta_keys)
+
+
+@search_cache.cached("search2_pg")
+async def search2_pg_async(data: schemas.SessionsSearchPayloadSchema, project_id, user_id, errors_only=False,
+                           error_status=schemas.ErrorStatus.all, count_only=False, issue=None):
+    meta_keys = [] if errors_only or count_only else await metadata.get_async(project_id=project_id)
+    main_query, full_args = __get_search_query(data=data, project_id=project_id, user_id=user_id,
+                                               errors_only=errors_only, error_status=error_status,
+                                               count_only=count_only, issue=issue, meta_keys=meta_keys)
+    async with pg_client.AsyncPostgresClient() as cur:
+        main_query = cur.mogrify(main_query, full_args)
+        try:
+            await cur.execute(main_query)
+        except Exception as err:
+            __print_search_exception(main_query, data)
+            raise err
+        result = await cur.fetchall() if errors_only else await cur.fetchone()
+    return __format_search_result(data, result, errors_only=errors_only, count_only=count_only, meta_keys=meta_keys)
+
+
+@search_cache.cached("search2_series")
 def search2_series(data: schemas.SessionsSearchPayloadSchema, project_id: int, density: int,
                    view_type: schemas.MetricTimeseriesViewType, metric_type: schemas.MetricType,
                    metric_of: schemas.TableMetricOfType, metric_value: List):
@@ -397,6 +449,185 @@ def __is_valid_event(is_any: bool, event: schemas._SessionSearchEventSchema):
                         event.filters is None or len(event.filters) == 0))
 
 
+SEARCH_EVENT_TYPES = {e.ui_type: e for e in [events.event_type.CLICK, events.event_type.INPUT,
+                                              events.event_type.LOCATION, events.event_type.CUSTOM,
+                                              events.event_type.REQUEST, events.event_type.GRAPHQL,
+                                              events.event_type.STATEACTION, events.event_type.CLICK_IOS,
+                                              events.event_type.INPUT_IOS, events.event_type.VIEW_IOS,
+                                              events.event_type.CUSTOM_IOS, events.event_type.REQUEST_IOS]}
+
+
+def __get_event_scan(i, event: schemas._SessionSearchEventSchema, full_args):
+    """
+    Scan of the event tables for the i-th event of a search, None if the event doesn't filter anything
+    """
+    event_type = event.type
+    is_any = _isAny_opreator(event.operator)
+    op = __get_sql_operator(event.operator)
+    is_not = __is_negation_operator(event.operator)
+    if is_not:
+        op = __reverse_sql_operator(op)
+    e_k = f"e_value{i}"
+    s_k = e_k + "_source"
+    if event_type != schemas.PerformanceEventType.time_between_events:
+        event.value = helper.values_for_operator(value=event.value, op=event.operator)
+        full_args.update({**_multiple_values(event.value, value_key=e_k),
+                          **_multiple_values(event.source, value_key=s_k)})
+    kept = sessions_query.selectivity(event.operator, event.value)
+
+    if event_type in SEARCH_EVENT_TYPES:
+        e = SEARCH_EVENT_TYPES[event_type]
+        scan = sessions_query.EventScan(e.table, is_not=is_not)
+        if not is_any:
+            scan.where(_multiple_conditions(f"main.{e.column} {op} %({e_k})s", event.value, value_key=e_k), kept)
+        if event_type in [events.event_type.INPUT.ui_type, events.event_type.INPUT_IOS.ui_type] \
+                and event.source is not None and len(event.source) > 0:
+            scan.where(_multiple_conditions(f"main.value ILIKE %(custom{i})s", event.source,
+                                            value_key=f"custom{i}"))
+            full_args.update(_multiple_values(event.source, value_key=f"custom{i}"))
+
+    elif event_type == events.event_type.ERROR.ui_type:
+        scan = sessions_query.EventScan(events.event_type.ERROR.table,
+                                        joins="INNER JOIN public.errors AS main1 USING(error_id)", is_not=is_not)
+        event.source = tuple(event.source)
+        if not is_any and event.value not in [None, "*", ""]:
+            scan.where(_multiple_conditions(f"(main1.message {op} %({e_k})s OR main1.name {op} %({e_k})s)",
+                                            event.value, value_key=e_k), kept)
+        if event.source[0] not in [None, "*", ""]:
+            scan.where(_multiple_conditions(f"main1.source = %({s_k})s", event.value, value_key=s_k))
+
+    elif event_type == events.event_type.ERROR_IOS.ui_type:
+        scan = sessions_query.EventScan(events.event_type.ERROR_IOS.table,
+                                        joins="INNER JOIN public.crashes_ios AS main1 USING(crash_id)",
+                                        is_not=is_not)
+        if not is_any and event.value not in [None, "*", ""]:
+            scan.where(_multiple_conditions(f"(main1.reason {op} %({e_k})s OR main1.name {op} %({e_k})s)",
+                                            event.value, value_key=e_k), kept)
+
+    elif event_type == schemas.PerformanceEventType.fetch_failed:
+        scan = sessions_query.EventScan(events.event_type.REQUEST.table, is_not=is_not)
+        if not is_any:
+            scan.where(_multiple_conditions(f"main.{events.event_type.REQUEST.column} {op} %({e_k})s",
+                                            event.value, value_key=e_k), kept)
+        col = performance_event.get_col(event_type)
+        scan.where(f"main.{col['column']} = FALSE")
+
+    elif event_type in [schemas.PerformanceEventType.location_dom_complete,
+                        schemas.PerformanceEventType.location_largest_contentful_paint_time,
+                        schemas.PerformanceEventType.location_ttfb,
+                        schemas.PerformanceEventType.location_avg_cpu_load,
+                        schemas.PerformanceEventType.location_avg_memory_usage
+                        ]:
+        col = performance_event.get_col(event_type)
+        colname = col["column"]
+        tname = "main"
+        if col.get("extraJoin") is not None:
+            tname = "ej"
+            scan = sessions_query.EventScan(events.event_type.LOCATION.table, is_not=is_not,
+                                            joins=f"INNER JOIN {col['extraJoin']} AS {tname} USING(session_id)")
+            scan.where(f"{tname}.timestamp >= main.timestamp", 1)
+            scan.where(f"{tname}.timestamp >= %(startDate)s", 1)
+            scan.where(f"{tname}.timestamp <= %(endDate)s", 1)
+        else:
+            scan = sessions_query.EventScan(events.event_type.LOCATION.table, is_not=is_not)
+        if not is_any:
+            scan.where(_multiple_conditions(f"main.{events.event_type.LOCATION.column} {op} %({e_k})s",
+                                            event.value, value_key=e_k), kept)
+        e_k += "_custom"
+        full_args.update(_multiple_values(event.source, value_key=e_k))
+        scan.where(f"{tname}.{colname} IS NOT NULL AND {tname}.{colname}>0 AND " +
+                   _multiple_conditions(f"{tname}.{colname} {event.sourceOperator} %({e_k})s",
+                                        event.source, value_key=e_k))
+
+    elif event_type == schemas.PerformanceEventType.time_between_events:
+        event_1 = getattr(events.event_type, event.value[0].type)
+        event_2 = getattr(events.event_type, event.value[1].type)
+        scan = sessions_query.EventScan(event_1.table, joins=f"INNER JOIN {event_2.table} AS main2 USING(session_id)",
+                                        aliases=("main", "main2"), is_not=is_not)
+        if not isinstance(event.value[0].value, list):
+            event.value[0].value = [event.value[0].value]
+        if not isinstance(event.value[1].value, list):
+            event.value[1].value = [event.value[1].value]
+        event.value[0].value = helper.values_for_operator(value=event.value[0].value,
+                                                          op=event.value[0].operator)
+        event.value[1].value = helper.values_for_operator(value=event.value[1].value,
+                                                          op=event.value[0].operator)
+        e_k1 = e_k + "_e1"
+        e_k2 = e_k + "_e2"
+        full_args.update({**_multiple_values(event.value[0].value, value_key=e_k1),
+                          **_multiple_values(event.value[1].value, value_key=e_k2)})
+        scan.where("main2.timestamp >= %(startDate)s", 1)
+        scan.where("main2.timestamp <= %(endDate)s", 1)
+        for alias, e, value, key in [("main", event_1, event.value[0], e_k1), ("main2", event_2, event.value[1], e_k2)]:
+            if not _isAny_opreator(value.operator):
+                scan.where(_multiple_conditions(f"{alias}.{e.column} {__get_sql_operator(value.operator)} %({key})s",
+                                                value.value, value_key=key),
+                           sessions_query.selectivity(value.operator, value.value))
+        e_k += "_custom"
+        full_args.update(_multiple_values(event.source, value_key=e_k))
+        scan.where(_multiple_conditions(f"main2.timestamp - main.timestamp {event.sourceOperator} %({e_k})s",
+                                        event.source, value_key=e_k))
+
+    elif event_type == schemas.EventType.request_details:
+        scan = sessions_query.EventScan(events.event_type.REQUEST.table, is_not=is_not)
+        for j, f in enumerate(event.filters):
+            if _isAny_opreator(f.operator) or len(f.value) == 0:
+                continue
+            f.value = helper.values_for_operator(value=f.value, op=f.operator)
+            op = __get_sql_operator(f.operator)
+            kept = sessions_query.selectivity(f.operator, f.value)
+            e_k_f = e_k + f"_fetch{j}"
+            full_args.update(_multiple_values(f.value, value_key=e_k_f))
+            if f.type == schemas.FetchFilterType._url:
+                scan.where(_multiple_conditions(f"main.{events.event_type.REQUEST.column} {op} %({e_k_f})s",
+                                                f.value, value_key=e_k_f), kept)
+            elif f.type == schemas.FetchFilterType._status_code:
+                scan.where(_multiple_conditions(f"main.status_code {f.operator} %({e_k_f})s", f.value,
+                                                value_key=e_k_f), kept)
+            elif f.type == schemas.FetchFilterType._method:
+                scan.where(_multiple_conditions(f"main.method {op} %({e_k_f})s", f.value, value_key=e_k_f), kept)
+            elif f.type == schemas.FetchFilterType._duration:
+                scan.where(_multiple_conditions(f"main.duration {f.operator} %({e_k_f})s", f.value,
+                                                value_key=e_k_f), kept)
+            elif f.type == schemas.FetchFilterType._request_body:
+                scan.where(_multiple_conditions(f"main.request_body {op} %({e_k_f})s", f.value, value_key=e_k_f),
+                           kept)
+            elif f.type == schemas.FetchFilterType._response_body:
+                scan.where(_multiple_conditions(f"main.response_body {op} %({e_k_f})s", f.value, value_key=e_k_f),
+                           kept)
+            else:
+                print(f"undefined FETCH filter: {f.type}")
+        if len(scan.conditions) == 0:
+            return None
+
+    elif event_type == schemas.EventType.graphql_details:
+        scan = sessions_query.EventScan(events.event_type.GRAPHQL.table, is_not=is_not)
+        for j, f in enumerate(event.filters):
+            if _isAny_opreator(f.operator) or len(f.value) == 0:
+                continue
+            f.value = helper.values_for_operator(value=f.value, op=f.operator)
+            op = __get_sql_operator(f.operator)
+            kept = sessions_query.selectivity(f.operator, f.value)
+            e_k_f = e_k + f"_graphql{j}"
+            full_args.update(_multiple_values(f.value, value_key=e_k_f))
+            if f.type == schemas.GraphqlFilterType._name:
+                scan.where(_multiple_conditions(f"main.{events.event_type.GRAPHQL.column} {op} %({e_k_f})s",
+                                                f.value, value_key=e_k_f), kept)
+            elif f.type == schemas.GraphqlFilterType._method:
+                scan.where(_multiple_conditions(f"main.method {op} %({e_k_f})s", f.value, value_key=e_k_f), kept)
+            elif f.type == schemas.GraphqlFilterType._request_body:
+                scan.where(_multiple_conditions(f"main.request_body {op} %({e_k_f})s", f.value, value_key=e_k_f),
+                           kept)
+            elif f.type == schemas.GraphqlFilterType._response_body:
+                scan.where(_multiple_conditions(f"main.response_body {op} %({e_k_f})s", f.value, value_key=e_k_f),
+                           kept)
+            else:
+                print(f"undefined GRAPHQL filter: {f.type}")
+    else:
+        return None
+    return scan
+
+
 def search_query_parts(data, error_status, errors_only, favorite_only, issue, project_id, user_id, extra_event=None):
     ss_constraints = []
     full_args = {"project_id": project_id, "startDate": data.startDate, "endDate": data.endDate,
@@ -612,359 +843,19 @@ def search_query_parts(data, error_status, errors_only, favorite_only, issue, pr
                                          value_key=f_k))
     # ---------------------------------------------------------------------------
     if len(data.events) > 0:
-        valid_events_count = 0
-        for event in data.events:
-            is_any = _isAny_opreator(event.operator)
-            if not isinstance(event.value, list):
-                event.value = [event.value]
-            if __is_valid_event(is_any=is_any, event=event):
-                valid_events_count += 1
-        events_query_from = []
-        event_index = 0
-        or_events = data.events_order == schemas.SearchEventOrder._or
-        # events_joiner = " FULL JOIN " if or_events else " INNER JOIN LATERAL "
-        events_joiner = " UNION " if or_events else " INNER JOIN LATERAL "
+        scans = []
         for i, event in enumerate(data.events):
-            event_type = event.type
-            is_any = _isAny_opreator(event.operator)
             if not isinstance(event.value, list):
                 event.value = [event.value]
-            if not __is_valid_event(is_any=is_any, event=event):
-                continue
-            op = __get_sql_operator(event.operator)
-            is_not = False
-            if __is_negation_operator(event.operator):
-                is_not = True
-                op = __reverse_sql_operator(op)
-            if event_index == 0 or or_events:
-                event_from = "%s INNER JOIN public.sessions AS ms USING (session_id)"
-                event_where = ["ms.project_id = %(projectId)s", "main.timestamp >= %(startDate)s",
-                               "main.timestamp <= %(endDate)s", "ms.start_ts >= %(startDate)s",
-                               "ms.start_ts <= %(endDate)s", "ms.duration IS NOT NULL"]
-                if favorite_only and not errors_only:
-                    event_from += "INNER JOIN public.user_favorite_sessions AS fs USING(session_id)"
-                    event_where.append("fs.user_id = %(userId)s")
-            else:
-                event_from = "%s"
-                event_where = ["main.timestamp >= %(startDate)s", "main.timestamp <= %(endDate)s",
-                               "main.session_id=event_0.session_id"]
-                if data.events_order == schemas.SearchEventOrder._then:
-                    event_where.append(f"event_{event_index - 1}.timestamp <= main.timestamp")
-            e_k = f"e_value{i}"
-            s_k = e_k + "_source"
-            if event.type != schemas.PerformanceEventType.time_between_events:
-                event.value = helper.values_for_operator(value=event.value, op=event.operator)
-                full_args = {**full_args,
-                             **_multiple_values(event.value, value_key=e_k),
-                             **_multiple_values(event.source, value_key=s_k)}
-
-            if event_type == events.event_type.CLICK.ui_type:
-                event_from = event_from % f"{events.event_type.CLICK.table} AS main "
-                if not is_any:
-                    event_where.append(
-                        _multiple_conditions(f"main.{events.event_type.CLICK.column} {op} %({e_k})s", event.value,
-                                             value_key=e_k))
-
-            elif event_type == events.event_type.INPUT.ui_type:
-                event_from = event_from % f"{events.event_type.INPUT.table} AS main "
-                if not is_any:
-                    event_where.append(
-                        _multiple_conditions(f"main.{events.event_type.INPUT.column} {op} %({e_k})s", event.value,
-                                             value_key=e_k))
-                if event.source is not None and len(event.source) > 0:
-                    event_where.append(_multiple_conditions(f"main.value ILIKE %(custom{i})s", event.source,
-                                                            value_key=f"custom{i}"))
-                    full_args = {**full_args, **_multiple_values(event.source, value_key=f"custom{i}")}
-
-            elif event_type == events.event_type.LOCATION.ui_type:
-                event_from = event_from % f"{events.event_type.LOCATION.table} AS main "
-                if not is_any:
-                    event_where.append(
-                        _multiple_conditions(f"main.{events.event_type.LOCATION.column} {op} %({e_k})s",
-                                             event.value, value_key=e_k))
-            elif event_type == events.event_type.CUSTOM.ui_type:
-                event_from = event_from % f"{events.event_type.CUSTOM.table} AS main "
-                if not is_any:
-                    event_where.append(
-                        _multiple_conditions(f"main.{events.event_type.CUSTOM.column} {op} %({e_k})s", event.value,
-                                             value_key=e_k))
-            elif event_type == events.event_type.REQUEST.ui_type:
-                event_from = event_from % f"{events.event_type.REQUEST.table} AS main "
-                if not is_any:
-                    event_where.append(
-                        _multiple_conditions(f"main.{events.event_type.REQUEST.column} {op} %({e_k})s", event.value,
-                                             value_key=e_k))
-            elif event_type == events.event_type.GRAPHQL.ui_type:
-                event_from = event_from % f"{events.event_type.GRAPHQL.table} AS main "
-                if not is_any:
-                    event_where.append(
-                        _multiple_conditions(f"main.{events.event_type.GRAPHQL.column} {op} %({e_k})s", event.value,
-                                             value_key=e_k))
-            elif event_type == events.event_type.STATEACTION.ui_type:
-                event_from = event_from % f"{events.event_type.STATEACTION.table} AS main "
-                if not is_any:
-                    event_where.append(
-                        _multiple_conditions(f"main.{events.event_type.STATEACTION.column} {op} %({e_k})s",
-                                             event.value, value_key=e_k))
-            elif event_type == events.event_type.ERROR.ui_type:
-                event_from = event_from % f"{events.event_type.ERROR.table} AS main INNER JOIN public.errors AS main1 USING(error_id)"
-                event.source = tuple(event.source)
-                if not is_any and event.value not in [None, "*", ""]:
-                    event_where.append(
-                        _multiple_conditions(f"(main1.message {op} %({e_k})s OR main1.name {op} %({e_k})s)",
-                                             event.value, value_key=e_k))
-                if event.source[0] not in [None, "*", ""]:
-                    event_where.append(_multiple_conditions(f"main1.source = %({s_k})s", event.value, value_key=s_k))
-
-
-            # ----- IOS
-            elif event_type == events.event_type.CLICK_IOS.ui_type:
-                event_from = event_from % f"{events.event_type.CLICK_IOS.table} AS main "
-                if not is_any:
-                    event_where.append(
-                        _multiple_conditions(f"main.{events.event_type.CLICK_IOS.column} {op} %({e_k})s",
-                                             event.value, value_key=e_k))
-
-            elif event_type == events.event_type.INPUT_IOS.ui_type:
-                event_from = event_from % f"{events.event_type.INPUT_IOS.table} AS main "
-                if not is_any:
-                    event_where.append(
-                        _multiple_conditions(f"main.{events.event_type.INPUT_IOS.column} {op} %({e_k})s",
-                                             event.value, value_key=e_k))
-                if event.source is not None and len(event.source) > 0:
-                    event_where.append(_multiple_conditions(f"main.value ILIKE %(custom{i})s", event.source,
-                                                            value_key="custom{i}"))
-                    full_args = {**full_args, **_multiple_values(event.source, f"custom{i}")}
-            elif event_type == events.event_type.VIEW_IOS.ui_type:
-                event_from = event_from % f"{events.event_type.VIEW_IOS.table} AS main "
-                if not is_any:
-                    event_where.append(
-                        _multiple_conditions(f"main.{events.event_type.VIEW_IOS.column} {op} %({e_k})s",
-                                             event.value, value_key=e_k))
-            elif event_type == events.event_type.CUSTOM_IOS.ui_type:
-                event_from = event_from % f"{events.event_type.CUSTOM_IOS.table} AS main "
-                if not is_any:
-                    event_where.append(
-                        _multiple_conditions(f"main.{events.event_type.CUSTOM_IOS.column} {op} %({e_k})s",
-                                             event.value, value_key=e_k))
-            elif event_type == events.event_type.REQUEST_IOS.ui_type:
-                event_from = event_from % f"{events.event_type.REQUEST_IOS.table} AS main "
-                if not is_any:
-                    event_where.append(
-                        _multiple_conditions(f"main.{events.event_type.REQUEST_IOS.column} {op} %({e_k})s",
-                                             event.value, value_key=e_k))
-            elif event_type == events.event_type.ERROR_IOS.ui_type:
-                event_from = event_from % f"{events.event_type.ERROR_IOS.table} AS main INNER JOIN public.crashes_ios AS main1 USING(crash_id)"
-                if not is_any and event.value not in [None, "*", ""]:
-                    event_where.append(
-                        _multiple_conditions(f"(main1.reason {op} %({e_k})s OR main1.name {op} %({e_k})s)",
-                                             event.value, value_key=e_k))
-            elif event_type == schemas.PerformanceEventType.fetch_failed:
-                event_from = event_from % f"{events.event_type.REQUEST.table} AS main "
-                if not is_any:
-                    event_where.append(
-                        _multiple_conditions(f"main.{events.event_type.REQUEST.column} {op} %({e_k})s",
-                                             event.value, value_key=e_k))
-                col = performance_event.get_col(event_type)
-                colname = col["column"]
-                event_where.append(f"main.{colname} = FALSE")
-            # elif event_type == schemas.PerformanceEventType.fetch_duration:
-            #     event_from = event_from % f"{events.event_type.REQUEST.table} AS main "
-            #     if not is_any:
-            #         event_where.append(
-            #             _multiple_conditions(f"main.{events.event_type.REQUEST.column} {op} %({e_k})s",
-            #                                  event.value, value_key=e_k))
-            #     col = performance_event.get_col(event_type)
-            #     colname = col["column"]
-            #     tname = "main"
-            #     e_k += "_custom"
-            #     full_args = {**full_args, **_multiple_values(event.source, value_key=e_k)}
-            #     event_where.append(f"{tname}.{colname} IS NOT NULL AND {tname}.{colname}>0 AND " +
-            #                        _multiple_conditions(f"{tname}.{colname} {event.sourceOperator} %({e_k})s",
-            #                                             event.source, value_key=e_k))
-            elif event_type in [schemas.PerformanceEventType.location_dom_complete,
-                                schemas.PerformanceEventType.location_largest_contentful_paint_time,
-                                schemas.PerformanceEventType.location_ttfb,
-                                schemas.PerformanceEventType.location_avg_cpu_load,
-                                schemas.PerformanceEventType.location_avg_memory_usage
-                                ]:
-                event_from = event_from % f"{events.event_type.LOCATION.table} AS main "
-                col = performance_event.get_col(event_type)
-                colname = col["column"]
-                tname = "main"
-                if col.get("extraJoin") is not None:
-                    tname = "ej"
-                    event_from += f" INNER JOIN {col['extraJoin']} AS {tname} USING(session_id)"
-                    event_where += [f"{tname}.timestamp >= main.timestamp", f"{tname}.timestamp >= %(startDate)s",
-                                    f"{tname}.timestamp <= %(endDate)s"]
-                if not is_any:
-                    event_where.append(
-                        _multiple_conditions(f"main.{events.event_type.LOCATION.column} {op} %({e_k})s",
-                                             event.value, value_key=e_k))
-                e_k += "_custom"
-                full_args = {**full_args, **_multiple_values(event.source, value_key=e_k)}
-
-                event_where.append(f"{tname}.{colname} IS NOT NULL AND {tname}.{colname}>0 AND " +
-                                   _multiple_conditions(f"{tname}.{colname} {event.sourceOperator} %({e_k})s",
-                                                        event.source, value_key=e_k))
-            elif event_type == schemas.PerformanceEventType.time_between_events:
-                event_from = event_from % f"{getattr(events.event_type, event.value[0].type).table} AS main INNER JOIN {getattr(events.event_type, event.value[1].type).table} AS main2 USING(session_id) "
-                if not isinstance(event.value[0].value, list):
-                    event.value[0].value = [event.value[0].value]
-                if not isinstance(event.value[1].value, list):
-                    event.value[1].value = [event.value[1].value]
-                event.value[0].value = helper.values_for_operator(value=event.value[0].value,
-                                                                  op=event.value[0].operator)
-                event.value[1].value = helper.values_for_operator(value=event.value[1].value,
-                                                                  op=event.value[0].operator)
-                e_k1 = e_k + "_e1"
-                e_k2 = e_k + "_e2"
-                full_args = {**full_args,
-                             **_multiple_values(event.value[0].value, value_key=e_k1),
-                             **_multiple_values(event.value[1].value, value_key=e_k2)}
-                s_op = __get_sql_operator(event.value[0].operator)
-                event_where += ["main2.timestamp >= %(startDate)s", "main2.timestamp <= %(endDate)s"]
-                if event_index > 0 and not or_events:
-                    event_where.append("main2.session_id=event_0.session_id")
-                is_any = _isAny_opreator(event.value[0].operator)
-                if not is_any:
-                    event_where.append(
-                        _multiple_conditions(
-                            f"main.{getattr(events.event_type, event.value[0].type).column} {s_op} %({e_k1})s",
-                            event.value[0].value, value_key=e_k1))
-                s_op = __get_sql_operator(event.value[1].operator)
-                is_any = _isAny_opreator(event.value[1].operator)
-                if not is_any:
-                    event_where.append(
-                        _multiple_conditions(
-                            f"main2.{getattr(events.event_type, event.value[1].type).column} {s_op} %({e_k2})s",
-                            event.value[1].value, value_key=e_k2))
-
-                e_k += "_custom"
-                full_args = {**full_args, **_multiple_values(event.source, value_key=e_k)}
-                event_where.append(
-                    _multiple_conditions(f"main2.timestamp - main.timestamp {event.sourceOperator} %({e_k})s",
-                                         event.source, value_key=e_k))
-
-            elif event_type == schemas.EventType.request_details:
-                event_from = event_from % f"{events.event_type.REQUEST.table} AS main "
-                apply = False
-                for j, f in enumerate(event.filters):
-                    is_any = _isAny_opreator(f.operator)
-                    if is_any or len(f.value) == 0:
-                        continue
-                    f.value = helper.values_for_operator(value=f.value, op=f.operator)
-                    op = __get_sql_operator(f.operator)
-                    e_k_f = e_k + f"_fetch{j}"
-                    full_args = {**full_args, **_multiple_values(f.value, value_key=e_k_f)}
-                    if f.type == schemas.FetchFilterType._url:
-                        event_where.append(
-                            _multiple_conditions(f"main.{events.event_type.REQUEST.column} {op} %({e_k_f})s", f.value,
-                                                 value_key=e_k_f))
-                        apply = True
-                    elif f.type == schemas.FetchFilterType._status_code:
-                        event_where.append(
-                            _multiple_conditions(f"main.status_code {f.operator} %({e_k_f})s", f.value,
-                                                 value_key=e_k_f))
-                        apply = True
-                    elif f.type == schemas.FetchFilterType._method:
-                        event_where.append(
-                            _multiple_conditions(f"main.method {op} %({e_k_f})s", f.value, value_key=e_k_f))
-                        apply = True
-                    elif f.type == schemas.FetchFilterType._duration:
-                        event_where.append(
-                            _multiple_conditions(f"main.duration {f.operator} %({e_k_f})s", f.value, value_key=e_k_f))
-                        apply = True
-                    elif f.type == schemas.FetchFilterType._request_body:
-                        event_where.append(
-                            _multiple_conditions(f"main.request_body {op} %({e_k_f})s", f.value, value_key=e_k_f))
-                        apply = True
-                    elif f.type == schemas.FetchFilterType._response_body:
-                        event_where.append(
-                            _multiple_conditions(f"main.response_body {op} %({e_k_f})s", f.value, value_key=e_k_f))
-                        apply = True
-                    else:
-                        print(f"undefined FETCH filter: {f.type}")
-                if not apply:
-                    continue
-            elif event_type == schemas.EventType.graphql_details:
-                event_from = event_from % f"{events.event_type.GRAPHQL.table} AS main "
-                for j, f in enumerate(event.filters):
-                    is_any = _isAny_opreator(f.operator)
-                    if is_any or len(f.value) == 0:
-                        continue
-                    f.value = helper.values_for_operator(value=f.value, op=f.operator)
-                    op = __get_sql_operator(f.operator)
-                    e_k_f = e_k + f"_graphql{j}"
-                    full_args = {**full_args, **_multiple_values(f.value, value_key=e_k_f)}
-                    if f.type == schemas.GraphqlFilterType._name:
-                        event_where.append(
-                            _multiple_conditions(f"main.{events.event_type.GRAPHQL.column} {op} %({e_k_f})s", f.value,
-                                                 value_key=e_k_f))
-                    elif f.type == schemas.GraphqlFilterType._method:
-                        event_where.append(
-                            _multiple_conditions(f"main.method {op} %({e_k_f})s", f.value, value_key=e_k_f))
-                    elif f.type == schemas.GraphqlFilterType._request_body:
-                        event_where.append(
-                            _multiple_conditions(f"main.request_body {op} %({e_k_f})s", f.value, value_key=e_k_f))
-                    elif f.type == schemas.GraphqlFilterType._response_body:
-                        event_where.append(
-                            _multiple_conditions(f"main.response_body {op} %({e_k_f})s", f.value, value_key=e_k_f))
-                    else:
-                        print(f"undefined GRAPHQL filter: {f.type}")
-            else:
+            if not __is_valid_event(is_any=_isAny_opreator(event.operator), event=event):
                 continue
-            if event_index == 0 or or_events:
-                event_where += ss_constraints
-            if is_not:
-                if event_index == 0 or or_events:
-                    events_query_from.append(f"""\
-                                    (SELECT
-                                        session_id, 
-                                        0 AS timestamp
-                                      FROM sessions
-                                      WHERE EXISTS(SELECT session_id 
-                                                    FROM {event_from} 
-                                                    WHERE {" AND ".join(event_where)} 
-                                                        AND sessions.session_id=ms.session_id) IS FALSE
-                                        AND project_id = %(projectId)s 
-                                        AND start_ts >= %(startDate)s
-                                        AND start_ts <= %(endDate)s
-                                        AND duration IS NOT NULL
-                                    ) {"" if or_events else (f"AS event_{event_index}" + ("ON(TRUE)" if event_index > 0 else ""))}\
-                                    """)
-                else:
-                    events_query_from.append(f"""\
-            (SELECT
-                event_0.session_id, 
-                event_{event_index - 1}.timestamp AS timestamp
-              WHERE EXISTS(SELECT session_id FROM {event_from} WHERE {" AND ".join(event_where)}) IS FALSE
-            ) AS event_{event_index} {"ON(TRUE)" if event_index > 0 else ""}\
-            """)
-            else:
-                events_query_from.append(f"""\
-            (SELECT main.session_id, {"MIN" if event_index < (valid_events_count - 1) else "MAX"}(main.timestamp) AS timestamp
-              FROM {event_from}
-              WHERE {" AND ".join(event_where)}
-              GROUP BY 1
-            ) {"" if or_events else (f"AS event_{event_index} " + ("ON(TRUE)" if event_index > 0 else ""))}\
-            """)
-            event_index += 1
-        if event_index > 0:
-            if or_events:
-                events_query_part = f"""SELECT
-                                            session_id, 
-                                            MIN(timestamp) AS first_event_ts, 
-                                            MAX(timestamp) AS last_event_ts
-                                        FROM ({events_joiner.join(events_query_from)}) AS u
-                                        GROUP BY 1"""
-            else:
-                events_query_part = f"""SELECT
-                                        event_0.session_id,
-                                        MIN(event_0.timestamp) AS first_event_ts,
-                                        MAX(event_{event_index - 1}.timestamp) AS last_event_ts
-                                    FROM {events_joiner.join(events_query_from)}
-                                    GROUP BY 1"""
+            scan = __get_event_scan(i, event, full_args)
+            if scan is not None:
+                scans.append(scan)
+        if len(scans) > 0:
+            events_query_part = sessions_query.compile_events(scans, order=data.events_order, args=full_args,
+                                                              session_constraints=ss_constraints,
+                                                              favorite_only=favorite_only and not errors_only)
     else:
         data.events = []
     # ---------------------------------------------------------------------------
@@ -1122,45 +1013,61 @@ def search_by_issue(user_id, issue, project_id, start_date, end_date):
     return helper.list_to_camel_case(rows)
 
 
-def get_user_sessions(project_id, user_id, start_date, end_date):
-    with pg_client.PostgresClient() as cur:
-        constraints = ["s.project_id = %(projectId)s", "s.user_id = %(userId)s"]
-        if start_date is not None:
-            constraints.append("s.start_ts >= %(startDate)s")
-        if end_date is not None:
-            constraints.append("s.start_ts <= %(endDate)s")
+def __get_user_sessions_query(project_id, user_id, start_date, end_date, limit=None):
+    constraints = ["s.project_id = %(projectId)s", "s.user_id = %(userId)s"]
+    if start_date is not None:
+        constraints.append("s.start_ts >= %(startDate)s")
+    if end_date is not None:
+        constraints.append("s.start_ts <= %(endDate)s")
+
+    query_part = f"""\
+        FROM public.sessions AS s
+        WHERE {" AND ".join(constraints)}"""
+
+    query = f"""\
+                SELECT s.project_id,
+                       s.session_id::text AS session_id,
+                       s.user_uuid,
+                       s.user_id,
+                       s.user_os,
+                       s.user_browser,
+                       s.user_device,
+                       s.user_country,
+                       s.start_ts,
+                       s.duration,
+                       s.events_count,
+                       s.pages_count,
+                       s.errors_count
+                {query_part}
+                ORDER BY s.session_id
+                {"LIMIT %(limit)s" if limit is not None else ""};"""
+    return query, {
+        "projectId": project_id,
+        "userId": user_id,
+        "startDate": start_date,
+        "endDate": end_date,
+        "limit": limit
+    }
 
-        query_part = f"""\
-            FROM public.sessions AS s
-            WHERE {" AND ".join(constraints)}"""
-
-        cur.execute(cur.mogrify(f"""\
-                    SELECT s.project_id,
-                           s.session_id::text AS session_id,
-                           s.user_uuid,
-                           s.user_id,
-                           s.user_os,
-                           s.user_browser,
-                           s.user_device,
-                           s.user_country,
-                           s.start_ts,
-                           s.duration,
-                           s.events_count,
-                           s.pages_count,
-                           s.errors_count
-                    {query_part}
-                    ORDER BY s.session_id         
-                    LIMIT 50;""", {
-            "projectId": project_id,
-            "userId": user_id,
-            "startDate": start_date,
-            "endDate": end_date
-        }))
 
+def get_user_sessions(project_id, user_id, start_date, end_date):
+    query, params = __get_user_sessions_query(project_id=project_id, user_id=user_id,
+                                              start_date=start_date, end_date=end_date, limit=50)
+    with pg_client.PostgresClient() as cur:
+        cur.execute(cur.mogrify(query, params))
         sessions = cur.fetchall()
     return helper.list_to_camel_case(sessions)
 
 
+def stream_user_sessions(project_id, user_id, start_date, end_date):
+    """
+    All the sessions of the user, yielded as they are fetched
+    """
+    query, params = __get_user_sessions_query(project_id=project_id, user_id=user_id,
+                                              start_date=start_date, end_date=end_date)
+    return pg_client.stream(query, params, read_only=True)
+
+
 def get_session_user(project_id, user_id):
     with pg_client.PostgresClient() as cur:
         query = cur.mogrify(
@@ -1186,16 +1093,15 @@ def get_session_user(project_id, user_id):
 
 
 def get_session_ids_by_user_ids(project_id, user_ids):
-    with pg_client.PostgresClient() as cur:
-        query = cur.mogrify(
-            """\
-            SELECT session_id FROM public.sessions
-            WHERE
-                project_id = %(project_id)s AND user_id IN %(userId)s;""",
-            {"project_id": project_id, "userId": tuple(user_ids)}
-        )
-        ids = cur.execute(query=query)
-    return ids
+    """
+    Yields the ids as they are fetched, users can have a lot of sessions
+    """
+    for row in pg_client.stream("""\
+                SELECT session_id FROM public.sessions
+                WHERE
+                    project_id = %(project_id)s AND user_id IN %(userId)s;""",
+                                {"project_id": project_id, "userId": tuple(user_ids)}):
+        yield row["session_id"]
 
 
 def delete_sessions_by_session_ids(session_ids):
@@ -1,4 +1,4 @@
-from chalicelib.core import sessions
+from chalicelib.core import sessions, search_cache
 from chalicelib.utils import pg_client
 
 
@@ -12,6 +12,7 @@ def add_favorite_session(project_id, user_id, session_id):
                     (%(userId)s,%(sessionId)s);""",
                         {"userId": user_id, "sessionId": session_id})
         )
+    search_cache.invalidate(project_id)
     return sessions.get_by_id2_pg(project_id=project_id, session_id=session_id, user_id=user_id, full_data=False,
                                   include_fav_viewed=True)
 
@@ -26,21 +27,24 @@ def remove_favorite_session(project_id, user_id, session_id):
                             AND session_id = %(sessionId)s;""",
                         {"userId": user_id, "sessionId": session_id})
         )
+    search_cache.invalidate(project_id)
     return sessions.get_by_id2_pg(project_id=project_id, session_id=session_id, user_id=user_id, full_data=False,
                                   include_fav_viewed=True)
 
 
 def add_viewed_session(project_id, user_id, session_id):
     with pg_client.PostgresClient() as cur:
-        cur.execute(
-            cur.mogrify("""\
+        cur.execute_prepared("""\
                 INSERT INTO public.user_viewed_sessions 
                     (user_id, session_id) 
                 VALUES 
                     (%(userId)s,%(sessionId)s)
                 ON CONFLICT DO NOTHING;""",
-                        {"userId": user_id, "sessionId": session_id})
-        )
+                             {"userId": user_id, "sessionId": session_id})
+        viewed = cur.rowcount > 0
+    # the results of the searches have the viewed flag
+    if viewed:
+        search_cache.invalidate(project_id)
 
 
 def favorite_session(project_id, user_id, session_id):
@@ -56,8 +60,7 @@ def view_session(project_id, user_id, session_id):
 
 def favorite_session_exists(user_id, session_id):
     with pg_client.PostgresClient() as cur:
-        cur.execute(
-            cur.mogrify(
+        cur.execute_prepared(
                 """SELECT 
                         session_id                                                
                     FROM public.user_favorite_sessions 
@@ -65,6 +68,5 @@ def favorite_session_exists(user_id, session_id):
                      user_id = %(userId)s
                      AND session_id = %(sessionId)s""",
                 {"userId": user_id, "sessionId": session_id})
-        )
         r = cur.fetchone()
         return r is not None
@@ -0,0 +1,222 @@
+"""
+Compiler of the events part of the sessions search.
+
+sessions.search_query_parts reads every event of a SessionsSearchPayloadSchema into an EventScan: the rows of an
+event table matching the event's conditions. compile_events turns the list of scans into the query returning the
+sessions having the events, with the timestamps of their first and last event:
+
+- identical events (same table, same conditions, same values) are scanned once, unless the events are ordered,
+- the session filters and the favorites are applied by the scan that drives the query, joined to the sessions,
+- without an order between the events, the scan expected to return the fewest rows drives the query, the events
+  whose timestamps are needed are joined to it and the others only have to exist (or not) for its sessions.
+"""
+import re
+
+import schemas
+
+# rough relative number of rows of the event tables, only used to order the scans
+TABLE_ROWS = {
+    "events_common.requests": 20,
+    "events.clicks": 10,
+    "events.pages": 10,
+    "events.performance": 5,
+    "events.inputs": 4,
+    "events_ios.clicks": 4,
+    "events_ios.views": 4,
+    "events_ios.inputs": 2,
+    "events_common.customs": 2,
+    "events.graphql": 2,
+    "events.state_actions": 2,
+    "events.errors": 1,
+    "events_ios.crashes": 1
+}
+DEFAULT_TABLE_ROWS = 5
+
+# rough share of the rows kept by a condition on one value
+OPERATOR_SELECTIVITY = {
+    schemas.SearchEventOperator._is: 0.01,
+    schemas.SearchEventOperator._on: 0.01,
+    schemas.SearchEventOperator._starts_with: 0.05,
+    schemas.SearchEventOperator._ends_with: 0.05,
+    schemas.SearchEventOperator._contains: 0.2
+}
+DEFAULT_SELECTIVITY = 0.5
+
+PARAMETER_PATTERN = re.compile(r"%\((\w+)\)s")
+
+
+def selectivity(op, values=None):
+    """
+    Rough share of the rows kept by `op` on any of `values`
+    """
+    if op in [schemas.SearchEventOperator._is_any, schemas.SearchEventOperator._on_any,
+              schemas.SearchEventOperator._is_not, schemas.SearchEventOperator._not_on,
+              schemas.SearchEventOperator._not_contains]:
+        return 1
+    share = OPERATOR_SELECTIVITY.get(op, DEFAULT_SELECTIVITY)
+    return min(1, share * max(1, len(values or [])))
+
+
+class EventScan:
+    """
+    The rows of an event table, aliased main, matching the conditions of an event of the search
+    """
+
+    def __init__(self, table, joins="", aliases=("main",), is_not=False):
+        """
+        :param joins: other tables of the scan, joined to main
+        :param aliases: tables of the scan holding a session_id to correlate with the driving scan
+        :param is_not: the sessions must not have the event
+        """
+        self.table = table
+        self.joins = joins
+        self.aliases = aliases
+        self.is_not = is_not
+        self.conditions = []
+        self.cost = TABLE_ROWS.get(table, DEFAULT_TABLE_ROWS)
+
+    def where(self, condition, kept=DEFAULT_SELECTIVITY):
+        """
+        :param kept: share of the rows the condition is expected to keep
+        """
+        self.conditions.append(condition)
+        self.cost *= kept
+        return self
+
+    @property
+    def source(self):
+        return f"{self.table} AS main {self.joins}"
+
+    def signature(self, args):
+        # every event binds its values under its own names, compare the values
+        conditions = sorted(PARAMETER_PATTERN.sub(lambda m: repr(args.get(m.group(1))), c)
+                            for c in self.conditions)
+        return self.source, self.is_not, tuple(conditions)
+
+    def get_where(self, session_id=None, after=None):
+        """
+        :param session_id: the session_id the scan is correlated to
+        :param after: the timestamp the events must follow
+        """
+        where = ["main.timestamp >= %(startDate)s", "main.timestamp <= %(endDate)s"] + self.conditions
+        if session_id is not None:
+            where += [f"{a}.session_id = {session_id}" for a in self.aliases]
+        if after is not None:
+            where.append(f"{after} <= main.timestamp")
+        return " AND ".join(where)
+
+
+def __get_sessions_where(session_constraints, favorite_only):
+    return " AND ".join(["ms.project_id = %(projectId)s", "ms.start_ts >= %(startDate)s",
+                         "ms.start_ts <= %(endDate)s", "ms.duration IS NOT NULL"]
+                        + (["fs.user_id = %(userId)s"] if favorite_only else [])
+                        + session_constraints)
+
+
+def __get_driving_query(scan: EventScan, session_constraints, favorite_only):
+    """
+    The sessions of a scan joined to the sessions filters, or the sessions filtered without the scan if negated
+    """
+    favorite_join = "INNER JOIN public.user_favorite_sessions AS fs USING (session_id)" if favorite_only else ""
+    sessions_where = __get_sessions_where(session_constraints, favorite_only)
+    if scan.is_not:
+        where = scan.get_where(session_id="ms.session_id")
+        return f"""SELECT ms.session_id, 0 AS first_ts, 0 AS last_ts
+                   FROM public.sessions AS ms {favorite_join}
+                   WHERE {sessions_where}
+                     AND NOT EXISTS(SELECT 1 FROM {scan.source} WHERE {where})"""
+    return f"""SELECT main.session_id, MIN(main.timestamp) AS first_ts, MAX(main.timestamp) AS last_ts
+               FROM {scan.source} INNER JOIN public.sessions AS ms USING (session_id) {favorite_join}
+               WHERE {scan.get_where()} AND {sessions_where}
+               GROUP BY 1"""
+
+
+def __get_joined_query(scan: EventScan, alias, previous=None):
+    """
+    :param previous: alias of the event this one follows
+    """
+    after = f"{previous}.first_ts" if previous is not None else None
+    where = scan.get_where(session_id="event_0.session_id", after=after)
+    if scan.is_not:
+        return f"""INNER JOIN LATERAL (SELECT {previous}.first_ts, {previous}.last_ts
+                                       WHERE NOT EXISTS(SELECT 1 FROM {scan.source} WHERE {where})
+                                       ) AS {alias} ON (TRUE)"""
+    return f"""INNER JOIN LATERAL (SELECT MIN(main.timestamp) AS first_ts, MAX(main.timestamp) AS last_ts
+                                   FROM {scan.source}
+                                   WHERE {where}
+                                   GROUP BY main.session_id
+                                   ) AS {alias} ON (TRUE)"""
+
+
+def __get_exists(scan: EventScan):
+    where = scan.get_where(session_id="event_0.session_id")
+    return f"""{"NOT " if scan.is_not else ""}EXISTS(SELECT 1 FROM {scan.source} WHERE {where})"""
+
+
+def __dedupe(scans, args):
+    unique = {}
+    positions = []
+    for s in scans:
+        positions.append(unique.setdefault(s.signature(args), len(unique)))
+    return [scans[positions.index(i)] for i in range(len(unique))], positions
+
+
+def __compile_then(scans, session_constraints, favorite_only):
+    # the order of the events is the order of the scans, each one following the first event of the previous one
+    joins = [__get_joined_query(s, alias=f"event_{i}", previous=f"event_{i - 1}")
+             for i, s in enumerate(scans) if i > 0]
+    joins = "\n".join(joins)
+    return f"""SELECT event_0.session_id,
+                      event_0.first_ts AS first_event_ts,
+                      event_{len(scans) - 1}.last_ts AS last_event_ts
+               FROM ({__get_driving_query(scans[0], session_constraints, favorite_only)}) AS event_0
+               {joins}"""
+
+
+def __compile_or(scans, session_constraints, favorite_only):
+    union = " UNION ALL ".join([f"({__get_driving_query(s, session_constraints, favorite_only)})" for s in scans])
+    return f"""SELECT session_id,
+                      MIN(first_ts) AS first_event_ts,
+                      MAX(last_ts) AS last_event_ts
+               FROM ({union}) AS u
+               GROUP BY 1"""
+
+
+def __compile_and(scans, positions, session_constraints, favorite_only):
+    matched = [p for p in positions if not scans[p].is_not]
+    if len(matched) > 0:
+        driver = min(set(matched), key=lambda p: (scans[p].cost, p))
+        first, last = matched[0], matched[-1]
+    else:
+        # no event to join, the sessions not having the first event drive the query
+        driver = first = last = positions[0]
+    aliases = {driver: "event_0"}
+    joins = []
+    for p in sorted({first, last} - {driver}):
+        aliases[p] = f"event_{len(aliases)}"
+        joins.append(__get_joined_query(scans[p], alias=aliases[p]))
+    # the other events only filter the sessions, the most selective ones first
+    filters = [__get_exists(scans[p]) for p in sorted(set(range(len(scans))) - set(aliases),
+                                                       key=lambda p: (scans[p].cost, p))]
+    joins = "\n".join(joins)
+    return f"""SELECT event_0.session_id,
+                      {aliases[first]}.first_ts AS first_event_ts,
+                      {aliases[last]}.last_ts AS last_event_ts
+               FROM ({__get_driving_query(scans[driver], session_constraints, favorite_only)}) AS event_0
+               {joins}
+               {"WHERE " + " AND ".join(filters) if len(filters) > 0 else ""}"""
+
+
+def compile_events(scans, order, args, session_constraints, favorite_only=False):
+    """
+    Query of the sessions having the events of `scans`: session_id, first_event_ts, last_event_ts
+    :param args: the arguments of the query, to find identical events
+    :param session_constraints: conditions on the sessions, aliased ms
+    :param favorite_only: only the sessions in the favorites of the user
+    """
+    if order == schemas.SearchEventOrder._then:
+        return __compile_then(scans, session_constraints, favorite_only)
+    scans, positions = __dedupe(scans, args)
+    if order == schemas.SearchEventOrder._or:
+        return __compile_or(scans, session_constraints, favorite_only)
+    return __compile_and(scans, positions, session_constraints, favorite_only)
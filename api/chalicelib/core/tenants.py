@@ -6,8 +6,7 @@ from chalicelib.core import users
 
 def get_by_tenant_id(tenant_id):
     with pg_client.PostgresClient() as cur:
-        cur.execute(
-            cur.mogrify(
+        cur.execute_prepared(
                 f"""SELECT 
                        tenant_id,
                        name,
@@ -19,7 +18,6 @@ def get_by_tenant_id(tenant_id):
                     FROM public.tenants
                     LIMIT 1;""",
                 {"tenantId": tenant_id})
-        )
         return helper.dict_to_camel_case(cur.fetchone())
 
 
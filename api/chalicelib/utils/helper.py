@@ -1,3 +1,4 @@
+import json
 import random
 import re
 import string
@@ -5,6 +6,8 @@ from typing import Union
 
 import math
 import requests
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import StreamingResponse
 
 import schemas
 
@@ -60,6 +63,29 @@ def list_to_camel_case(items, flatten=False):
     return items
 
 
+def stream_list_to_camel_case(rows, key="data", chunk_size=500):
+    """
+    A response writing {key: [rows]} while the rows are produced, for listings too large to be held in memory.
+    Rows are turned to camel case and written chunk_size at a time.
+    """
+
+    def body():
+        yield f'{{"{key}":['
+        chunk = []
+        first = True
+        for row in rows:
+            chunk.append(json.dumps(jsonable_encoder(dict_to_camel_case(row))))
+            if len(chunk) >= chunk_size:
+                yield ("" if first else ",") + ",".join(chunk)
+                chunk = []
+                first = False
+        if len(chunk) > 0:
+            yield ("" if first else ",") + ",".join(chunk)
+        yield ']}'
+
+    return StreamingResponse(body(), media_type="application/json")
+
+
 def dict_to_camel_case(variable, delimiter='_', ignore_keys=[]):
     if variable is None:
         return None
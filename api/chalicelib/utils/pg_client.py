@@ -1,11 +1,25 @@
+import asyncio
+import contextvars
+import functools
+import hashlib
+import random
+import re
+import sys
+import threading
 import time
+import uuid
+from collections import OrderedDict
 from threading import Semaphore
 
+import aiopg
 import psycopg2
+import psycopg2.errors
 import psycopg2.extras
 from decouple import config
 from psycopg2 import pool
 
+from chalicelib.utils import prometheus
+
 _PG_CONFIG = {"host": config("pg_host"),
               "database": config("pg_dbname"),
               "user": config("pg_user"),
@@ -15,28 +29,367 @@ _PG_CONFIG = {"host": config("pg_host"),
 PG_CONFIG = dict(_PG_CONFIG)
 if config("pg_timeout", cast=int, default=0) > 0:
     PG_CONFIG["options"] = f"-c statement_timeout={config('pg_timeout', cast=int) * 1000}"
+# PostgresClient(long_query=True): alerts, weekly reports and other heavy jobs
+PG_LONG_CONFIG = dict(_PG_CONFIG)
+PG_LONG_CONFIG["application_name"] += "-LONG"
+if config("pg_long_timeout", cast=int, default=0) > 0:
+    PG_LONG_CONFIG["options"] = f"-c statement_timeout={config('pg_long_timeout', cast=int) * 1000}"
+
+
+PG_MAXCONN = config("pg_maxconn", cast=int, default=100)
+# seconds to wait for a free connection, 0 to wait forever
+PG_POOL_TIMEOUT = config("pg_pool_timeout", cast=float, default=30)
+# idle connections are checked with a SELECT 1 on checkout once idle for that many seconds
+PG_POOL_CHECK_IDLE = config("pg_pool_check_idle", cast=float, default=10)
+
+# rows fetched at a time by the server-side cursors of PostgresClient(stream=True)
+PG_ITERSIZE = config("pg_itersize", cast=int, default=2000)
+
+# pool name -> pool, for the metrics
+pools = {}
+
+
+def _collect_connections():
+    values = {}
+    for name, p in list(pools.items()):
+        values[(name, "in_use")] = len(p._used)
+        values[(name, "idle")] = len(p._pool)
+    return values
+
+
+pool_connections = prometheus.Gauge("pg_pool_connections", "Connections of the pool, by state",
+                                    labels=("pool", "state"), collect=_collect_connections)
+pool_waiters = prometheus.Gauge("pg_pool_waiters", "Threads waiting for a connection", labels=("pool",))
+pool_wait_seconds = prometheus.Histogram("pg_pool_wait_seconds", "Time waited for a connection", labels=("pool",))
+pool_timeouts = prometheus.Counter("pg_pool_timeouts_total", "Connection requests that timed out",
+                                   labels=("pool",))
+pool_dead_connections = prometheus.Counter("pg_pool_dead_connections_total",
+                                           "Idle connections found dead on checkout and replaced", labels=("pool",))
+
+
+class PoolTimeoutError(psycopg2.pool.PoolError):
+    pass
+
+
+# statements slower than that are printed with their plan, 0 to print none
+PG_SLOW_QUERY_MS = config("pg_slow_query_ms", cast=int, default=1000)
+
+query_seconds = prometheus.Histogram("pg_query_seconds", "Time of the statements, by function running them",
+                                     labels=("caller",))
+query_rows = prometheus.Counter("pg_query_rows_total", "Rows returned or changed by the statements, by function",
+                                labels=("caller",))
+endpoint_seconds = prometheus.Counter("pg_endpoint_seconds_total",
+                                      "Time of the statements of each endpoint, by function running them",
+                                      labels=("endpoint", "caller"))
+endpoint_queries = prometheus.Counter("pg_endpoint_queries_total",
+                                      "Statements of each endpoint, by function running them",
+                                      labels=("endpoint", "caller"))
+request_seconds = prometheus.Histogram("pg_request_seconds", "Time of all the statements of a request, by endpoint",
+                                       labels=("endpoint",))
+
+_SHAPE_VALUES = re.compile(r"'(?:[^']|'')*'|%\(\w+\)s|\$\d+|\b\d+(?:\.\d+)?\b")
+_SHAPE_LISTS = re.compile(r"\(\?(?:\s*,\s*\?)+\)")
+_SHAPE_ARRAYS = re.compile(r"ARRAY\[\?(?:\s*,\s*\?)*\]")
+
+
+def normalize_query(query):
+    """
+    The query without its values, the same for every run of a query whatever its parameters
+    """
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", errors="replace")
+    shape = _SHAPE_VALUES.sub("?", query)
+    shape = _SHAPE_LISTS.sub("(...)", shape)
+    shape = _SHAPE_ARRAYS.sub("ARRAY[...]", shape)
+    return " ".join(shape.split())
+
+
+class QueryRecord:
+    __slots__ = ("cursor", "query", "params", "source", "caller", "duration", "rows")
+
+    def __init__(self, cursor, query, params, source, caller, duration, rows):
+        """
+        :param cursor: the psycopg2 cursor that ran it, None for AsyncPostgresClient
+        :param source: the query with its %(name)s parameters when the one run is an EXECUTE
+        :param caller: module.function that ran it
+        """
+        self.cursor = cursor
+        self.query = query
+        self.params = params
+        self.source = source
+        self.caller = caller
+        self.duration = duration
+        self.rows = rows
+
+    @property
+    def shape(self):
+        return normalize_query(self.source if self.source is not None else self.query)
+
+
+class RequestQueries:
+    """
+    The statements of a request, by function running them
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0
+        # caller -> [statements, seconds]
+        self.callers = {}
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self.count += 1
+            self.seconds += record.duration
+            caller = self.callers.setdefault(record.caller, [0, 0])
+            caller[0] += 1
+            caller[1] += record.duration
+
+
+# statements of the current request, copied with the context to the threadpool of the sync routes
+current_request = contextvars.ContextVar("pg_current_request", default=None)
+
+
+def track_request():
+    """
+    Collect the statements run from now on in this context, for finish_request
+    """
+    queries = RequestQueries()
+    current_request.set(queries)
+    return queries
+
+
+def finish_request(queries, endpoint):
+    """
+    :param endpoint: the function of the route, None when no route matched
+    """
+    name = f"{endpoint.__module__}.{endpoint.__name__}" if endpoint is not None else "none"
+    for caller, (count, seconds) in queries.callers.items():
+        endpoint_queries.inc(count, endpoint=name, caller=caller)
+        endpoint_seconds.inc(seconds, endpoint=name, caller=caller)
+    request_seconds.observe(queries.seconds, endpoint=name)
+
+
+def __get_caller():
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals.get("__name__") == __name__:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    return f"{frame.f_globals.get('__name__')}.{frame.f_code.co_name}"
+
+
+def record_query(cursor, query, params, duration, rows, source=None):
+    record = QueryRecord(cursor=cursor, query=query, params=params, source=source, caller=__get_caller(),
+                         duration=duration, rows=max(rows, 0))
+    for hook in query_hooks:
+        try:
+            hook(record)
+        except Exception as error:
+            print(f"Error in the query hook {hook.__name__}", error)
+
+
+def observe_query(record):
+    query_seconds.observe(record.duration, caller=record.caller)
+    if record.rows > 0:
+        query_rows.inc(record.rows, caller=record.caller)
+    queries = current_request.get()
+    if queries is not None:
+        queries.add(record)
+
+
+def __explain(record):
+    cursor = record.cursor
+    # nothing to explain with on an async or a server-side cursor
+    if cursor is None or cursor.name is not None or cursor.connection.autocommit:
+        return None
+    shape = record.shape.rstrip(";")
+    # EXPLAIN would run the statements after the first one
+    if ";" in shape or shape.split(maxsplit=1)[0].lower() not in ("select", "with", "insert", "update", "delete",
+                                                                   "execute"):
+        return None
+    query = cursor.mogrify(record.query, record.params)
+    # in a savepoint, a query EXPLAIN can't take doesn't abort the transaction of the caller
+    with cursor.connection.cursor() as cur:
+        cur.execute("SAVEPOINT or_explain;")
+        try:
+            cur.execute(b"EXPLAIN " + query)
+            plan = "\n".join(r[0] for r in cur.fetchall())
+            cur.execute("RELEASE SAVEPOINT or_explain;")
+        except psycopg2.Error as error:
+            cur.execute("ROLLBACK TO SAVEPOINT or_explain;")
+            plan = f"no plan: {error}"
+    return plan
+
+
+def log_slow_query(record):
+    if PG_SLOW_QUERY_MS <= 0 or record.duration * 1000 < PG_SLOW_QUERY_MS:
+        return
+    print(f"Slow query: {record.duration * 1000:.0f}ms, {record.rows} rows, in {record.caller}: {record.shape}")
+    plan = __explain(record)
+    if plan is not None:
+        print(plan)
+
+
+# called after every statement run by PostgresClient and AsyncPostgresClient with its QueryRecord
+query_hooks = [observe_query, log_slow_query]
+
+
+# cursor.execute_prepared runs queries as prepared statements, False to run them as any other query
+PG_PREPARED_STATEMENTS = config("pg_prepared_statements", cast=bool, default=True)
+# statements kept prepared on a connection, the least recently used one is deallocated past it
+PG_PREPARED_MAX = config("pg_prepared_max", cast=int, default=100)
+
+statements_prepared = prometheus.Counter("pg_statements_prepared_total",
+                                         "Statements prepared on a connection, once per query and connection")
+statements_deallocated = prometheus.Counter("pg_statements_deallocated_total",
+                                            "Prepared statements deallocated to make room for another one")
+
+
+class PreparedStatement:
+    """
+    A query with %(name)s parameters as a named prepared statement with $n parameters.
+    The name comes from the query text, every call site running the same query shares it.
+    """
+
+    def __init__(self, query):
+        self.query = query
+        self.params = []
+        statement = re.sub(r"%\((\w+)\)s", self.__placeholder, query.strip().rstrip(";"))
+        # sent without parameters, psycopg2 doesn't unescape it
+        self.statement = statement.replace("%%", "%")
+        self.name = "or_" + hashlib.md5(query.encode()).hexdigest()[:16]
+        if len(self.params) > 0:
+            self.execute_query = f"EXECUTE {self.name}({', '.join(['%s'] * len(self.params))});"
+        else:
+            self.execute_query = f"EXECUTE {self.name};"
+
+    def __placeholder(self, match):
+        if match.group(1) not in self.params:
+            self.params.append(match.group(1))
+        return f"${self.params.index(match.group(1)) + 1}"
+
+
+@functools.lru_cache(maxsize=1000)
+def get_prepared_statement(query):
+    return PreparedStatement(query)
+
+
+class ORConnection(psycopg2.extensions.connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # names of the statements prepared on this connection, the least recently used first
+        self.prepared = OrderedDict()
+
+
+class ORCursor(psycopg2.extras.RealDictCursor):
+    def execute(self, query, vars=None):
+        return self.__execute(query, vars)
+
+    def __execute(self, query, vars=None, source=None):
+        if len(query_hooks) == 0:
+            return super().execute(query, vars)
+        start = time.perf_counter()
+        result = super().execute(query, vars)
+        record_query(self, query, vars, time.perf_counter() - start, self.rowcount, source=source)
+        return result
+
+    def execute_prepared(self, query, params=None):
+        """
+        Like execute(query, params) for a query with %(name)s parameters, but the query is parsed and planned
+        once per connection. Its shape must not change with the parameters: no IN %(tuple)s, use = ANY(%(list)s).
+        """
+        if not PG_PREPARED_STATEMENTS or not isinstance(self.connection, ORConnection):
+            return self.execute(query, params)
+        statement = get_prepared_statement(query)
+        prepared = self.connection.prepared
+        if statement.name in prepared:
+            prepared.move_to_end(statement.name)
+        else:
+            # a query with inlined values is a new statement for every value, they must not pile up
+            if len(prepared) >= PG_PREPARED_MAX:
+                name, _ = prepared.popitem(last=False)
+                super().execute(f"DEALLOCATE {name};")
+                statements_deallocated.inc()
+            super().execute(f"PREPARE {statement.name} AS {statement.statement};")
+            prepared[statement.name] = None
+            statements_prepared.inc()
+        try:
+            return self.__execute(statement.execute_query, [params[p] for p in statement.params], source=query)
+        except psycopg2.errors.FeatureNotSupported:
+            # "cached plan must not change result type", a table of a SELECT * changed: the statement can't be
+            # executed anymore on this connection, it is dropped by the pool
+            self.connection.close()
+            raise
 
 
 class ORThreadedConnectionPool(psycopg2.pool.ThreadedConnectionPool):
-    def __init__(self, minconn, maxconn, *args, **kwargs):
+    def __init__(self, minconn, maxconn, *args, name="main", timeout=PG_POOL_TIMEOUT, check_idle=PG_POOL_CHECK_IDLE,
+                 **kwargs):
+        kwargs.setdefault("connection_factory", ORConnection)
         self._semaphore = Semaphore(maxconn)
+        self.name = name
+        self.timeout = timeout if timeout > 0 else None
+        self.check_idle = check_idle
+        # id(connection) -> when it was put back
+        self._idle_since = {}
         super().__init__(minconn, maxconn, *args, **kwargs)
 
     def getconn(self, *args, **kwargs):
-        self._semaphore.acquire()
+        start = time.perf_counter()
+        pool_waiters.inc(pool=self.name)
+        try:
+            acquired = self._semaphore.acquire(timeout=self.timeout)
+        finally:
+            pool_waiters.dec(pool=self.name)
+        pool_wait_seconds.observe(time.perf_counter() - start, pool=self.name)
+        if not acquired:
+            pool_timeouts.inc(pool=self.name)
+            raise PoolTimeoutError(f"no connection available in the {self.name} pool after {self.timeout}s, "
+                                   f"all {self.maxconn} are in use")
         try:
-            return super().getconn(*args, **kwargs)
-        except psycopg2.pool.PoolError as e:
-            if str(e) == "connection pool is closed":
-                make_pool()
+            return self.__checkout(*args, **kwargs)
+        except Exception as e:
+            self._semaphore.release()
+            if isinstance(e, psycopg2.pool.PoolError) and str(e) == "connection pool is closed":
+                pool_makers[self.name]()
             raise e
 
-    def putconn(self, *args, **kwargs):
-        super().putconn(*args, **kwargs)
-        self._semaphore.release()
+    def __checkout(self, *args, **kwargs):
+        while True:
+            conn = super().getconn(*args, **kwargs)
+            if self.__is_alive(conn):
+                return conn
+            print(f"Replacing a dead connection of the {self.name} pool")
+            pool_dead_connections.inc(pool=self.name)
+            super().putconn(conn, close=True)
+
+    def __is_alive(self, conn):
+        idle_since = self._idle_since.pop(id(conn), None)
+        if conn.closed:
+            return False
+        if idle_since is None or time.monotonic() - idle_since < self.check_idle:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def putconn(self, conn, *args, close=False, **kwargs):
+        try:
+            super().putconn(conn, *args, close=close or bool(conn.closed), **kwargs)
+        finally:
+            self._semaphore.release()
+        if not conn.closed:
+            self._idle_since[id(conn)] = time.monotonic()
 
 
 postgreSQL_pool: ORThreadedConnectionPool = None
+long_pool: ORThreadedConnectionPool = None
 
 RETRY_MAX = config("PG_RETRY_MAX", cast=int, default=50)
 RETRY_INTERVAL = config("PG_RETRY_INTERVAL", cast=int, default=2)
@@ -52,7 +405,9 @@ def make_pool():
         except (Exception, psycopg2.DatabaseError) as error:
             print("Error while closing all connexions to PostgreSQL", error)
     try:
-        postgreSQL_pool = ORThreadedConnectionPool(config("pg_minconn", cast=int, default=20), 100, **PG_CONFIG)
+        postgreSQL_pool = ORThreadedConnectionPool(config("pg_minconn", cast=int, default=20), PG_MAXCONN,
+                                                   **PG_CONFIG)
+        pools[postgreSQL_pool.name] = postgreSQL_pool
         if (postgreSQL_pool):
             print("Connection pool created successfully")
     except (Exception, psycopg2.DatabaseError) as error:
@@ -66,7 +421,136 @@ def make_pool():
             raise error
 
 
+def make_long_pool():
+    """
+    Separate and smaller pool for long queries, so they can't take all the connections of the main pool.
+    Only its pg_long_minconn idle connections are kept open.
+    """
+    global long_pool
+    if long_pool is not None:
+        try:
+            long_pool.closeall()
+        except (Exception, psycopg2.DatabaseError) as error:
+            print("Error while closing all long connexions to PostgreSQL", error)
+    long_pool = ORThreadedConnectionPool(config("pg_long_minconn", cast=int, default=2),
+                                         config("pg_long_maxconn", cast=int, default=10),
+                                         name="long", timeout=config("pg_long_pool_timeout", cast=float, default=300),
+                                         **PG_LONG_CONFIG)
+    pools[long_pool.name] = long_pool
+    print("Long queries connection pool created successfully")
+
+
+# read replicas, libpq connection strings or URIs separated by ";". What they leave out (database, user,
+# statement timeout...) is taken from the primary settings
+PG_REPLICAS = [dsn.strip() for dsn in config("pg_replicas", default="").split(";") if dsn.strip()]
+# replicas further behind the primary than that are not used
+PG_REPLICA_MAX_LAG = config("pg_replica_max_lag", cast=float, default=30)
+PG_REPLICA_CHECK_INTERVAL = config("pg_replica_check_interval", cast=float, default=5)
+
+replica_lag = prometheus.Gauge("pg_replica_lag_seconds", "Replay lag of the replicas", labels=("pool",))
+replica_fallbacks = prometheus.Counter("pg_replica_fallbacks_total",
+                                       "Read-only clients sent to the primary, no replica being usable",
+                                       labels=("reason",))
+
+
+class Replica:
+    def __init__(self, index, dsn):
+        self.name = f"replica-{index}"
+        # the settings of the primary but its address, overridden by the ones of the dsn
+        self.config = {k: v for k, v in PG_CONFIG.items() if k not in ("host", "port")}
+        self.config.update(psycopg2.extensions.parse_dsn(dsn))
+        self.pool: ORThreadedConnectionPool = None
+        # seconds behind the primary, None until checked or while unreachable
+        self.lag = None
+        self.problem = None
+
+    @property
+    def usable(self):
+        return self.pool is not None and self.lag is not None and self.lag <= PG_REPLICA_MAX_LAG
+
+    def make_pool(self):
+        if self.pool is not None:
+            try:
+                self.pool.closeall()
+            except (Exception, psycopg2.DatabaseError) as error:
+                print(f"Error while closing all connexions to {self.name}", error)
+            self.pool = None
+        self.pool = ORThreadedConnectionPool(config("pg_replica_minconn", cast=int, default=5),
+                                             config("pg_replica_maxconn", cast=int, default=PG_MAXCONN),
+                                             name=self.name, **self.config)
+        pools[self.name] = self.pool
+        pool_makers[self.name] = self.make_pool
+        print(f"Connection pool of {self.name} created successfully")
+
+    def __report(self, problem):
+        # checked every few seconds, only changes are printed
+        if problem != self.problem:
+            print(f"{self.name} {problem}" if problem else f"{self.name} is usable again")
+            self.problem = problem
+
+    def check(self):
+        """
+        Measure the replay lag, 0 when everything received is replayed
+        """
+        try:
+            if self.pool is None:
+                self.make_pool()
+            conn = self.pool.getconn()
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("""SELECT pg_is_in_recovery() AS in_recovery,
+                                          CASE
+                                              WHEN pg_last_wal_receive_lsn() <= pg_last_wal_replay_lsn() THEN 0
+                                              ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+                                              END AS lag;""")
+                    in_recovery, lag = cur.fetchone()
+                conn.rollback()
+            finally:
+                self.pool.putconn(conn)
+            if not in_recovery:
+                self.__report("is not a replica, it is not used")
+                lag = None
+            elif lag is None:
+                self.__report("lag is unknown, it is not used")
+            else:
+                self.__report(None)
+            self.lag = None if lag is None else float(lag)
+        except Exception as error:
+            self.__report(f"could not be checked: {error}")
+            self.lag = None
+        replica_lag.set(self.lag if self.lag is not None else -1, pool=self.name)
+
+
+replicas = [Replica(i, dsn) for i, dsn in enumerate(PG_REPLICAS)]
+
+
+def check_replicas():
+    while True:
+        for r in replicas:
+            r.check()
+        time.sleep(PG_REPLICA_CHECK_INTERVAL)
+
+
+def get_read_pool():
+    """
+    The pool of a usable replica with the fewest connections in use, the primary if there is none
+    """
+    usable = [r for r in replicas if r.usable]
+    if len(usable) == 0:
+        if len(replicas) > 0:
+            replica_fallbacks.inc(reason="no usable replica")
+        return postgreSQL_pool
+    return min(usable, key=lambda r: (len(r.pool._used), random.random())).pool
+
+
+pool_makers = {"main": make_pool, "long": make_long_pool}
+
 make_pool()
+make_long_pool()
+if len(replicas) > 0:
+    for r in replicas:
+        r.check()
+    threading.Thread(target=check_replicas, name="pg-replicas", daemon=True).start()
 
 
 class PostgresClient:
@@ -74,36 +558,145 @@ class PostgresClient:
     cursor = None
     long_query = False
 
-    def __init__(self, long_query=False):
+    def __init__(self, long_query=False, read_only=False, stream=False, itersize=None):
+        """
+        :param read_only: only reads, can go to a replica. Long queries stay on the primary.
+        :param stream: the cursor is a server-side one, iterating over it fetches itersize rows at a time
+                       instead of the whole result on execute. It runs a single query.
+        """
         self.long_query = long_query
+        self.stream = stream
+        self.itersize = itersize or PG_ITERSIZE
+        # put back where it was taken from, even if the pool is remade in between
         if long_query:
-            long_config = dict(_PG_CONFIG)
-            long_config["application_name"] += "-LONG"
-            self.connection = psycopg2.connect(**_PG_CONFIG)
+            self.pool = long_pool
+        elif read_only:
+            self.pool = get_read_pool()
         else:
-            self.connection = postgreSQL_pool.getconn()
+            self.pool = postgreSQL_pool
+        try:
+            self.connection = self.pool.getconn()
+        except (psycopg2.OperationalError, PoolTimeoutError) as error:
+            if self.pool in (postgreSQL_pool, long_pool):
+                raise error
+            print(f"Error while connecting to {self.pool.name}, falling back to the primary", error)
+            replica_fallbacks.inc(reason="replica error")
+            self.pool = postgreSQL_pool
+            self.connection = self.pool.getconn()
 
     def __enter__(self):
         if self.cursor is None:
-            self.cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            if self.stream:
+                self.cursor = self.connection.cursor(name=f"stream_{uuid.uuid4().hex}", cursor_factory=ORCursor)
+                self.cursor.itersize = self.itersize
+            else:
+                self.cursor = self.connection.cursor(cursor_factory=ORCursor)
         return self.cursor
 
     def __exit__(self, *args):
         try:
+            if self.stream:
+                # a server-side cursor doesn't outlive the transaction
+                self.cursor.close()
             self.connection.commit()
             self.cursor.close()
-            if self.long_query:
-                self.connection.close()
         except Exception as error:
             print("Error while committing/closing PG-connection", error)
-            if str(error) == "connection already closed":
-                print("Recreating the connexion pool")
-                make_pool()
-            else:
+            # a closed connection is dropped by putconn, the pool opens a new one when needed
+            if not self.connection.closed:
                 raise error
         finally:
-            if not self.long_query:
-                postgreSQL_pool.putconn(self.connection)
+            self.pool.putconn(self.connection)
+
+
+def stream(query, params=None, itersize=None, long_query=False, read_only=False):
+    """
+    Yield the rows of a query as they are fetched from a server-side cursor, itersize at a time:
+
+        for row in pg_client.stream("SELECT ... WHERE project_id = %(project_id)s", {"project_id": 1}):
+
+    The connection is held until the generator is exhausted or closed.
+    """
+    with PostgresClient(long_query=long_query, read_only=read_only, stream=True, itersize=itersize) as cur:
+        cur.execute(cur.mogrify(query, params))
+        yield from cur
+
+
+async_pool: aiopg.Pool = None
+_async_pool_lock = asyncio.Lock()
+
+
+async def make_async_pool():
+    """
+    The pool of AsyncPostgresClient, made on the first use or at the app startup
+    """
+    global async_pool
+    async with _async_pool_lock:
+        if async_pool is None:
+            async_pool = await aiopg.create_pool(minsize=config("pg_async_minconn", cast=int, default=5),
+                                                 maxsize=config("pg_async_maxconn", cast=int, default=50),
+                                                 enable_hstore=False, **PG_CONFIG)
+            print("Async connection pool created successfully")
+    return async_pool
+
+
+async def close_async_pool():
+    global async_pool
+    if async_pool is not None:
+        async_pool.close()
+        await async_pool.wait_closed()
+        async_pool = None
+
+
+class _AsyncCursor:
+    """
+    aiopg cursor recording its statements for query_hooks
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    async def execute(self, query, parameters=None):
+        start = time.perf_counter()
+        result = await self._cursor.execute(query, parameters)
+        if len(query_hooks) > 0:
+            record_query(None, query, parameters, time.perf_counter() - start, self._cursor.rowcount)
+        return result
+
+
+class AsyncPostgresClient:
+    """
+    PostgresClient for async def routes, rows are RealDict rows too:
+
+        async with pg_client.AsyncPostgresClient() as cur:
+            await cur.execute(cur.mogrify(query, params))
+            row = await cur.fetchone()
+
+    aiopg connections are in autocommit mode: every statement is committed on its own.
+    """
+
+    def __init__(self):
+        self.connection = None
+        self.cursor = None
+
+    async def __aenter__(self):
+        pool = async_pool if async_pool is not None else await make_async_pool()
+        self.connection = await pool.acquire()
+        try:
+            self.cursor = _AsyncCursor(await self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor))
+        except Exception:
+            await pool.release(self.connection)
+            raise
+        return self.cursor
+
+    async def __aexit__(self, *args):
+        try:
+            self.cursor.close()
+        finally:
+            await async_pool.release(self.connection)
 
 
 def close():
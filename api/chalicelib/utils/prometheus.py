@@ -0,0 +1,90 @@
+"""
+Metrics of the API in the Prometheus text format, served on /metrics.
+
+A thin layer over prometheus_client: the metrics take their label values as keyword arguments,
+`counter.inc(pool="main")`, and a Gauge can be computed on every scrape by a `collect` function.
+"""
+import prometheus_client
+from prometheus_client.core import GaugeMetricFamily
+
+# seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+registry = prometheus_client.CollectorRegistry()
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=(), **kwargs):
+        self.label_names = tuple(labels)
+        self._metric = self.kind(name, documentation, labelnames=self.label_names, registry=registry, **kwargs)
+
+    def _child(self, labels):
+        if len(self.label_names) == 0:
+            return self._metric
+        return self._metric.labels(**labels)
+
+
+class Counter(_Metric):
+    kind = prometheus_client.Counter
+
+    def inc(self, amount=1, **labels):
+        self._child(labels).inc(amount)
+
+
+class _CollectedGauge:
+    def __init__(self, name, documentation, label_names, collect):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.collect_values = collect
+
+    def collect(self):
+        family = GaugeMetricFamily(self.name, self.documentation, labels=self.label_names)
+        for key, value in self.collect_values().items():
+            family.add_metric([str(v) for v in key], value)
+        yield family
+
+    def describe(self):
+        return [GaugeMetricFamily(self.name, self.documentation, labels=self.label_names)]
+
+
+class Gauge(_Metric):
+    kind = prometheus_client.Gauge
+
+    def __init__(self, name, documentation, labels=(), collect=None):
+        """
+        :param collect: called on every scrape, returns {labels values tuple: value} instead of set values
+        """
+        if collect is None:
+            super().__init__(name, documentation, labels)
+        else:
+            self.label_names = tuple(labels)
+            registry.register(_CollectedGauge(name, documentation, self.label_names, collect))
+
+    def set(self, value, **labels):
+        self._child(labels).set(value)
+
+    def inc(self, amount=1, **labels):
+        self._child(labels).inc(amount)
+
+    def dec(self, amount=1, **labels):
+        self._child(labels).dec(amount)
+
+
+class Histogram(_Metric):
+    kind = prometheus_client.Histogram
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels, buckets=buckets)
+
+    def observe(self, value, **labels):
+        self._child(labels).observe(value)
+
+
+def render():
+    """
+    Every metric in the Prometheus text format
+    """
+    return prometheus_client.generate_latest(registry).decode("UTF-8")
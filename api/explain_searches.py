@@ -0,0 +1,155 @@
+"""
+Explain-plan regression check of the sessions search:
+
+    python explain_searches.py [--project-id ID] [--end-date MS] [--days 7] [--saved] [--analyze]
+                               [--save plans.json | --check plans.json [--tolerance 1.5]]
+
+Run it from api/ with the usual env (pg_host, pg_dbname...). The query of every search below, and with --saved
+of every saved search of the project, is built over the last --days days and explained: its estimated cost and
+rows are printed, with the time it takes with --analyze. --save writes the costs to a file, --check compares them
+to a file saved before and exits with 1 if a search fails or if its cost grew more than --tolerance times.
+Without --project-id, the project of the latest session is used. Nothing is written to the database.
+"""
+import argparse
+import json
+import sys
+import time
+
+import schemas
+from chalicelib.core import sessions
+from chalicelib.utils import pg_client
+
+
+def event(type, value, operator="is", **kwargs):
+    return {"type": type, "value": value, "operator": operator, **kwargs}
+
+
+def session_filter(type, value, operator="is", **kwargs):
+    return {"type": type, "value": value, "operator": operator, **kwargs}
+
+
+# representative searches: name, payload, search2_pg arguments
+SEARCHES = [
+    ("no event, browser", {"filters": [session_filter("USERBROWSER", ["Chrome"])]}, {}),
+    ("no event, count", {"filters": [session_filter("USERCOUNTRY", ["FR", "DE"])]}, {"count_only": True}),
+    ("click", {"events": [event("CLICK", ["Buy"])]}, {}),
+    ("page contains, input", {"events": [event("LOCATION", ["pricing"], "contains"), event("INPUT", ["email"])],
+                              "eventsOrder": "and"}, {}),
+    ("page and click, browser, duration",
+     {"events": [event("LOCATION", ["/checkout"]), event("CLICK", ["Buy"])], "eventsOrder": "and",
+      "filters": [session_filter("USERBROWSER", ["Firefox"]), session_filter("DURATION", [1000, 0])]}, {}),
+    ("same click twice", {"events": [event("CLICK", ["Buy"]), event("LOCATION", ["/login"]), event("CLICK", ["Buy"])],
+                          "eventsOrder": "and"}, {}),
+    ("funnel", {"events": [event("LOCATION", ["/login"]), event("LOCATION", ["/checkout"]), event("CLICK", ["Buy"])],
+                "eventsOrder": "then"}, {}),
+    ("funnel, count", {"events": [event("LOCATION", ["/login"]), event("CLICK", ["Buy"])], "eventsOrder": "then"},
+     {"count_only": True}),
+    ("any of", {"events": [event("CUSTOM", ["purchase"]), event("CLICK", ["Sign in"]),
+                           event("CUSTOM", ["purchase"])], "eventsOrder": "or"}, {}),
+    ("page without custom", {"events": [event("LOCATION", ["/checkout"]), event("CUSTOM", ["purchase"], "isNot")],
+                             "eventsOrder": "and"}, {}),
+    ("without click", {"events": [event("CLICK", ["Close"], "isNot")], "eventsOrder": "and"}, {}),
+    ("click then no custom", {"events": [event("CLICK", ["Next"]), event("CUSTOM", ["purchase"], "isNot")],
+                              "eventsOrder": "then"}, {}),
+    ("error and user", {"events": [event("ERROR", ["err"], "contains", source=["js_exception"])],
+                        "filters": [session_filter("USERID", ["u1"], "startsWith")]}, {}),
+    ("failed request", {"events": [event("FETCH", [], "is", filters=[
+        {"type": "FETCH_STATUS_CODE", "value": [400], "operator": ">="},
+        {"type": "FETCH_METHOD", "value": ["POST"], "operator": "is"}])]}, {}),
+    ("slow page", {"events": [event("DOM_COMPLETE", ["/checkout"], source=[1000], sourceOperator=">=")]}, {}),
+    ("time between pages",
+     {"events": [event("TIME_BETWEEN_EVENTS", [event("LOCATION", ["/login"]), event("LOCATION", ["/checkout"])],
+                       source=[60000], sourceOperator=">=")]}, {}),
+    ("grouped by user", {"events": [event("CLICK", ["Buy"])], "groupByUser": True}, {}),
+    ("errors of page", {"events": [event("LOCATION", ["/checkout"])]}, {"errors_only": True}),
+]
+
+
+def get_saved_searches(project_id):
+    with pg_client.PostgresClient() as cur:
+        cur.execute(cur.mogrify("""SELECT search_id, name, filter
+                                   FROM public.searches
+                                   WHERE project_id = %(project_id)s
+                                     AND deleted_at IS NULL
+                                   ORDER BY search_id;""",
+                                {"project_id": project_id}))
+        return [(f"saved {r['search_id']}: {r['name']}", r["filter"], {}) for r in cur.fetchall()]
+
+
+def explain(payload, kwargs, args):
+    data = schemas.SessionsSearchPayloadSchema.parse_obj({**payload, "startDate": args.start_date,
+                                                          "endDate": args.end_date})
+    errors_only = kwargs.get("errors_only", False)
+    count_only = kwargs.get("count_only", False)
+    query, full_args = sessions.__get_search_query(data=data, project_id=args.project_id, user_id=args.user_id,
+                                                   errors_only=errors_only, error_status=schemas.ErrorStatus.all,
+                                                   count_only=count_only, issue=None, meta_keys=[])
+    with pg_client.PostgresClient() as cur:
+        query = cur.mogrify(query, full_args).decode("UTF-8")
+        cur.execute(f"EXPLAIN (FORMAT JSON{', ANALYZE' if args.analyze else ''}) {query}")
+        plan = cur.fetchone()["QUERY PLAN"][0]
+    return {"cost": plan["Plan"]["Total Cost"], "rows": plan["Plan"]["Plan Rows"],
+            "ms": plan.get("Execution Time")}
+
+
+def get_project_id():
+    with pg_client.PostgresClient() as cur:
+        cur.execute("""SELECT project_id
+                       FROM public.sessions
+                       ORDER BY start_ts DESC
+                       LIMIT 1;""")
+        return cur.fetchone()["project_id"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--project-id", type=int)
+    parser.add_argument("--user-id", type=int, default=0)
+    parser.add_argument("--end-date", type=int, help="end of the searched period, in ms, now by default")
+    parser.add_argument("--days", type=int, default=7, help="length of the searched period")
+    parser.add_argument("--saved", action="store_true", help="explain the saved searches of the project too")
+    parser.add_argument("--analyze", action="store_true", help="run the queries")
+    parser.add_argument("--save", help="write the costs to this file")
+    parser.add_argument("--check", help="compare the costs to this file")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="cost growth over which --check fails")
+    args = parser.parse_args()
+    if args.project_id is None:
+        args.project_id = get_project_id()
+    if args.end_date is None:
+        args.end_date = int(time.time() * 1000)
+    args.start_date = args.end_date - args.days * 24 * 60 * 60 * 1000
+    searches = SEARCHES + (get_saved_searches(args.project_id) if args.saved else [])
+    baseline = {}
+    if args.check:
+        with open(args.check) as f:
+            baseline = json.load(f)
+
+    print(f"project {args.project_id}, {args.days} days until {args.end_date}")
+    print(f"{'search':<50} {'cost':>12} {'rows':>8} {'ms':>9} {'baseline':>12}")
+    plans = {}
+    failed = []
+    for name, payload, kwargs in searches:
+        try:
+            plans[name] = explain(payload, kwargs, args)
+        except Exception as e:
+            print(f"{name:<50} failed: {e}")
+            failed.append(name)
+            continue
+        p = plans[name]
+        ms = f"{p['ms']:.1f}" if p["ms"] is not None else ""
+        old = baseline.get(name, {}).get("cost")
+        if old is not None and p["cost"] > old * args.tolerance:
+            failed.append(name)
+        old = f"{old:.1f}" if old is not None else ""
+        print(f"{name:<50} {p['cost']:>12.1f} {p['rows']:>8} {ms:>9} {old:>12}{'  <- regression' if name in failed else ''}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(plans, f, indent=2, sort_keys=True)
+    if len(failed) > 0:
+        print(f"{len(failed)} searches failed or regressed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
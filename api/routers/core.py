@@ -1,7 +1,9 @@
-from typing import Union
+import secrets
+from typing import Union, Optional
 
 from decouple import config
-from fastapi import Depends, Body, BackgroundTasks
+from fastapi import Depends, Body, BackgroundTasks, Header
+from starlette.responses import PlainTextResponse, Response
 
 import schemas
 from chalicelib.core import log_tool_rollbar, sourcemaps, events, sessions_assignments, projects, \
@@ -13,7 +15,7 @@ from chalicelib.core import log_tool_rollbar, sourcemaps, events, sessions_assig
     assist, heatmaps, mobile, signup, tenants, errors_favorite_viewed, boarding, notifications, webhook, users, \
     custom_metrics, saved_search
 from chalicelib.core.collaboration_slack import Slack
-from chalicelib.utils import email_helper
+from chalicelib.utils import email_helper, helper, prometheus
 from chalicelib.utils.TimeUTC import TimeUTC
 from or_dependencies import OR_context
 from routers.base import get_routers
@@ -23,12 +25,12 @@ public_app, app, app_apikey = get_routers()
 
 @app.get('/{projectId}/sessions/{sessionId}', tags=["sessions"])
 @app.get('/{projectId}/sessions2/{sessionId}', tags=["sessions"])
-def get_session2(projectId: int, sessionId: Union[int, str], background_tasks: BackgroundTasks,
-                 context: schemas.CurrentContext = Depends(OR_context)):
+async def get_session2(projectId: int, sessionId: Union[int, str], background_tasks: BackgroundTasks,
+                       context: schemas.CurrentContext = Depends(OR_context)):
     if isinstance(sessionId, str):
         return {"errors": ["session not found"]}
-    data = sessions.get_by_id2_pg(project_id=projectId, session_id=sessionId, full_data=True, user_id=context.user_id,
-                                  include_fav_viewed=True, group_metadata=True)
+    data = await sessions.get_by_id2_pg_async(project_id=projectId, session_id=sessionId, full_data=True,
+                                              user_id=context.user_id, include_fav_viewed=True, group_metadata=True)
     if data is None:
         return {"errors": ["session not found"]}
     if data.get("inDB"):
@@ -133,9 +135,9 @@ def events_search(projectId: int, q: str,
 
 
 @app.post('/{projectId}/sessions/search2', tags=["sessions"])
-def sessions_search2(projectId: int, data: schemas.FlatSessionsSearchPayloadSchema = Body(...),
-                     context: schemas.CurrentContext = Depends(OR_context)):
-    data = sessions.search2_pg(data=data, project_id=projectId, user_id=context.user_id)
+async def sessions_search2(projectId: int, data: schemas.FlatSessionsSearchPayloadSchema = Body(...),
+                           context: schemas.CurrentContext = Depends(OR_context)):
+    data = await sessions.search2_pg_async(data=data, project_id=projectId, user_id=context.user_id)
     return {'data': data}
 
 
@@ -944,6 +946,14 @@ def errors_get_details_sourcemaps(projectId: int, errorId: str,
     }
 
 
+@app.get('/{projectId}/errors/{errorId}/sessions/export', tags=["errors"])
+def export_error_sessions(projectId: int, errorId: str, startDate: int = TimeUTC.now(-7),
+                          endDate: int = TimeUTC.now(), context: schemas.CurrentContext = Depends(OR_context)):
+    return helper.stream_list_to_camel_case(
+        errors.stream_sessions(project_id=projectId, user_id=context.user_id, error_id=errorId,
+                               start_date=startDate, end_date=endDate))
+
+
 @app.get('/{projectId}/errors/{errorId}/{action}', tags=["errors"])
 def add_remove_favorite_error(projectId: int, errorId: str, action: str, startDate: int = TimeUTC.now(-7),
                               endDate: int = TimeUTC.now(), context: schemas.CurrentContext = Depends(OR_context)):
@@ -1120,6 +1130,18 @@ def delete_saved_search(projectId: int, search_id: int, context: schemas.Current
     return {"data": saved_search.delete(project_id=projectId, user_id=context.user_id, search_id=search_id)}
 
 
+@public_app.get('/metrics', tags=["health"], include_in_schema=False)
+def get_metrics(authorization: Optional[str] = Header(None)):
+    # the scraper sends metrics_token as a bearer token, without it the endpoint is off
+    token = config("metrics_token", default="")
+    if len(token) == 0:
+        return Response(status_code=404)
+    if authorization is None or not secrets.compare_digest(authorization.encode("UTF-8"),
+                                                           f"Bearer {token}".encode("UTF-8")):
+        return Response(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    return PlainTextResponse(prometheus.render(), media_type="text/plain; version=0.0.4")
+
+
 @public_app.get('/', tags=["health"])
 @public_app.post('/', tags=["health"])
 @public_app.put('/', tags=["health"])
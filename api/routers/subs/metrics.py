@@ -16,13 +16,14 @@ def create_dashboards(projectId: int, data: schemas.CreateDashboardSchema = Body
 
 
 @app.get('/{projectId}/dashboards', tags=["dashboard"])
-def get_dashboards(projectId: int, context: schemas.CurrentContext = Depends(OR_context)):
-    return {"data": dashboards.get_dashboards(project_id=projectId, user_id=context.user_id)}
+async def get_dashboards(projectId: int, context: schemas.CurrentContext = Depends(OR_context)):
+    return {"data": await dashboards.get_dashboards_async(project_id=projectId, user_id=context.user_id)}
 
 
 @app.get('/{projectId}/dashboards/{dashboardId}', tags=["dashboard"])
-def get_dashboard(projectId: int, dashboardId: int, context: schemas.CurrentContext = Depends(OR_context)):
-    data = dashboards.get_dashboard(project_id=projectId, user_id=context.user_id, dashboard_id=dashboardId)
+async def get_dashboard(projectId: int, dashboardId: int, context: schemas.CurrentContext = Depends(OR_context)):
+    data = await dashboards.get_dashboard_async(project_id=projectId, user_id=context.user_id,
+                                                dashboard_id=dashboardId)
     if data is None:
         return {"errors": ["dashboard not found"]}
     return {"data": data}
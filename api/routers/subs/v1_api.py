@@ -2,6 +2,7 @@ from fastapi import Depends, Body
 
 import schemas
 from chalicelib.core import sessions, events, jobs, projects
+from chalicelib.utils import helper
 from chalicelib.utils.TimeUTC import TimeUTC
 from or_dependencies import OR_context
 from routers.base import get_routers
@@ -23,6 +24,18 @@ def get_user_sessions(projectKey: str, userId: str, start_date: int = None, end_
     }
 
 
+@app_apikey.get('/v1/{projectKey}/users/{userId}/sessions/export', tags=["api"])
+def export_user_sessions(projectKey: str, userId: str, start_date: int = None, end_date: int = None):
+    projectId = projects.get_internal_project_id(projectKey)
+
+    return helper.stream_list_to_camel_case(sessions.stream_user_sessions(
+        project_id=projectId,
+        user_id=userId,
+        start_date=start_date,
+        end_date=end_date
+    ))
+
+
 @app_apikey.get('/v1/{projectKey}/sessions/{sessionId}/events', tags=["api"])
 def get_session_events(projectKey: str, sessionId: int):
     projectId = projects.get_internal_project_id(projectKey)
@@ -836,7 +836,7 @@ def get_trace(project_id, error_id):
             "preparsed": False}
 
 
-def get_sessions(start_date, end_date, project_id, user_id, error_id):
+def __get_sessions_query(start_date, end_date, project_id, user_id, error_id, limit=None):
     extra_constraints = ["s.project_id = %(project_id)s",
                          "s.start_ts >= %(startDate)s",
                          "s.start_ts <= %(endDate)s",
@@ -851,43 +851,49 @@ def get_sessions(start_date, end_date, project_id, user_id, error_id):
         "endDate": end_date,
         "project_id": project_id,
         "userId": user_id,
-        "error_id": error_id}
+        "error_id": error_id,
+        "limit": limit}
+    query = f"""SELECT s.project_id,
+                   s.session_id::text AS session_id,
+                   s.user_uuid,
+                   s.user_id,
+                   s.user_agent,
+                   s.user_os,
+                   s.user_browser,
+                   s.user_device,
+                   s.user_country,
+                   s.start_ts,
+                   s.duration,
+                   s.events_count,
+                   s.pages_count,
+                   s.errors_count,
+                   s.issue_types,
+                   {"COUNT(1) OVER () AS full_count," if limit is not None else ""}
+                    COALESCE((SELECT TRUE
+                     FROM public.user_favorite_sessions AS fs
+                     WHERE s.session_id = fs.session_id
+                       AND fs.user_id = %(userId)s LIMIT 1), FALSE) AS favorite,
+                    COALESCE((SELECT TRUE
+                     FROM public.user_viewed_sessions AS fs
+                     WHERE s.session_id = fs.session_id
+                       AND fs.user_id = %(userId)s LIMIT 1), FALSE) AS viewed
+            FROM public.sessions AS s INNER JOIN events.errors AS e USING (session_id)
+            WHERE {" AND ".join(extra_constraints)}
+            ORDER BY s.start_ts DESC
+            {"LIMIT %(limit)s" if limit is not None else ""};"""
+    return query, params
+
+
+def get_sessions(start_date, end_date, project_id, user_id, error_id):
+    query, params = __get_sessions_query(start_date=start_date, end_date=end_date, project_id=project_id,
+                                         user_id=user_id, error_id=error_id, limit=100)
     with pg_client.PostgresClient() as cur:
-        query = cur.mogrify(
-            f"""SELECT s.project_id,
-                       s.session_id::text AS session_id,
-                       s.user_uuid,
-                       s.user_id,
-                       s.user_agent,
-                       s.user_os,
-                       s.user_browser,
-                       s.user_device,
-                       s.user_country,
-                       s.start_ts,
-                       s.duration,
-                       s.events_count,
-                       s.pages_count,
-                       s.errors_count,
-                       s.issue_types,
-                        COALESCE((SELECT TRUE
-                         FROM public.user_favorite_sessions AS fs
-                         WHERE s.session_id = fs.session_id
-                           AND fs.user_id = %(userId)s LIMIT 1), FALSE) AS favorite,
-                        COALESCE((SELECT TRUE
-                         FROM public.user_viewed_sessions AS fs
-                         WHERE s.session_id = fs.session_id
-                           AND fs.user_id = %(userId)s LIMIT 1), FALSE) AS viewed
-                FROM public.sessions AS s INNER JOIN events.errors AS e USING (session_id)
-                WHERE {" AND ".join(extra_constraints)}
-                ORDER BY s.start_ts DESC;""",
-            params)
-        cur.execute(query=query)
-        sessions_list = []
-        total = cur.rowcount
-        row = cur.fetchone()
-        while row is not None and len(sessions_list) < 100:
-            sessions_list.append(row)
-            row = cur.fetchone()
+        cur.execute(cur.mogrify(query, params))
+        sessions_list = cur.fetchall()
+    # counted by the query, only the first sessions are fetched
+    total = sessions_list[0]["full_count"] if len(sessions_list) > 0 else 0
+    for s in sessions_list:
+        s.pop("full_count")
 
     return {
         'total': total,
@@ -895,6 +901,15 @@ def get_sessions(start_date, end_date, project_id, user_id, error_id):
     }
 
 
+def stream_sessions(start_date, end_date, project_id, user_id, error_id):
+    """
+    All the sessions of the error, yielded as they are fetched
+    """
+    query, params = __get_sessions_query(start_date=start_date, end_date=end_date, project_id=project_id,
+                                         user_id=user_id, error_id=error_id)
+    return pg_client.stream(query, params, read_only=True)
+
+
 ACTION_STATE = {
     "unsolve": 'unresolved',
     "solve": 'resolved',
@@ -1424,7 +1424,7 @@ def get_avg_fps(project_id, startTimestamp=TimeUTC.now(delta_days=-1),
 
 
 def __get_crashed_sessions_ids(project_id, startTimestamp, endTimestamp):
-    with pg_client.PostgresClient() as cur:
+    with pg_client.PostgresClient(read_only=True) as cur:
         query = cur.mogrify(
             f"""\
             SELECT session_id
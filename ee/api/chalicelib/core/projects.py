@@ -94,7 +94,7 @@ def get_projects(tenant_id, recording_state=False, gdpr=None, recorded=False, st
 
 def get_project(tenant_id, project_id, include_last_session=False, include_gdpr=None):
     with pg_client.PostgresClient() as cur:
-        query = cur.mogrify(f"""\
+        cur.execute_prepared(f"""\
                     SELECT
                            s.project_id,
                            s.project_key,
@@ -107,11 +107,7 @@ def get_project(tenant_id, project_id, include_last_session=False, include_gdpr=
                         AND s.project_id =%(project_id)s
                         AND s.deleted_at IS NULL
                     LIMIT 1;""",
-                            {"tenant_id": tenant_id, "project_id": project_id})
-
-        cur.execute(
-            query=query
-        )
+                             {"tenant_id": tenant_id, "project_id": project_id})
         row = cur.fetchone()
         return helper.dict_to_camel_case(row)
 
@@ -195,15 +191,13 @@ def delete(tenant_id, user_id, project_id):
 
 def get_gdpr(project_id):
     with pg_client.PostgresClient() as cur:
-        cur.execute(
-            cur.mogrify("""\
+        cur.execute_prepared("""\
                     SELECT
                            gdpr
                     FROM public.projects AS s
                     where s.project_id =%(project_id)s
                         AND s.deleted_at IS NULL;""",
-                        {"project_id": project_id})
-        )
+                             {"project_id": project_id})
         return cur.fetchone()["gdpr"]
 
 
@@ -225,40 +219,34 @@ def edit_gdpr(project_id, gdpr):
 
 def get_internal_project_id(project_key):
     with pg_client.PostgresClient() as cur:
-        cur.execute(
-            cur.mogrify("""\
+        cur.execute_prepared("""\
                     SELECT project_id
                     FROM public.projects 
                     where project_key =%(project_key)s AND deleted_at ISNULL;""",
-                        {"project_key": project_key})
-        )
+                             {"project_key": project_key})
         row = cur.fetchone()
         return row["project_id"] if row else None
 
 
 def get_project_key(project_id):
     with pg_client.PostgresClient() as cur:
-        cur.execute(
-            cur.mogrify("""\
+        cur.execute_prepared("""\
                     SELECT project_key
                     FROM public.projects 
                     where project_id =%(project_id)s AND deleted_at ISNULL;""",
-                        {"project_id": project_id})
-        )
+                             {"project_id": project_id})
         project = cur.fetchone()
         return project["project_key"] if project is not None else None
 
 
 def get_capture_status(project_id):
     with pg_client.PostgresClient() as cur:
-        cur.execute(
-            cur.mogrify("""\
+        cur.execute_prepared("""\
                     SELECT 
                         sample_rate AS rate, sample_rate=100 AS capture_all
                     FROM public.projects 
                     where project_id =%(project_id)s AND deleted_at ISNULL;""",
-                        {"project_id": project_id})
-        )
+                             {"project_id": project_id})
         return helper.dict_to_camel_case(cur.fetchone())
 
 
@@ -286,7 +274,7 @@ def update_capture_status(project_id, changes):
 
 def get_project_by_key(tenant_id, project_key, include_last_session=False, include_gdpr=None):
     with pg_client.PostgresClient() as cur:
-        query = cur.mogrify(f"""\
+        cur.execute_prepared(f"""\
                     SELECT                           
                            s.project_key,
                            s.name
@@ -297,11 +285,7 @@ def get_project_by_key(tenant_id, project_key, include_last_session=False, inclu
                         AND s.tenant_id =%(tenant_id)s
                         AND s.deleted_at IS NULL
                     LIMIT 1;""",
-                            {"project_key": project_key, "tenant_id": tenant_id})
-
-        cur.execute(
-            query=query
-        )
+                             {"project_key": project_key, "tenant_id": tenant_id})
         row = cur.fetchone()
         return helper.dict_to_camel_case(row)
 
@@ -25,8 +25,7 @@ def get_by_tenant_key(tenant_key):
 
 def get_by_tenant_id(tenant_id):
     with pg_client.PostgresClient() as cur:
-        cur.execute(
-            cur.mogrify(
+        cur.execute_prepared(
                 f"""SELECT 
                        t.tenant_id,
                        t.name,
@@ -40,7 +39,6 @@ def get_by_tenant_id(tenant_id):
                     WHERE t.tenant_id = %(tenantId)s AND t.deleted_at ISNULL
                     LIMIT 1;""",
                 {"tenantId": tenant_id})
-        )
         return helper.dict_to_camel_case(cur.fetchone())
 
 
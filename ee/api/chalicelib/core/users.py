@@ -266,8 +266,7 @@ def allow_password_change(user_id, delta_min=10):
 
 def get(user_id, tenant_id):
     with pg_client.PostgresClient() as cur:
-        cur.execute(
-            cur.mogrify(
+        cur.execute_prepared(
                 f"""SELECT 
                         users.user_id AS id,
                         email, 
@@ -294,7 +293,6 @@ def get(user_id, tenant_id):
                      AND (roles.role_id IS NULL OR roles.deleted_at IS NULL AND roles.tenant_id = %(tenant_id)s) 
                     LIMIT 1;""",
                 {"userId": user_id, "tenant_id": tenant_id})
-        )
         r = cur.fetchone()
         return helper.dict_to_camel_case(r, ignore_keys=["appearance"])
 
@@ -605,11 +603,9 @@ def get_by_invitation_token(token, pass_token=None):
 
 def auth_exists(user_id, tenant_id, jwt_iat, jwt_aud):
     with pg_client.PostgresClient() as cur:
-        cur.execute(
-            cur.mogrify(
+        cur.execute_prepared(
                 f"SELECT user_id AS id,jwt_iat, changed_at FROM public.users INNER JOIN public.basic_authentication USING(user_id) WHERE user_id = %(userId)s AND tenant_id = %(tenant_id)s AND deleted_at IS NULL LIMIT 1;",
                 {"userId": user_id, "tenant_id": tenant_id})
-        )
         r = cur.fetchone()
         return r is not None \
                and r.get("jwt_iat") is not None \
@@ -29,11 +29,13 @@ rm -rf ./chalicelib/core/log_tool_stackdriver.py
 rm -rf ./chalicelib/core/log_tool_sumologic.py
 rm -rf ./chalicelib/core/metadata.py
 rm -rf ./chalicelib/core/mobile.py
+rm -rf ./chalicelib/core/search_cache.py
 rm -rf ./chalicelib/core/sessions.py
 rm -rf ./chalicelib/core/sessions_assignments.py
 rm -rf ./chalicelib/core/sessions_favorite_viewed.py
 rm -rf ./chalicelib/core/sessions_metas.py
 rm -rf ./chalicelib/core/sessions_mobs.py
+rm -rf ./chalicelib/core/sessions_query.py
 rm -rf ./chalicelib/core/significance.py
 rm -rf ./chalicelib/core/slack.py
 rm -rf ./chalicelib/core/socket_ios.py
@@ -54,6 +56,7 @@ rm -rf ./chalicelib/utils/helper.py
 rm -rf ./chalicelib/utils/jira_client.py
 rm -rf ./chalicelib/utils/metrics_helper.py
 rm -rf ./chalicelib/utils/pg_client.py
+rm -rf ./chalicelib/utils/prometheus.py
 rm -rf ./chalicelib/utils/s3.py
 rm -rf ./chalicelib/utils/smtp.py
 rm -rf ./chalicelib/utils/strings.py
@@ -83,3 +86,5 @@ rm -rf ./chalicelib/core/performance_event.py
 rm -rf ./chalicelib/core/saved_search.py
 rm -rf ./app_alerts.py
 rm -rf ./build_alerts.sh
+rm -rf ./bench_queries.py
+rm -rf ./explain_searches.py
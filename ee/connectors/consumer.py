@@ -1,19 +1,58 @@
 import os
+import time
+from collections import Counter
 from kafka import KafkaConsumer
+from kafka.structs import OffsetAndMetadata, TopicPartition
 from datetime import datetime
-from collections import defaultdict
 
+import metrics
 from msgcodec.codec import MessageCodec
-from msgcodec.messages import SessionEnd
 from db.api import DBConnection
 from db.models import events_detailed_table_name, events_table_name, sessions_table_name
+from db.async_writer import AsyncWriter
+from db.dead_letter import DeadLetterQueue
 from db.writer import insert_batch
-from handler import handle_message, handle_normal_message, handle_session
+from handler import get_message_ids
+from pipeline import Pipeline, FlushPolicy
 
 DATABASE = os.environ['DATABASE_NAME']
+TOPICS = ["events", "messages"]
 LEVEL = os.environ['level']
+max_poll_records = int(os.environ.get('max_poll_records', 500))
+poll_timeout_ms = int(os.environ.get('poll_timeout_ms', 1000))
+# 'columnar' writes events straight into column arrays, 'dataframe' keeps ORM objects + pandas
+batch_format = os.environ.get('batch_format', 'columnar')
+writer_workers = int(os.environ.get('writer_workers', 1))
+writer_queue_size = int(os.environ.get('writer_queue_size', 2))
+report_interval_s = int(os.environ.get('report_interval_s', 30))
+session_idle_timeout_s = int(os.environ.get('session_idle_timeout_s', 1800))
+max_sessions = int(os.environ.get('max_sessions', 100000))
+ended_session_ttl_s = int(os.environ.get('ended_session_ttl_s', 1800))
+# 0 turns the metrics endpoint off
+metrics_port = int(os.environ.get('metrics_port', 9108))
+lag_interval_s = int(os.environ.get('lag_interval_s', 15))
+
+
+def get_flush_policy(prefix, max_rows):
+    def limit(name, default=None):
+        value = os.environ.get(f'{prefix}_{name}', default)
+        return int(value) if value is not None else None
+    return FlushPolicy(max_rows=limit('max_rows', max_rows),
+                       max_bytes=limit('max_bytes'),
+                       max_age_ms=limit('max_age_ms', 60000))
+
+
+events_flush_policy = get_flush_policy('events', 4000)
+sessions_flush_policy = get_flush_policy('sessions', 400)
 
 db = DBConnection(DATABASE)
+# rows the database rejects go to a local file instead of failing the whole batch
+dead_letters = DeadLetterQueue(os.environ.get('dead_letter_path', 'dead_letter.jsonl'),
+                               retries=int(os.environ.get('insert_retries', 5)),
+                               backoff_s=float(os.environ.get('retry_backoff_s', 0.5)),
+                               max_backoff_s=float(os.environ.get('retry_max_backoff_s', 30)),
+                               max_dead_ratio=float(os.environ.get('max_dead_ratio', 0.5)),
+                               max_attempts=int(os.environ.get('max_dead_letter_attempts', 100)))
 
 if LEVEL == 'detailed':
     table_name = events_detailed_table_name
@@ -21,13 +60,13 @@ elif LEVEL == 'normal':
     table_name = events_table_name
 
 
-def main():
-    batch_size = 4000
-    sessions_batch_size = 400
-    batch = []
-    sessions = defaultdict(lambda: None)
-    sessions_batch = []
-
+def main(worker_id=None, n_workers=1, stats=None):
+    """
+    Consume until stopped. When run by the supervisor, consumes only the partitions
+    of worker `worker_id` out of `n_workers` and puts its periodic stats on the `stats` queue.
+    """
+    if metrics_port:
+        metrics.serve(metrics_port, worker_id=worker_id)
     codec = MessageCodec()
     consumer = KafkaConsumer(security_protocol="SSL",
                              bootstrap_servers=[os.environ['KAFKA_SERVER_1'],
@@ -36,85 +75,183 @@ def main():
                              auto_offset_reset="earliest",
                              enable_auto_commit=False)
 
-    consumer.subscribe(topics=["events", "messages"])
-    print("Kafka consumer subscribed")
-    for msg in consumer:
-        message = codec.decode(msg.value)
-        if message is None:
-            print('-')
-            continue
-
-        if LEVEL == 'detailed':
-            n = handle_message(message)
-        elif LEVEL == 'normal':
-            n = handle_normal_message(message)
-
-        session_id = codec.decode_key(msg.key)
-        sessions[session_id] = handle_session(sessions[session_id], message)
-        if sessions[session_id]:
-            sessions[session_id].sessionid = session_id
-
-        # put in a batch for insertion if received a SessionEnd
-        if isinstance(message, SessionEnd):
-            if sessions[session_id]:
-                sessions_batch.append(sessions[session_id])
-
-        # try to insert sessions
-        if len(sessions_batch) >= sessions_batch_size:
-            attempt_session_insert(sessions_batch)
-            for s in sessions_batch:
-                try:
-                    del sessions[s.sessionid]
-                except KeyError  as e:
-                    print(repr(e))
-            sessions_batch = []
-
-        if n:
-            n.sessionid = session_id
-            n.received_at = int(datetime.now().timestamp() * 1000)
-            n.batch_order_number = len(batch)
-            batch.append(n)
-        else:
-            continue
-
-        # insert a batch of events
-        if len(batch) >= batch_size:
-            attempt_batch_insert(batch)
-            batch = []
-            consumer.commit()
-            print("sessions in cache:", len(sessions))
+    if n_workers > 1:
+        partitions = get_worker_partitions(consumer, worker_id, n_workers)
+        consumer.assign(partitions)
+        print(f"Kafka consumer of worker {worker_id} assigned {len(partitions)} partitions")
+    else:
+        consumer.subscribe(topics=TOPICS)
+        print("Kafka consumer subscribed")
+
+    writer = AsyncWriter(workers=writer_workers, queue_size=writer_queue_size)
+    pipeline = Pipeline(LEVEL, writer, attempt_batch_insert, attempt_session_insert,
+                        events_policy=events_flush_policy, sessions_policy=sessions_flush_policy,
+                        batch_format=batch_format, session_idle_timeout_s=session_idle_timeout_s,
+                        max_sessions=max_sessions, ended_session_ttl_s=ended_session_ttl_s)
+    try:
+        consume(consumer, codec, pipeline, worker_id=worker_id, stats=stats)
+    finally:
+        if writer.error is None:
+            pipeline.flush()
+        writer.close()
+        db.close()
+        commit(consumer, writer.committable_offsets())
+
+
+def get_worker_partitions(consumer, worker_id, n_workers):
+    """
+    Partition p of every topic belongs to worker p % n_workers.
+    Messages are keyed by session id, so as long as both topics have the same number
+    of partitions, all the messages of a session are consumed by the same worker.
+    """
+    partitions = []
+    for topic in TOPICS:
+        for p in sorted(consumer.partitions_for_topic(topic) or ()):
+            if p % n_workers == worker_id:
+                partitions.append(TopicPartition(topic, p))
+    return partitions
+
+
+def commit(consumer, offsets):
+    if offsets:
+        consumer.commit(offsets={tp: OffsetAndMetadata(offset, None) for tp, offset in offsets.items()})
+
+
+def consume(consumer, codec, pipeline, worker_id=None, stats=None):
+    writer = pipeline.writer
+    message_ids = get_message_ids(LEVEL)
+    n_processed = 0
+    processing_time = 0
+    last_report = time.monotonic()
+    last_lag = 0
+    while True:
+        records = consumer.poll(timeout_ms=poll_timeout_ms, max_records=max_poll_records)
+        commit(consumer, writer.committable_offsets())
+        # stop and restart from the last commit rather than keep consuming what can't be committed
+        writer.check()
+
+        start = time.perf_counter()
+        values = []
+        keys = []
+        positions = []
+        sizes = []
+        for tp, partition_records in records.items():
+            for msg in partition_records:
+                values.append(msg.value)
+                keys.append(msg.key)
+                positions.append((tp, msg.offset))
+                sizes.append(msg.serialized_value_size)
+        if values:
+            skipped = codec.n_skipped
+            failed = codec.n_failed
+            t = time.perf_counter()
+            messages, session_ids = codec.decode_batch(values, keys, message_ids=message_ids)
+            metrics.decode_seconds.observe(time.perf_counter() - t)
+            for message_type, n in Counter(type(m).__name__ for m in messages if m is not None).items():
+                metrics.decoded_messages.inc(n, type=message_type)
+            metrics.skipped_messages.inc(codec.n_skipped - skipped)
+            metrics.failed_messages.inc(codec.n_failed - failed)
+            received_at = int(datetime.now().timestamp() * 1000)
+            pipeline.process(messages, session_ids, positions, sizes, received_at)
+        pipeline.flush_due()
+        n_processed += len(values)
+        processing_time += time.perf_counter() - start
+        metrics.sessions_cached.set(len(pipeline.sessions))
+        metrics.writes_pending.set(writer.pending())
+
+        if time.monotonic() - last_lag >= lag_interval_s:
+            update_lag(consumer)
+            last_lag = time.monotonic()
+
+        if time.monotonic() - last_report >= report_interval_s:
+            report = get_report(codec, pipeline, n_processed, processing_time)
+            print_report(report, prefix='' if worker_id is None else f"[worker {worker_id}] ")
+            if stats is not None:
+                report['worker'] = worker_id
+                stats.put(report)
+            n_processed = 0
+            processing_time = 0
+            last_report = time.monotonic()
+
+
+def update_lag(consumer):
+    """
+    Set the lag of every assigned partition, from its end offset and the consumer position
+    """
+    partitions = list(consumer.assignment())
+    if not partitions:
+        return
+    try:
+        end_offsets = consumer.end_offsets(partitions)
+        for tp in partitions:
+            lag = max(end_offsets[tp] - consumer.position(tp), 0)
+            metrics.consumer_lag.set(lag, topic=tp.topic, partition=tp.partition)
+    except Exception as e:
+        print(f"Could not get the consumer lag: {e!r}")
+
+
+def get_report(codec, pipeline, n_processed, processing_time) -> dict:
+    sessions = pipeline.sessions
+    writer = pipeline.writer
+    return {'processed': n_processed,
+            'processing_time': processing_time,
+            'decoded': codec.n_decoded,
+            'skipped': codec.n_skipped,
+            'undecodable': codec.n_failed,
+            'sessions': len(sessions),
+            'evicted_idle': sessions.evicted_idle,
+            'evicted_capacity': sessions.evicted_capacity,
+            'late_messages': sessions.late_messages,
+            'writes_pending': writer.pending(),
+            'writes_failed': writer.failed,
+            'write_retries': dead_letters.retried,
+            'dead_rows': dead_letters.dead_rows,
+            'write_time': writer.write_time,
+            'writer_wait_time': writer.wait_time}
+
+
+def print_report(r, prefix=''):
+    print(f"{prefix}sessions in cache: {r['sessions']}, evicted idle: {r['evicted_idle']}, "
+          f"evicted over capacity: {r['evicted_capacity']}, late messages of ended sessions: {r['late_messages']}")
+    print(f"{prefix}writes pending: {r['writes_pending']}, failed: {r['writes_failed']}, "
+          f"write time: {r['write_time']:.2f}s, waited for writer: {r['writer_wait_time']:.2f}s")
+    print(f"{prefix}write retries: {r['write_retries']}, rows dead lettered: {r['dead_rows']}")
+    print(f"{prefix}processed {r['processed']} messages in {r['processing_time']:.2f}s "
+          f"({r['processed'] / max(r['processing_time'], 1e-9):.0f} msg/s), "
+          f"decoded: {r['decoded']}, skipped: {r['skipped']}, undecodable: {r['undecodable']}")
 
 
 def attempt_session_insert(sess_batch):
     if sess_batch:
         try:
             print("inserting sessions...")
-            insert_batch(db, sess_batch, table=sessions_table_name, level='sessions')
+            insert_batch(db, sess_batch, table=sessions_table_name, level='sessions', dead_letters=dead_letters)
             print("inserted sessions succesfully")
         except TypeError as e:
             print("Type conversion error")
             print(repr(e))
+            raise
         except ValueError as e:
             print("Message value could not be processed or inserted correctly")
             print(repr(e))
-        except Exception as e:
-            print(repr(e))
+            raise
 
 
-def attempt_batch_insert(batch):
+def attempt_batch_insert(batch, projects=None):
     # insert a batch
     try:
         print("inserting...")
-        insert_batch(db=db, batch=batch, table=table_name, level=LEVEL)
+        insert_batch(db=db, batch=batch, table=table_name, level=LEVEL, projects=projects,
+                     dead_letters=dead_letters)
         print("inserted succesfully")
     except TypeError as e:
         print("Type conversion error")
         print(repr(e))
+        raise
     except ValueError as e:
         print("Message value could not be processed or inserted correctly")
         print(repr(e))
-    except Exception as e:
-        print(repr(e))
+        raise
 
 
 if __name__ == '__main__':
@@ -30,6 +30,16 @@ def get_class_by_tablename(tablename):
     raise AttributeError(f'No model with tablename "{tablename}"')
 
 
+def get_table_by_name(tablename):
+    """Return the Table of a model, or of a detailed family, by its name.
+    Raise an exception if there is none.
+    """
+    try:
+        return Base.metadata.tables[tablename]
+    except KeyError:
+        raise AttributeError(f'No table named "{tablename}"')
+
+
 class DBConnection:
     """
     Initializes connection to a database
@@ -81,6 +91,12 @@ class DBConnection:
             self.engine = create_engine(self.connect_str)
         elif config == 'bigquery':
             pass
+        elif config == 'parquet':
+            from db.loaders.parquet_loader import ParquetSink
+            self.sink = ParquetSink(root=os.environ['parquet_path'],
+                                    compression=os.environ.get('parquet_compression', 'zstd'),
+                                    max_file_bytes=int(os.environ.get('file_max_bytes', 128 << 20)),
+                                    max_file_age_s=int(os.environ.get('file_max_age_s', 600)))
         elif config == 'snowflake':
             self.connect_str = os.environ['connect_str'].format(
                 user=os.environ['user'],
@@ -94,6 +110,13 @@ class DBConnection:
         else:
             raise ValueError("This db configuration doesn't exist. Add into keys file.")
 
+    def close(self):
+        """
+        Finish what is still buffered, only file sinks buffer anything
+        """
+        if self.config == 'parquet':
+            self.sink.close()
+
     @contextmanager
     def get_test_session(self, **kwargs) -> session:
         """
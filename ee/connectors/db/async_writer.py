@@ -0,0 +1,126 @@
+"""
+Background batch writes for the consumer loop.
+
+Writes are queued to worker threads so that decoding and building the next
+batch overlap with database I/O. The queue is bounded: when the database
+falls behind, `submit` blocks and the consumer stops polling.
+
+Every write gets a sequence number and may carry the Kafka offsets it covers.
+Offsets are handed back for committing only once that write and every write
+submitted before it are done. A write that raised holds back every later
+commit, so a restart replays from before it: once a write failed the writer
+takes no new write, `submit` and `check` raise WriteFailed, and the writes
+after it are not kept for committing.
+"""
+import queue
+import threading
+import time
+
+_FAILED = object()
+
+
+class WriteFailed(Exception):
+    pass
+
+
+class AsyncWriter:
+
+    def __init__(self, workers: int = 1, queue_size: int = 2):
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._next_seq = 0
+        self._committed_seq = -1
+        self._done = {}
+        # sequence number and error of the first write that failed
+        self._failed_seq = None
+        self.error = None
+        self.write_time = 0
+        self.wait_time = 0
+        self.failed = 0
+        self._workers = [threading.Thread(target=self._run, name=f"writer-{i}", daemon=True)
+                         for i in range(workers)]
+        for w in self._workers:
+            w.start()
+
+    def submit(self, write, *args, offsets: dict = None):
+        """
+        Queue `write(*args)`, blocking while the queue is full.
+        `offsets` are the offsets that can be committed once it is written.
+        """
+        self.check()
+        seq = self._next_seq
+        self._next_seq += 1
+        start = time.perf_counter()
+        self._queue.put((seq, write, args, offsets))
+        self.wait_time += time.perf_counter() - start
+
+    def check(self):
+        """
+        Raise WriteFailed if a write failed
+        """
+        if self.error is not None:
+            raise WriteFailed(f"write {self._failed_seq} failed, offsets are not committed past it") \
+                from self.error
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._next_seq - self._committed_seq - 1
+
+    def committable_offsets(self):
+        """
+        Offsets of the latest write that, with all the writes before it, is done.
+        None if there is nothing new to commit.
+        """
+        offsets = None
+        with self._lock:
+            # stops at the first write that is not done yet or failed
+            while self._done.get(self._committed_seq + 1, _FAILED) is not _FAILED:
+                self._committed_seq += 1
+                done = self._done.pop(self._committed_seq)
+                if done is not None:
+                    offsets = done
+        return offsets
+
+    def flush(self):
+        """
+        Wait until every queued write is done
+        """
+        self._queue.join()
+
+    def close(self):
+        self.flush()
+        for _ in self._workers:
+            self._queue.put(None)
+        for w in self._workers:
+            w.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            seq, write, args, offsets = item
+            start = time.perf_counter()
+            result = offsets
+            error = None
+            try:
+                write(*args)
+            except Exception as e:
+                print(f"write {seq} failed, offsets won't be committed past it: {e!r}")
+                result = _FAILED
+                error = e
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.write_time += elapsed
+                if error is not None:
+                    self.failed += 1
+                    if self._failed_seq is None or seq < self._failed_seq:
+                        self._failed_seq = seq
+                        self.error = error
+                        # they can't be committed anymore
+                        for done in [s for s in self._done if s > seq]:
+                            del self._done[done]
+                if self._failed_seq is None or seq <= self._failed_seq:
+                    self._done[seq] = result
+            self._queue.task_done()
@@ -0,0 +1,81 @@
+"""
+Loader benchmark: rows/s of the bulk paths (COPY for pg, native blocks for clickhouse)
+against to_sql and executemany, on the normal level events table.
+
+Start a local database and point the usual env at it, e.g.
+
+    docker run -d -p 5432:5432 -e POSTGRES_PASSWORD=postgres postgres:13
+    DATABASE_NAME=pg connect_str='postgresql://{user}:{password}@{address}:{port}/{database}' \\
+    address=localhost port=5432 database=postgres user=postgres password=postgres \\
+    sessions_table=connector_user_sessions events_table_name=connector_events \\
+    python -m db.benchmark -n 20000
+
+    docker run -d -p 9000:9000 clickhouse/clickhouse-server
+    DATABASE_NAME=clickhouse connect_str='clickhouse+native://{address}/{database}' \\
+    address=localhost:9000 database=default \\
+    sessions_table=connector_user_sessions events_table_name=connector_events \\
+    python -m db.benchmark -n 20000
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from db.api import DBConnection
+from db.columnar import INT, BOOL
+from db.loaders.sql_loader import insert_columns_to_sql
+from db.models import Event, events_table_name, DATABASE
+from db.utils import get_schema
+import db.writer  # creates the tables
+
+
+def random_columns(n: int, seed: int = 0) -> dict:
+    rnd = random.Random(seed)
+    columns = {}
+    for name, kind in get_schema(Event):
+        if kind == INT:
+            columns[name] = [rnd.randint(0, 1 << 40) if rnd.random() < 0.2 else None for _ in range(n)]
+        elif kind == BOOL:
+            columns[name] = [rnd.random() < 0.5 if rnd.random() < 0.2 else None for _ in range(n)]
+        else:
+            columns[name] = [''.join(rnd.choice('abcdef ,"|\\\n') for _ in range(rnd.randint(0, 60)))
+                             if rnd.random() < 0.2 else None for _ in range(n)]
+    for name in ('sessionid', 'received_at', 'batch_order_number'):
+        columns[name] = [rnd.randint(0, 1 << 40) for _ in range(n)]
+    return columns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', type=int, default=20000, help='rows per method')
+    parser.add_argument('--batch', type=int, default=4000, help='rows per insert')
+    args = parser.parse_args()
+
+    conn = DBConnection(DATABASE)
+    columns = random_columns(args.n)
+    batches = []
+    for start in range(0, args.n, args.batch):
+        batches.append({name: values[start:start + args.batch] for name, values in columns.items()})
+
+    methods = {
+        'to_sql': lambda c: pd.DataFrame(c).to_sql(events_table_name, conn.engine, if_exists='append', index=False),
+        'executemany': lambda c: insert_columns_to_sql(conn, c, events_table_name),
+    }
+    if DATABASE == 'pg':
+        from db.loaders.postgres_loader import copy_to_postgres
+        methods['copy'] = lambda c: copy_to_postgres(conn, c, events_table_name)
+    elif DATABASE == 'clickhouse':
+        from db.loaders.clickhouse_loader import insert_native_to_clickhouse
+        methods['native'] = lambda c: insert_native_to_clickhouse(conn, c, events_table_name)
+
+    for name, method in methods.items():
+        start = time.perf_counter()
+        for batch in batches:
+            method(batch)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>12}: {args.n} rows in {elapsed:.2f}s  {args.n / elapsed:,.0f} rows/s")
+
+
+if __name__ == '__main__':
+    main()
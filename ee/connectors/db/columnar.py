@@ -0,0 +1,238 @@
+"""
+Column oriented event batches.
+
+Handlers write decoded fields straight into preallocated per-column arrays
+instead of creating an ORM object per event. Integer and boolean columns are
+typed arrays with a null mask (1 = null), string columns are plain lists.
+"""
+from array import array
+
+INT = 'int'
+BOOL = 'bool'
+STR = 'str'
+
+
+class IntColumn:
+    __slots__ = ('values', 'nulls')
+    kind = INT
+
+    def __init__(self, capacity: int):
+        self.values = array('q', bytes(8 * capacity))
+        self.nulls = bytearray(b'\x01' * capacity)
+
+    def set(self, i: int, value):
+        if value is None:
+            return
+        self.values[i] = value
+        self.nulls[i] = 0
+
+    def get(self, i: int):
+        return None if self.nulls[i] else self.values[i]
+
+    def grow(self, n: int):
+        self.values.frombytes(bytes(8 * n))
+        self.nulls.extend(b'\x01' * n)
+
+    def to_list(self, length: int) -> list:
+        nulls = self.nulls
+        return [None if nulls[i] else v for i, v in enumerate(self.values[:length])]
+
+
+class BoolColumn(IntColumn):
+    __slots__ = ()
+    kind = BOOL
+
+    def __init__(self, capacity: int):
+        self.values = bytearray(capacity)
+        self.nulls = bytearray(b'\x01' * capacity)
+
+    def set(self, i: int, value):
+        if value is None:
+            return
+        self.values[i] = 1 if value else 0
+        self.nulls[i] = 0
+
+    def get(self, i: int):
+        return None if self.nulls[i] else self.values[i] == 1
+
+    def grow(self, n: int):
+        self.values.extend(bytes(n))
+        self.nulls.extend(b'\x01' * n)
+
+    def to_list(self, length: int) -> list:
+        nulls = self.nulls
+        return [None if nulls[i] else v == 1 for i, v in enumerate(self.values[:length])]
+
+
+class StrColumn:
+    __slots__ = ('values',)
+    kind = STR
+
+    def __init__(self, capacity: int):
+        self.values = [None] * capacity
+
+    def set(self, i: int, value):
+        self.values[i] = value
+
+    def get(self, i: int):
+        return self.values[i]
+
+    def grow(self, n: int):
+        self.values.extend([None] * n)
+
+    def to_list(self, length: int) -> list:
+        return self.values[:length]
+
+
+_COLUMN_TYPES = {INT: IntColumn, BOOL: BoolColumn, STR: StrColumn}
+
+
+class RowWriter:
+    """
+    Stands in for an ORM instance in the handlers: attributes set on it are
+    written into the columns at the next free row of the batch.
+    Unknown attributes are ignored, like extra ORM attributes were.
+    """
+    __slots__ = ('_batch',)
+
+    def __init__(self, batch):
+        object.__setattr__(self, '_batch', batch)
+
+    def __setattr__(self, name, value):
+        batch = self._batch
+        column = batch.columns.get(name)
+        if column is not None:
+            column.set(batch.length, value)
+
+    def __getattr__(self, name):
+        batch = self._batch
+        column = batch.columns.get(name)
+        if column is None:
+            raise AttributeError(name)
+        return column.get(batch.length)
+
+
+class ColumnarBatch:
+    """
+    A batch of events stored column by column.
+
+    The handlers fill `batch.row()`, and `batch.append(row)` commits it.
+    A row that is not appended is never counted, and since handlers only write
+    to rows they return, nothing of it remains for the next one.
+    """
+
+    def __init__(self, schema: list, capacity: int = 4000, null_columns=()):
+        """
+        :param schema: list of (column name, kind) in table order, kind is one of INT, BOOL, STR
+        :param capacity: number of rows to preallocate, the batch grows past it if needed
+        :param null_columns: columns that are kept in the output but never written
+        """
+        self.schema = schema
+        self.null_columns = null_columns
+        self.capacity = capacity
+        self.length = 0
+        self.columns = {}
+        self.output_columns = []
+        for name, kind in schema:
+            column = _COLUMN_TYPES[kind](capacity)
+            self.output_columns.append((name, column))
+            if name not in null_columns:
+                self.columns[name] = column
+        self._row = RowWriter(self)
+
+    def __len__(self):
+        return self.length
+
+    def row(self) -> RowWriter:
+        if self.length == self.capacity:
+            for _, column in self.output_columns:
+                column.grow(self.capacity)
+            self.capacity *= 2
+        return self._row
+
+    def append(self, row: RowWriter):
+        if row is not self._row:
+            raise ValueError("Only rows obtained with ColumnarBatch.row() can be appended")
+        self.length += 1
+
+    def slice(self, start: int, end: int):
+        """
+        New batch with a copy of rows start:end
+        """
+        n = end - start
+        part = ColumnarBatch(self.schema, capacity=max(n, 1), null_columns=self.null_columns)
+        for (_, column), (_, target) in zip(self.output_columns, part.output_columns):
+            target.values[:n] = column.values[start:end]
+            if column.kind != STR:
+                target.nulls[:n] = column.nulls[start:end]
+        part.length = n
+        return part
+
+    @property
+    def column_names(self) -> list:
+        return [name for name, _ in self.output_columns]
+
+    def to_columns(self) -> dict:
+        return {name: column.to_list(self.length) for name, column in self.output_columns}
+
+
+class _FamilyRowWriter:
+    """
+    Row of a FamilyBatch: the first attribute set picks the family batch the
+    row goes to, every attribute is then written to that batch's next row.
+    """
+    __slots__ = ('_batch',)
+
+    def __init__(self, batch):
+        object.__setattr__(self, '_batch', batch)
+
+    def __setattr__(self, name, value):
+        batch = self._batch
+        row = batch._current
+        if row is None:
+            family = batch.families.get(name)
+            if family is None:
+                return
+            row = batch._current = batch.batches[family].row()
+            batch._current_family = family
+        setattr(row, name, value)
+
+
+class FamilyBatch:
+    """
+    Events split by family: one narrow ColumnarBatch per family, each with the
+    common columns and the columns of its family only.
+    A row belongs to the family of the first non common column set on it.
+    """
+
+    def __init__(self, schemas: dict, common: tuple, capacity: int = 4000, null_columns=()):
+        """
+        :param schemas: family -> list of (column name, kind) in table order
+        :param common: columns every family has, they don't pick the family
+        :param capacity: rows preallocated per family batch
+        :param null_columns: columns that are kept in the output but never written
+        """
+        self.batches = {family: ColumnarBatch(schema, capacity=capacity, null_columns=null_columns)
+                        for family, schema in schemas.items()}
+        self.families = {name: family for family, schema in schemas.items()
+                         for name, _ in schema if name not in common}
+        self.length = 0
+        self._current = None
+        self._current_family = None
+        self._row = _FamilyRowWriter(self)
+
+    def __len__(self):
+        return self.length
+
+    def row(self) -> _FamilyRowWriter:
+        self._current = None
+        return self._row
+
+    def append(self, row: _FamilyRowWriter):
+        if row is not self._row:
+            raise ValueError("Only rows obtained with FamilyBatch.row() can be appended")
+        if self._current is None:
+            return
+        self.batches[self._current_family].append(self._current)
+        self._current = None
+        self.length += 1
@@ -0,0 +1,130 @@
+"""
+Dead letter queue for batches the database rejects.
+
+A batch that fails on a connection problem is retried with exponential
+backoff, and if it still fails the error is raised: nothing is lost, the
+writer stops committing offsets past it. A batch the database rejects for
+its data is split in halves, each half written on its own, until the rows
+that can't be written are isolated. Those rows go to a local JSON lines file
+with the error, the rest of the batch is written.
+
+When more than max_dead_ratio of a batch is rejected the problem is not a few
+malformed messages (a schema change, a missing table...), so the error is
+raised instead of sending the whole batch to the file. An error rejecting
+every row would only be raised after thousands of writes of single rows, so
+a batch is also failed once it has been written max_attempts times.
+"""
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+import metrics
+from db.columnar import ColumnarBatch
+from db.utils import get_row
+
+# errors of the connection rather than of the data, by class name so that
+# no database driver has to be installed (sqlalchemy, psycopg2, clickhouse-driver)
+TRANSIENT_ERRORS = {'OperationalError', 'InterfaceError', 'DisconnectionError', 'TimeoutError',
+                    'NetworkError', 'SocketTimeoutError', 'ConnectionError', 'ConnectionResetError'}
+
+
+def is_transient(e: Exception) -> bool:
+    return any(c.__name__ in TRANSIENT_ERRORS for c in type(e).__mro__)
+
+
+class BatchRejected(Exception):
+    pass
+
+
+def split_batch(batch):
+    half = len(batch) // 2
+    if isinstance(batch, ColumnarBatch):
+        return batch.slice(0, half), batch.slice(half, len(batch))
+    return batch[:half], batch[half:]
+
+
+def get_rows(batch) -> list:
+    if isinstance(batch, ColumnarBatch):
+        columns = batch.to_columns()
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+    return [{k: v for k, v in get_row(b).items() if not k.startswith('_')} for b in batch]
+
+
+class DeadLetterQueue:
+
+    def __init__(self, path: str, retries: int = 5, backoff_s: float = 0.5, max_backoff_s: float = 30,
+                 max_dead_ratio: float = 0.5, max_attempts: int = 100):
+        """
+        :param path: JSON lines file the rejected rows are appended to
+        :param retries: attempts on connection errors before giving up
+        :param max_dead_ratio: share of a batch over which it is failed instead of dead lettered
+        :param max_attempts: writes of the parts of a batch over which it is failed, not counting the retries
+        """
+        self.path = path
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.max_dead_ratio = max_dead_ratio
+        self.max_attempts = max_attempts
+        self.dead_rows = 0
+        self.retried = 0
+        self._lock = threading.Lock()
+
+    def put(self, table: str, rows: list, error: Exception):
+        failed_at = datetime.now(timezone.utc).isoformat()
+        lines = [json.dumps({'table': table, 'failed_at': failed_at, 'error': repr(error), 'row': row},
+                            default=str) + '\n' for row in rows]
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.writelines(lines)
+            self.dead_rows += len(rows)
+        metrics.dead_rows.inc(len(rows), table=table)
+        print(f"{len(rows)} rows of {table} sent to the dead letter queue: {error!r}")
+
+    def _attempt(self, write, batch):
+        """
+        Write a batch, retrying connection errors. Returns the data error, if any.
+        """
+        delay = self.backoff_s
+        for attempt in range(self.retries):
+            try:
+                write(batch)
+                return None
+            except Exception as e:
+                if not is_transient(e):
+                    return e
+                if attempt == self.retries - 1:
+                    raise
+                print(f"write failed, retrying in {delay:.1f}s: {e!r}")
+                with self._lock:
+                    self.retried += 1
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff_s)
+
+    def write(self, write, batch, table: str):
+        """
+        Write `batch` with `write(batch)`, dead lettering the rows it is rejected for
+        """
+        max_dead = max(1, int(len(batch) * self.max_dead_ratio))
+        dead = []
+        pending = [batch]
+        attempts = 0
+        while pending:
+            part = pending.pop()
+            error = self._attempt(write, part)
+            attempts += 1
+            if error is None:
+                continue
+            if attempts >= self.max_attempts:
+                raise BatchRejected(f"{len(batch)} rows of {table} still rejected after {attempts} writes, "
+                                    f"last error: {error!r}") from error
+            if len(part) == 1:
+                dead.append((part, error))
+                if len(dead) > max_dead:
+                    raise BatchRejected(f"more than {max_dead} of {len(batch)} rows of {table} rejected, "
+                                        f"last error: {error!r}") from error
+                continue
+            pending.extend(reversed(split_batch(part)))
+        for part, error in dead:
+            self.put(table, get_rows(part), error)
@@ -0,0 +1,29 @@
+"""
+CSV rows shared by the loaders that COPY a batch given as column name -> values.
+"""
+
+
+def csv_field(v, format_array=str) -> str:
+    """
+    :param format_array: text of a list value, which is then quoted like any string
+    """
+    if v is None:
+        return ''
+    if isinstance(v, list):
+        v = format_array(v)
+    if isinstance(v, str):
+        return '"' + v.replace('"', '""') + '"'
+    if v is True:
+        return 't'
+    if v is False:
+        return 'f'
+    return str(v)
+
+
+def csv_lines(columns: dict, start: int = 0, end: int = None, format_array=str) -> list:
+    """
+    Rows start:end as CSV lines. Strings are always quoted, so an unquoted empty field is a NULL,
+    and delimiters and new lines in them need no clean up.
+    """
+    fields = [[csv_field(v, format_array) for v in values[start:end]] for values in columns.values()]
+    return [','.join(row) + '\n' for row in zip(*fields)]
@@ -1,4 +1,48 @@
+import os
+import threading
+
+from clickhouse_driver import Client
+
+# clickhouse-driver clients are not thread safe, writer threads get one each
+_local = threading.local()
+
 
 def insert_to_clickhouse(db, df, table: str):
     df.to_sql(table, db.engine, if_exists='append', index=False)
 
+
+def get_native_client(db) -> Client:
+    """
+    clickhouse-driver client on the native protocol, one per thread
+    """
+    client = getattr(_local, 'client', None)
+    if client is None:
+        host, _, port = os.environ['address'].partition(':')
+        client = Client(host=host, port=int(port or 9000), database=os.environ['database'])
+        _local.client = client
+        _local.column_types = {}
+    return client
+
+
+def get_column_types(db, table: str) -> dict:
+    client = get_native_client(db)
+    types = _local.column_types.get(table)
+    if types is None:
+        rows = client.execute(f"DESCRIBE TABLE {table}")
+        types = {row[0]: row[1] for row in rows}
+        _local.column_types[table] = types
+    return types
+
+
+def insert_native_to_clickhouse(db, columns: dict, table: str):
+    """
+    Insert a batch given as column name -> values as one columnar block
+    """
+    client = get_native_client(db)
+    types = get_column_types(db, table)
+    data = []
+    for name, values in columns.items():
+        if types.get(name, '').startswith('Array('):
+            values = [v if isinstance(v, list) else [] for v in values]
+        data.append(values)
+    client.execute(f"INSERT INTO {table} ({', '.join(columns)}) VALUES", data, columnar=True)
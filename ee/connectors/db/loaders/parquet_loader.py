@@ -0,0 +1,154 @@
+"""
+Parquet files sink.
+
+Batches are appended as row groups to one open file per table, project and
+hour, under
+
+    <root>/<table>/project=<project id>/hour=<YYYY-MM-DD-HH>/part-<opened at>-<pid>-<n>.parquet
+
+Rows are put in an hour by their `time_column` (received_at for events, the
+session start for sessions). A file is rolled, i.e. closed and a new one
+started on the next write, once it reaches max_file_bytes or has been open
+for max_file_age_s. Files are written under a `.inprogress` name and renamed
+when closed, so whatever loads or archives them only sees complete files.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import ARRAY, BigInteger, Boolean, Integer
+from sqlalchemy.types import TypeEngine
+
+from db.api import get_class_by_tablename, get_table_by_name
+
+UNKNOWN_PROJECT = 'unknown'
+
+
+def get_columns(table: str) -> list:
+    """
+    (name, type) of the columns of a table, in the order of its model. The model attributes that are a
+    bare type, not a Column (Session.issues and urls), are not in the Table but are in the batches.
+    """
+    columns = {c.name: c.type for c in get_table_by_name(table).columns}
+    try:
+        model = get_class_by_tablename(table)
+    except AttributeError:
+        # detailed families have a Table and no model
+        return list(columns.items())
+    ordered = []
+    for name, attribute in model.__dict__.items():
+        if name in columns:
+            ordered.append((name, columns.pop(name)))
+        elif isinstance(attribute, TypeEngine):
+            ordered.append((name, attribute))
+    return ordered + list(columns.items())
+
+
+def get_arrow_schema(table: str, arrays_as_strings=False) -> pa.Schema:
+    """
+    :param arrays_as_strings: type ARRAY columns as strings, for warehouses that keep them as text
+    """
+    fields = []
+    for name, type_ in get_columns(table):
+        if isinstance(type_, (BigInteger, Integer)):
+            fields.append(pa.field(name, pa.int64()))
+        elif isinstance(type_, Boolean):
+            fields.append(pa.field(name, pa.bool_()))
+        elif isinstance(type_, ARRAY) and not arrays_as_strings:
+            fields.append(pa.field(name, pa.list_(pa.string())))
+        else:
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+
+class _OpenFile:
+
+    def __init__(self, path: str, schema: pa.Schema, compression: str):
+        self.path = path
+        self.opened_at = time.monotonic()
+        self.file = open(path + '.inprogress', 'wb')
+        self.writer = pq.ParquetWriter(self.file, schema, compression=compression)
+
+    @property
+    def size(self) -> int:
+        return self.file.tell()
+
+    def close(self):
+        self.writer.close()
+        self.file.close()
+        os.rename(self.path + '.inprogress', self.path)
+
+
+class ParquetSink:
+
+    def __init__(self, root: str, compression: str = 'zstd',
+                 max_file_bytes: int = 128 << 20, max_file_age_s: float = 600):
+        self.root = root
+        self.compression = compression
+        self.max_file_bytes = max_file_bytes
+        self.max_file_age_s = max_file_age_s
+        self._schemas = {}
+        # (table, project, hour) -> _OpenFile
+        self._files = {}
+        self._n_files = 0
+        # writer threads share the open files
+        self._lock = threading.Lock()
+
+    def _schema(self, table: str) -> pa.Schema:
+        schema = self._schemas.get(table)
+        if schema is None:
+            schema = self._schemas[table] = get_arrow_schema(table)
+        return schema
+
+    def _open(self, table: str, project, hour: str) -> _OpenFile:
+        directory = os.path.join(self.root, table, f"project={project}", f"hour={hour}")
+        os.makedirs(directory, exist_ok=True)
+        self._n_files += 1
+        opened_at = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+        path = os.path.join(directory, f"part-{opened_at}-{os.getpid()}-{self._n_files}.parquet")
+        return _OpenFile(path, self._schema(table), self.compression)
+
+    def write(self, table: str, columns: dict, projects: dict, time_column: str):
+        """
+        Append a batch given as column name -> values.
+        `projects` maps session ids to their project id, rows of other sessions go to project=unknown.
+        """
+        schema = self._schema(table)
+        data = pa.table([pa.array(columns.get(f.name, [None] * len(columns['sessionid'])), type=f.type)
+                         for f in schema], schema=schema)
+
+        partitions = {}
+        now_ms = int(time.time() * 1000)
+        for i, (session_id, ts) in enumerate(zip(columns['sessionid'], columns[time_column])):
+            project = projects.get(session_id)
+            hour = datetime.fromtimestamp((ts or now_ms) // 1000, timezone.utc).strftime('%Y-%m-%d-%H')
+            key = (UNKNOWN_PROJECT if project is None else project, hour)
+            rows = partitions.get(key)
+            if rows is None:
+                rows = partitions[key] = []
+            rows.append(i)
+
+        with self._lock:
+            for (project, hour), rows in partitions.items():
+                key = (table, project, hour)
+                f = self._files.get(key)
+                if f is None:
+                    f = self._files[key] = self._open(table, project, hour)
+                f.writer.write_table(data if len(rows) == len(data) else data.take(rows))
+            self._roll()
+
+    def _roll(self):
+        now = time.monotonic()
+        for key, f in list(self._files.items()):
+            if f.size >= self.max_file_bytes or now - f.opened_at >= self.max_file_age_s:
+                del self._files[key]
+                f.close()
+
+    def close(self):
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+            self._files = {}
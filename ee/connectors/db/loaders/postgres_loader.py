@@ -1,3 +1,45 @@
+import io
+
+from db.loaders import csv_lines
+
 
 def insert_to_postgres(db, df, table: str):
     df.to_sql(table, db.engine, if_exists='append', index=False)
+
+
+def _csv_array(values: list) -> str:
+    items = []
+    for v in values:
+        if v is None:
+            items.append('NULL')
+        else:
+            items.append('"' + str(v).replace('\\', '\\\\').replace('"', '\\"') + '"')
+    return '{' + ','.join(items) + '}'
+
+
+def columns_to_csv(columns: dict) -> io.StringIO:
+    """
+    CSV for COPY, with the arrays as postgres array literals
+    """
+    buf = io.StringIO()
+    buf.writelines(csv_lines(columns, format_array=_csv_array))
+    buf.seek(0)
+    return buf
+
+
+def copy_to_postgres(db, columns: dict, table: str):
+    """
+    Bulk load a batch given as column name -> values with COPY FROM STDIN
+    """
+    buf = columns_to_csv(columns)
+    query = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    connection = db.engine.raw_connection()
+    try:
+        with connection.cursor() as cur:
+            cur.copy_expert(query, buf)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
@@ -1,6 +1,14 @@
-from db.models import DetailedEvent
+import gzip
+import io
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
 from psycopg2.errors import InternalError_
 
+from db.loaders import csv_lines
+
 
 def transit_insert_to_redshift(db, df, table):
 
@@ -17,3 +25,189 @@ def insert_df(pr, df, table):
                           redshift_table_name=table,
                           append=True,
                           delimiter='|')
+
+
+class S3Store:
+
+    def __init__(self, bucket: str, prefix: str):
+        import boto3
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.client = boto3.client('s3',
+                                   aws_access_key_id=os.environ['aws_access_key_id'],
+                                   aws_secret_access_key=os.environ['aws_secret_access_key'])
+
+    def key(self, name: str) -> str:
+        return f"{self.prefix}/{name}" if self.prefix else name
+
+    def put(self, name: str, body: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=self.key(name), Body=body)
+
+    def delete(self, names: list):
+        self.client.delete_objects(Bucket=self.bucket,
+                                   Delete={'Objects': [{'Key': self.key(n)} for n in names]})
+
+    def url(self, name: str) -> str:
+        return f"s3://{self.bucket}/{self.key(name)}"
+
+
+class LocalStore:
+    """
+    Stands in for S3 in tests: objects are files under `root`
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def put(self, name: str, body: bytes):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(body)
+
+    def delete(self, names: list):
+        for name in names:
+            os.remove(os.path.join(self.root, name))
+
+    def url(self, name: str) -> str:
+        return f"file://{os.path.join(os.path.abspath(self.root), name)}"
+
+
+def columns_to_csv(columns: dict, start: int, end: int) -> bytes:
+    """
+    Rows start:end as CSV, with the arrays as their text: they are VARCHAR in redshift
+    """
+    return ''.join(csv_lines(columns, start, end)).encode('utf-8')
+
+
+def columns_to_parquet(columns: dict, start: int, end: int, table: str) -> bytes:
+    """
+    Rows start:end as Parquet, with every column of the table in table order: COPY matches Parquet columns
+    by position. Array columns are VARCHAR in redshift, they are written as strings.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from db.loaders.parquet_loader import get_arrow_schema
+
+    schema = get_arrow_schema(table, arrays_as_strings=True)
+    unknown = set(columns) - set(schema.names)
+    if unknown:
+        raise ValueError(f"Columns {', '.join(sorted(unknown))} of the batch are not in {table}, "
+                         f"they can't be staged as parquet")
+    arrays = []
+    for f in schema:
+        values = columns.get(f.name)
+        if values is None:
+            values = [None] * (end - start)
+        else:
+            values = [str(v) if isinstance(v, list) else v for v in values[start:end]]
+        arrays.append(pa.array(values, type=f.type))
+    buf = io.BytesIO()
+    pq.write_table(pa.table(arrays, schema=schema), buf, compression='snappy')
+    return buf.getvalue()
+
+
+# staging_format -> (file suffix, COPY format options)
+STAGING_FORMATS = {
+    'csv.gz': ('.csv.gz', "FORMAT AS CSV GZIP EMPTYASNULL"),
+    'csv.zst': ('.csv.zst', "FORMAT AS CSV ZSTD EMPTYASNULL"),
+    'parquet': ('.parquet', "FORMAT AS PARQUET"),
+}
+
+
+class RedshiftStager:
+    """
+    Loads batches through staged files: the batch is split in `parts` compressed
+    files uploaded concurrently under one prefix, and a single COPY loads the
+    prefix, each slice of the cluster reading its own files in parallel.
+    """
+
+    def __init__(self, store, execute, staging_format: str = 'csv.gz', parts: int = 4, keep: bool = False):
+        """
+        :param store: S3Store, or a LocalStore in tests
+        :param execute: runs the COPY statement
+        :param keep: leave the staged files in place after the COPY
+        """
+        if staging_format not in STAGING_FORMATS:
+            raise ValueError(f"Unknown staging format {staging_format}, use one of {', '.join(STAGING_FORMATS)}")
+        self.store = store
+        self.execute = execute
+        self.staging_format = staging_format
+        self.parts = parts
+        self.keep = keep
+        self._pool = ThreadPoolExecutor(max_workers=parts, thread_name_prefix='staging')
+
+    def _encode(self, columns: dict, start: int, end: int, table: str) -> bytes:
+        if self.staging_format == 'parquet':
+            return columns_to_parquet(columns, start, end, table)
+        body = columns_to_csv(columns, start, end)
+        if self.staging_format == 'csv.gz':
+            return gzip.compress(body, compresslevel=6)
+        import zstandard
+        return zstandard.ZstdCompressor().compress(body)
+
+    def _stage_part(self, columns: dict, start: int, end: int, table: str, name: str) -> str:
+        self.store.put(name, self._encode(columns, start, end, table))
+        return name
+
+    def copy_statement(self, table: str, columns: list, prefix: str) -> str:
+        _, options = STAGING_FORMATS[self.staging_format]
+        if os.environ.get('iam_role'):
+            credentials = f"IAM_ROLE '{os.environ['iam_role']}'"
+        else:
+            credentials = (f"CREDENTIALS 'aws_access_key_id={os.environ.get('aws_access_key_id', '')};"
+                           f"aws_secret_access_key={os.environ.get('aws_secret_access_key', '')}'")
+        # parquet columns are matched by position, so the file has every column in table order
+        column_list = '' if self.staging_format == 'parquet' else f" ({', '.join(columns)})"
+        return f"COPY {table}{column_list} FROM '{self.store.url(prefix)}' {credentials} {options}"
+
+    def load(self, columns: dict, table: str):
+        n = len(next(iter(columns.values())))
+        suffix, _ = STAGING_FORMATS[self.staging_format]
+        prefix = f"{table}/{uuid.uuid4().hex}/"
+        step = -(-n // self.parts)
+        futures = [self._pool.submit(self._stage_part, columns, start, min(start + step, n), table,
+                                     f"{prefix}part-{i:03d}{suffix}")
+                   for i, start in enumerate(range(0, n, step))]
+        names = [f.result() for f in futures]
+        try:
+            self.execute(self.copy_statement(table, list(columns), prefix))
+        finally:
+            if not self.keep:
+                self.store.delete(names)
+
+
+_stager_lock = threading.Lock()
+
+
+def get_stager(db) -> RedshiftStager:
+    with _stager_lock:
+        stager = getattr(db, 'stager', None)
+        if stager is None:
+            if os.environ.get('staging_path'):
+                store = LocalStore(os.environ['staging_path'])
+            else:
+                store = S3Store(os.environ['bucket'], f"{os.environ['subdirectory']}/staging")
+
+            def execute(query):
+                with db.engine.begin() as conn:
+                    conn.execute(query)
+
+            stager = RedshiftStager(store, execute,
+                                    staging_format=os.environ.get('staging_format', 'csv.gz'),
+                                    parts=int(os.environ.get('staging_parts', 4)),
+                                    keep=os.environ.get('staging_keep', 'false') == 'true')
+            db.stager = stager
+        return stager
+
+
+def stage_insert_to_redshift(db, columns: dict, table: str):
+    """
+    Bulk load a batch given as column name -> values through staged files and one COPY
+    """
+    try:
+        get_stager(db).load(columns, table)
+    except InternalError_ as e:
+        print(repr(e))
+        print("loading failed. check stl_load_errors")
+        raise
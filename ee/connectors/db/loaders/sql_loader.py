@@ -0,0 +1,12 @@
+from db.api import get_table_by_name
+
+
+def insert_columns_to_sql(db, columns: dict, table: str):
+    """
+    Insert a batch given as column name -> values with a single executemany,
+    skipping the DataFrame and to_sql
+    """
+    names = list(columns)
+    rows = [dict(zip(names, values)) for values in zip(*columns.values())]
+    if rows:
+        db.engine.execute(get_table_by_name(table).insert(), rows)
@@ -1,5 +1,5 @@
 # coding: utf-8
-from sqlalchemy import BigInteger, Boolean, Column, Integer, ARRAY, VARCHAR, text, VARCHAR
+from sqlalchemy import BigInteger, Boolean, Column, Integer, ARRAY, VARCHAR, text, VARCHAR, Table
 from sqlalchemy.ext.declarative import declarative_base
 from pathlib import Path
 import os
@@ -374,3 +374,26 @@ class DetailedEvent(Base):
     received_at = Column(BigInteger)
     batch_order_number = Column(BigInteger)
 
+
+# Narrow tables of the 'families' detailed layout: one per message family, the
+# prefix of the DetailedEvent columns a message sets (clickevent_*, fetch_*, ...)
+detailed_common_columns = ('sessionid', 'received_at', 'batch_order_number')
+
+
+def get_detailed_family(column_name: str) -> str:
+    return column_name.split('_')[0]
+
+
+detailed_family_tables = {}
+if events_detailed_table_name is not None:
+    _family_columns = {}
+    for c in DetailedEvent.__table__.columns:
+        if c.name not in detailed_common_columns:
+            _family_columns.setdefault(get_detailed_family(c.name), []).append(c)
+    for _family, _columns in _family_columns.items():
+        detailed_family_tables[_family] = Table(
+            f"{events_detailed_table_name}_{_family}", metadata,
+            Column('sessionid', BigInteger),
+            *[Column(c.name, c.type) for c in _columns],
+            Column('received_at', BigInteger),
+            Column('batch_order_number', BigInteger))
@@ -0,0 +1,114 @@
+"""
+get_df_from_batch string clean up benchmark: the str.slice + str.replace passes
+it used to run on every 'string' column after astype, against the schema
+driven single pass of get_string_normalizer on the object columns before it.
+
+    DATABASE_NAME=redshift load_method=sql sessions_table=connector_user_sessions \\
+    events_table_name=connector_events events_detailed_table_name=connector_events_detailed \\
+    python -m db.strings_benchmark [--level detailed] [--rows 4000] [--fill 0.3]
+
+Detailed rows only have the columns of one message set, `--fill` is the share
+of non null values of the other levels.
+Run it with the redshift '|'-delimited rules, the only ones that change every string.
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from db.columnar import INT, BOOL
+from db.utils import get_df_from_batch, get_schema, get_string_columns, _get_model, \
+    detailed_null_columns, events_col, detailed_events_col, sessions_col, \
+    dtypes_events, dtypes_detailed_events, dtypes_sessions
+
+
+class Row:
+
+    def __init__(self, values: dict):
+        self.__dict__.update(values)
+
+
+def random_value(kind, rnd: random.Random):
+    if kind == INT:
+        return rnd.randint(0, 1 << 40)
+    if kind == BOOL:
+        return rnd.random() < 0.5
+    return ''.join(rnd.choice('abcdefghij/|., ') for _ in range(rnd.randint(0, 400)))
+
+
+def random_batch(level, rows: int, fill: float, seed: int = 0) -> list:
+    """
+    Rows with a `fill` share of their columns set. Detailed rows are like the handlers
+    make them instead: sessionid plus the columns of a single message.
+    """
+    rnd = random.Random(seed)
+    schema = [(name, kind) for name, kind in get_schema(_get_model(level)) if name not in detailed_null_columns]
+    families = {}
+    for name, kind in schema:
+        families.setdefault(name.split('_')[0], []).append((name, kind))
+    batch = []
+    for _ in range(rows):
+        if level == 'detailed':
+            columns = rnd.choice(list(families.values()))
+            values = {name: random_value(kind, rnd) for name, kind in columns}
+            values['sessionid'] = rnd.randint(0, 1 << 40)
+        else:
+            values = {name: random_value(kind, rnd) for name, kind in schema if rnd.random() < fill}
+        batch.append(Row(values))
+    return batch
+
+
+def two_passes_get_df_from_batch(batch, level):
+    """
+    get_df_from_batch as it was, for reference
+    """
+    columns, dtypes = {'normal': (events_col, dtypes_events),
+                       'detailed': (detailed_events_col, dtypes_detailed_events),
+                       'sessions': (sessions_col, dtypes_sessions)}[level]
+    df = pd.DataFrame([b.__dict__ for b in batch], columns=columns)
+    if level == 'detailed':
+        df['inputevent_value'] = None
+        df['customevent_payload'] = None
+    df = df.astype(dtypes)
+    for x in df.columns:
+        if df[x].dtype == 'string':
+            df[x] = df[x].str.slice(0, 255)
+            df[x] = df[x].str.replace("|", "", regex=False)
+    return df
+
+
+def best_of(f, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--level', default='detailed', choices=('normal', 'detailed', 'sessions'))
+    parser.add_argument('--rows', type=int, default=4000)
+    parser.add_argument('--fill', type=float, default=0.3)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    batch = random_batch(args.level, args.rows, args.fill)
+    print(f"{args.level}: {args.rows} rows, {len(get_schema(_get_model(args.level)))} columns, "
+          f"{len(get_string_columns(args.level))} of them strings")
+    if not two_passes_get_df_from_batch(batch, args.level).equals(get_df_from_batch(batch, args.level)):
+        print("note: outputs differ, the two passes only clean up columns typed 'string' in the dtypes")
+
+    results = {}
+    for name, f in (('two passes', two_passes_get_df_from_batch), ('single pass', get_df_from_batch)):
+        elapsed = best_of(lambda: f(batch, args.level), args.repeat)
+        results[name] = elapsed
+        print(f"{name:>12}: {elapsed * 1000:.1f}ms per batch")
+    print(f"{'speedup':>12}: {results['two passes'] / results['single pass']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,9 @@
 from pathlib import Path
 
+from sqlalchemy import BigInteger, Boolean, Integer
+
+from db.models import metadata, detailed_common_columns, detailed_family_tables
+
 base_path = Path(__file__).parent.parent
 
 
@@ -59,3 +63,31 @@ def create_tables_redshift(db):
         q = f.read()
     db.engine.execute(q)
     print(f"`connector_sessions` table created succesfully.")
+
+
+def get_clickhouse_family_ddl(table) -> str:
+    columns = []
+    for c in table.columns:
+        if c.name in detailed_common_columns:
+            columns.append(f"{c.name} UInt64")
+        elif isinstance(c.type, (BigInteger, Integer)):
+            columns.append(f"{c.name} Nullable(Int64)")
+        elif isinstance(c.type, Boolean):
+            columns.append(f"{c.name} Nullable(UInt8)")
+        else:
+            columns.append(f"{c.name} Nullable(String)")
+    return (f"CREATE TABLE IF NOT EXISTS {table.name} ({', '.join(columns)}) ENGINE = MergeTree() "
+            f"PARTITION BY intDiv(received_at, 100000) ORDER BY (received_at, batch_order_number, sessionid)")
+
+
+def create_family_tables(db):
+    """
+    Narrow tables of the 'families' detailed layout, generated from DetailedEvent
+    """
+    tables = list(detailed_family_tables.values())
+    if db.config == 'clickhouse':
+        for table in tables:
+            db.engine.execute(get_clickhouse_family_ddl(table))
+    else:
+        metadata.create_all(db.engine, tables=tables)
+    print(f"{len(tables)} detailed family tables created succesfully.")
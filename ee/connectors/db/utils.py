@@ -1,5 +1,16 @@
+import os
+
+import numpy as np
 import pandas as pd
-from db.models import DetailedEvent, Event, Session, DATABASE
+from sqlalchemy import BigInteger, Boolean, Integer, String
+from db.columnar import ColumnarBatch, FamilyBatch, INT, BOOL, STR
+from db.models import DetailedEvent, Event, Session, DATABASE, detailed_common_columns, detailed_family_tables
+
+# 'sql': INSERT statements (pandas_redshift for redshift), 'bulk': COPY for pg, native columnar blocks for
+# clickhouse and COPY of staged files for redshift
+LOAD_METHOD = os.environ.get('load_method', 'sql')
+# 'wide': one detailed events table, 'families': one narrow table per message family
+DETAILED_LAYOUT = os.environ.get('detailed_layout', 'wide')
 
 dtypes_events = {'sessionid': "Int64",
                  'connectioninformation_downlink': "Int64",
@@ -104,10 +115,10 @@ dtypes_detailed_events = {
     "jsexception_message": "object",
     "jsexception_name": "object",
     "jsexception_payload": "object",
-    "longtasks_timestamp": "Int64",
-    "longtasks_duration": "Int64",
-    "longtasks_containerid": "object",
-    "longtasks_containersrc": "object",
+    "longtask_timestamp": "Int64",
+    "longtask_duration": "Int64",
+    "longtask_containerid": "object",
+    "longtask_containersrc": "object",
     "memoryissue_duration": "Int64",
     "memoryissue_rate": "Int64",
     "memoryissue_timestamp": "Int64",
@@ -329,13 +340,30 @@ for col in Session.__dict__:
         sessions_col.append(col)
 
 
+def get_row(b) -> dict:
+    # ORM instances keep their values in __dict__, session_store.SessionState uses __slots__
+    try:
+        return b.__dict__
+    except AttributeError:
+        return b.to_dict()
+
+
 def get_df_from_batch(batch, level):
     if level == 'normal':
-        df = pd.DataFrame([b.__dict__ for b in batch], columns=events_col)
+        columns = events_col
     if level == 'detailed':
-        df = pd.DataFrame([b.__dict__ for b in batch], columns=detailed_events_col)
+        columns = detailed_events_col
     if level == 'sessions':
-        df = pd.DataFrame([b.__dict__ for b in batch], columns=sessions_col)
+        columns = sessions_col
+
+    rows = [get_row(b) for b in batch]
+    # rows are sparse, cleaning up the strings they have is a single pass over their values
+    normalize = get_string_normalizer()
+    if normalize is not None:
+        strings = get_string_columns(level)
+        rows = [{k: normalize(v) if k in strings and isinstance(v, str) else v for k, v in r.items()}
+                for r in rows]
+    df = pd.DataFrame(rows, columns=columns)
 
     try:
         df = df.drop('_sa_instance_state', axis=1)
@@ -355,14 +383,150 @@ def get_df_from_batch(batch, level):
         df['issues'] = df['issues'].fillna('')
         df['urls'] = df['urls'].fillna('')
 
-    for x in df.columns:
-        try:
-            if df[x].dtype == 'string':
-                df[x] = df[x].str.slice(0, 255)
-                df[x] = df[x].str.replace("|", "")
-        except TypeError as e:
-            print(repr(e))
-            if df[x].dtype == 'str':
-                df[x] = df[x].str.slice(0, 255)
-                df[x] = df[x].str.replace("|", "")
     return df
+
+
+# Columns get_df_from_batch blanks out for the detailed level
+detailed_null_columns = ('inputevent_value', 'customevent_payload')
+
+
+def get_schema(model) -> list:
+    """
+    (column name, kind) pairs of a model's table, in table order
+    """
+    return get_table_schema(model.__table__)
+
+
+def get_table_schema(table) -> list:
+    schema = []
+    for c in table.columns:
+        if isinstance(c.type, (BigInteger, Integer)):
+            schema.append((c.name, INT))
+        elif isinstance(c.type, Boolean):
+            schema.append((c.name, BOOL))
+        else:
+            schema.append((c.name, STR))
+    return schema
+
+
+def get_columnar_batch(level, capacity=4000, layout=DETAILED_LAYOUT):
+    if level == 'normal':
+        return ColumnarBatch(get_schema(Event), capacity=capacity)
+    if level == 'detailed' and layout == 'families':
+        # family batches fill up unevenly, the capacity is what they start with
+        schemas = {family: get_table_schema(table) for family, table in detailed_family_tables.items()}
+        return FamilyBatch(schemas, detailed_common_columns, capacity=max(capacity // 16, 64),
+                           null_columns=detailed_null_columns)
+    if level == 'detailed':
+        return ColumnarBatch(get_schema(DetailedEvent), capacity=capacity, null_columns=detailed_null_columns)
+    raise ValueError(f"No columnar batch for level {level}")
+
+
+def _get_dtypes(level):
+    if level == 'normal':
+        return dtypes_events
+    if level == 'detailed':
+        return dtypes_detailed_events
+    return dtypes_sessions
+
+
+def _get_model(level):
+    if level == 'normal':
+        return Event
+    if level == 'detailed':
+        return DetailedEvent
+    return Session
+
+
+_string_columns = {}
+
+
+def get_string_columns(level) -> frozenset:
+    """
+    String columns of a level's table, without the ones that are never written
+    """
+    columns = _string_columns.get(level)
+    if columns is None:
+        skip = detailed_null_columns if level == 'detailed' else ()
+        columns = frozenset(c.name for c in _get_model(level).__table__.columns
+                            if isinstance(c.type, String) and c.name not in skip)
+        _string_columns[level] = columns
+    return columns
+
+
+def _truncate(v: str) -> str:
+    return v[:255]
+
+
+def _truncate_strip_pipes(v: str) -> str:
+    return v[:255].replace("|", "")
+
+
+def get_string_normalizer(database=DATABASE, load_method=LOAD_METHOD):
+    """
+    Function cleaning up a string for what the target tables take, None if they take any string.
+    Redshift columns are VARCHAR(300) for events, VARCHAR(256) for sessions,
+    and its '|'-delimited upload (load_method=sql) can't have "|" in values.
+    """
+    if database != 'redshift':
+        return None
+    if load_method == 'bulk':
+        return _truncate
+    return _truncate_strip_pipes
+
+
+def _normalize_column(values: list, normalize) -> list:
+    if values.count(None) == len(values):
+        return values
+    return [normalize(v) if isinstance(v, str) else v for v in values]
+
+
+def get_columns_from_columnar(batch: ColumnarBatch, level) -> dict:
+    """
+    Column name -> list of python values, with the same string clean up as get_df_from_batch
+    """
+    columns = batch.to_columns()
+    normalize = get_string_normalizer()
+    if normalize is not None:
+        for name in get_string_columns(level):
+            # family batches only have some of the level's columns
+            if name in columns:
+                columns[name] = _normalize_column(columns[name], normalize)
+    return columns
+
+
+def get_columns_from_df(df) -> dict:
+    """
+    Column name -> list of python values, with None for every kind of missing value
+    """
+    columns = {}
+    for name in df.columns:
+        missing = df[name].isna().tolist()
+        columns[name] = [None if m else v for v, m in zip(df[name].tolist(), missing)]
+    return columns
+
+
+def get_df_from_columnar(batch: ColumnarBatch, level):
+    """
+    Same DataFrame as get_df_from_batch, built from the column arrays without going row by row
+    """
+    dtypes = _get_dtypes(level)
+    normalize = get_string_normalizer()
+    strings = get_string_columns(level)
+    n = len(batch)
+    data = {}
+    for name, column in batch.output_columns:
+        if column.kind == INT:
+            data[name] = pd.arrays.IntegerArray(
+                np.frombuffer(column.values, dtype=np.int64, count=n).copy(),
+                np.frombuffer(column.nulls, dtype=np.bool_, count=n).copy())
+        elif column.kind == BOOL:
+            data[name] = pd.arrays.BooleanArray(
+                np.frombuffer(column.values, dtype=np.bool_, count=n).copy(),
+                np.frombuffer(column.nulls, dtype=np.bool_, count=n).copy())
+        else:
+            values = column.to_list(n)
+            if normalize is not None and name in strings:
+                values = _normalize_column(values, normalize)
+            data[name] = pd.array(values, dtype='string' if dtypes.get(name) == 'string' else object)
+    return pd.DataFrame(data, columns=batch.column_names)
@@ -1,22 +1,30 @@
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 DATABASE = os.environ['DATABASE_NAME']
 
+import metrics
 from db.api import DBConnection
-from db.utils import get_df_from_batch
+from db.columnar import ColumnarBatch, FamilyBatch
+from db.loaders.sql_loader import insert_columns_to_sql
+from db.utils import get_df_from_batch, get_df_from_columnar, get_columns_from_columnar, get_columns_from_df, \
+    DETAILED_LAYOUT, LOAD_METHOD
 from db.tables import *
 
 if DATABASE == 'redshift':
-    from db.loaders.redshift_loader import transit_insert_to_redshift
+    from db.loaders.redshift_loader import transit_insert_to_redshift, stage_insert_to_redshift
 elif DATABASE == 'clickhouse':
-    from db.loaders.clickhouse_loader import insert_to_clickhouse
+    from db.loaders.clickhouse_loader import insert_to_clickhouse, insert_native_to_clickhouse
 elif DATABASE == 'pg':
-    from db.loaders.postgres_loader import insert_to_postgres
+    from db.loaders.postgres_loader import insert_to_postgres, copy_to_postgres
 elif DATABASE == 'bigquery':
     from db.loaders.bigquery_loader import insert_to_bigquery
     from bigquery_utils.create_table import create_tables_bigquery
 elif DATABASE == 'snowflake':
     from db.loaders.snowflake_loader import insert_to_snowflake
+elif DATABASE == 'parquet':
+    pass
 else:
     raise Exception(f"{DATABASE}-database not supported")
 
@@ -33,7 +41,10 @@ try:
         create_tables_bigquery()
     if DATABASE == 'redshift':
         create_tables_redshift(db)
-    db.engine.dispose()
+    if DETAILED_LAYOUT == 'families' and DATABASE in ('pg', 'clickhouse', 'snowflake', 'redshift'):
+        create_family_tables(db)
+    if hasattr(db, 'engine'):
+        db.engine.dispose()
     db = None
 except Exception as e:
     print(repr(e))
@@ -41,11 +52,93 @@ except Exception as e:
           f"'/sql/{DATABASE}_sessions.sql' and '/sql/{DATABASE}_events.sql'")
 
 
-def insert_batch(db: DBConnection, batch, table, level='normal'):
+# family batches of a detailed batch are written concurrently
+family_pool = ThreadPoolExecutor(max_workers=int(os.environ.get('family_writers', 4)),
+                                 thread_name_prefix='family-writer')
+
+
+def insert_families(db: DBConnection, batch: FamilyBatch, table, level, projects=None, dead_letters=None):
+    """
+    Write every family of a batch to its own table, `table`_`family`
+    """
+    futures = [family_pool.submit(insert_batch, db, family_batch, f"{table}_{family}", level, projects, dead_letters)
+               for family, family_batch in batch.batches.items() if len(family_batch)]
+    for f in futures:
+        f.result()
+
+
+def insert_batch(db: DBConnection, batch, table, level='normal', projects=None, dead_letters=None):
+    """
+    :param projects: session id -> project id of the sessions in an events batch,
+        only file sinks use it to partition their output
+    :param dead_letters: DeadLetterQueue retrying the batch and isolating the rows it is rejected for
+    """
     if len(batch) == 0:
         return
-    df = get_df_from_batch(batch, level=level)
 
+    if isinstance(batch, FamilyBatch):
+        insert_families(db, batch, table, level, projects, dead_letters)
+        return
+
+    if dead_letters is not None:
+        dead_letters.write(lambda b: write_batch(db, b, table, level, projects), batch, table)
+    else:
+        write_batch(db, batch, table, level, projects)
+
+
+def write_batch(db: DBConnection, batch, table, level='normal', projects=None):
+    start = time.perf_counter()
+    try:
+        data = build_batch(db, batch, level)
+        built = time.perf_counter()
+        metrics.build_seconds.observe(built - start, table=table)
+        sink_batch(db, data, batch, table, level, projects)
+    except Exception:
+        metrics.write_failures.inc(table=table)
+        raise
+    metrics.sink_seconds.observe(time.perf_counter() - built, table=table)
+    metrics.rows_written.inc(len(batch), table=table)
+
+
+def build_batch(db: DBConnection, batch, level):
+    """
+    Column name -> values for the loaders that take columns, a DataFrame for the others
+    """
+    takes_columns = db.config == 'parquet' or (LOAD_METHOD == 'bulk' and db.config in ('pg', 'clickhouse', 'redshift'))
+    if isinstance(batch, ColumnarBatch):
+        # databases reached through SQLAlchemy take the columns as they are
+        if takes_columns or db.config in ('pg', 'clickhouse', 'snowflake'):
+            return get_columns_from_columnar(batch, level=level)
+        return get_df_from_columnar(batch, level=level)
+    if takes_columns:
+        return get_columns_from_df(get_df_from_batch(batch, level=level))
+    return get_df_from_batch(batch, level=level)
+
+
+def sink_batch(db: DBConnection, data, batch, table, level, projects=None):
+    if db.config == 'parquet':
+        if level == 'sessions':
+            projects = {s.sessionid: s.project_id for s in batch}
+            time_column = 'session_start_timestamp'
+        else:
+            time_column = 'received_at'
+        db.sink.write(table, data, projects or {}, time_column)
+        return
+
+    if LOAD_METHOD == 'bulk' and db.config in ('pg', 'clickhouse', 'redshift'):
+        if db.config == 'pg':
+            copy_to_postgres(db=db, columns=data, table=table)
+        elif db.config == 'clickhouse':
+            insert_native_to_clickhouse(db=db, columns=data, table=table)
+        else:
+            stage_insert_to_redshift(db=db, columns=data, table=table)
+        return
+
+    if isinstance(data, dict):
+        insert_columns_to_sql(db=db, columns=data, table=table)
+        return
+
+    df = data
     if db.config == 'redshift':
         transit_insert_to_redshift(db=db, df=df, table=table)
         return
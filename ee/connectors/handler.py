@@ -4,9 +4,9 @@ from db.models import Event, DetailedEvent, Session
 from msgcodec.messages import *
 
 
-def handle_normal_message(message: Message) -> Optional[Event]:
-
-    n = Event()
+def handle_normal_message(message: Message, n=None) -> Optional[Event]:
+    if n is None:
+        n = Event()
 
     if isinstance(message, ConnectionInformation):
         n.connectioninformation_downlink = message.downlink
@@ -243,9 +243,12 @@ def handle_session(n: Session, message: Message) -> Optional[Session]:
             n.issues = [message.type]
         return n
 
+    return n
+
 
-def handle_message(message: Message) -> Optional[DetailedEvent]:
-    n = DetailedEvent()
+def handle_message(message: Message, n=None) -> Optional[DetailedEvent]:
+    if n is None:
+        n = DetailedEvent()
 
     if isinstance(message, SessionEnd):
         n.sessionend = True
@@ -527,13 +530,13 @@ def handle_message(message: Message) -> Optional[DetailedEvent]:
         return n
 
     if isinstance(message, LongTask):
-        n.longtasks_timestamp = message.timestamp
-        n.longtasks_duration = message.duration
+        n.longtask_timestamp = message.timestamp
+        n.longtask_duration = message.duration
         n.longtask_context = message.context
         n.longtask_containertype = message.container_type
-        n.longtasks_containersrc = message.container_src
-        n.longtasks_containerid = message.container_id
-        n.longtasks_containername = message.container_name
+        n.longtask_containersrc = message.container_src
+        n.longtask_containerid = message.container_id
+        n.longtask_containername = message.container_name
         return n
 
     if isinstance(message, SetNodeURLBasedAttribute):
@@ -645,3 +648,39 @@ def handle_message(message: Message) -> Optional[DetailedEvent]:
         n.iosperformanceaggregated_maxbattery = message.max_battery
         return n
     return None
+
+
+# Message types the handlers above make use of.
+# Anything else can be skipped before it is decoded.
+NORMAL_MESSAGE_TYPES = (
+    ConnectionInformation, ConsoleLog, CustomEvent, ErrorEvent, JSException, Metadata, MouseClick,
+    PageEvent, PageRenderTiming, RawCustomEvent, SetViewportSize, Timestamp, UserAnonymousID, UserID,
+    IssueEvent, CustomIssue,
+)
+
+SESSION_MESSAGE_TYPES = (
+    SessionStart, SessionEnd, ConnectionInformation, Metadata, PageEvent, PerformanceTrackAggr, UserID,
+    UserAnonymousID, JSException, LongTask, InputEvent, MouseClick, IssueEvent,
+)
+
+DETAILED_MESSAGE_TYPES = (
+    SessionEnd, Timestamp, SessionDisconnect, SessionStart, SetViewportSize, SetViewportScroll,
+    SetNodeScroll, ConsoleLog, PageLoadTiming, PageRenderTiming, ResourceTiming, JSException,
+    RawErrorEvent, RawCustomEvent, UserID, UserAnonymousID, Metadata, PerformanceTrack,
+    PerformanceTrackAggr, ConnectionInformation, PageEvent, InputEvent, ClickEvent, ErrorEvent,
+    ResourceEvent, CustomEvent, Fetch, Profiler, GraphQL, GraphQLEvent, DomDrop, MouseClick,
+    SetPageLocation, MouseMove, LongTask, SetNodeURLBasedAttribute, SetStyleData, IssueEvent,
+    TechnicalInfo, CustomIssue, PageClose, IOSSessionStart, IOSSessionEnd, IOSMetadata, IOSUserID,
+    IOSUserAnonymousID, IOSScreenLeave, IOSLog, IOSInternalError, IOSPerformanceAggregated,
+)
+
+
+def get_message_ids(level: str) -> set:
+    """
+    Ids of the messages needed to build events of the given level and sessions
+    """
+    if level == 'detailed':
+        types = DETAILED_MESSAGE_TYPES + SESSION_MESSAGE_TYPES
+    else:
+        types = NORMAL_MESSAGE_TYPES + SESSION_MESSAGE_TYPES
+    return {t.__id__ for t in types}
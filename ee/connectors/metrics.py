@@ -0,0 +1,180 @@
+"""
+Counters, gauges and histograms of the connector, served in the Prometheus
+text format on http://<host>:<metrics_port>/metrics.
+
+Metrics are kept in the process that updates them. Under the supervisor every
+worker serves its own on metrics_port + worker id, with a `worker` label, and
+Prometheus scrapes each of them.
+"""
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# seconds, from a small batch decode to a slow warehouse load
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)] + list(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels[n] for n in self.label_names)
+
+    def render(self, const_labels=()) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = [(key, self._copy(value)) for key, value in self._values.items()]
+        for key, value in items:
+            lines.extend(self._render_value(key, value, const_labels))
+        return lines
+
+    def _copy(self, value):
+        return value
+
+    def _render_value(self, key, value, const_labels) -> list:
+        return [f"{self.name}{_format_labels(self.label_names, key, const_labels)} {value}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            h = self._values.get(key)
+            if h is None:
+                # per bucket counts (the last one is +Inf), sum
+                h = self._values[key] = [[0] * (len(self.buckets) + 1), 0]
+            h[0][i] += 1
+            h[1] += value
+
+    def _copy(self, value):
+        # observe() keeps changing the bucket counts after the lock is released
+        counts, total = value
+        return list(counts), total
+
+    def _render_value(self, key, value, const_labels) -> list:
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += count
+            labels = _format_labels(self.label_names, key, list(const_labels) + [f'le="{bound}"'])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.label_names, key, const_labels)
+        lines.append(f"{self.name}_sum{labels} {total}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics = []
+        self.const_labels = ()
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for m in self._metrics:
+            lines.extend(m.render(self.const_labels))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+decoded_messages = registry.register(Counter(
+    'connector_decoded_messages_total', 'Messages decoded, by message type', labels=('type',)))
+skipped_messages = registry.register(Counter(
+    'connector_skipped_messages_total', 'Kafka records skipped before decoding, of a message type not used'))
+failed_messages = registry.register(Counter(
+    'connector_undecodable_messages_total', 'Kafka records that could not be decoded'))
+decode_seconds = registry.register(Histogram(
+    'connector_decode_seconds', 'Time to decode a poll of Kafka records'))
+build_seconds = registry.register(Histogram(
+    'connector_batch_build_seconds', 'Time to turn a batch into columns or a DataFrame', labels=('table',)))
+sink_seconds = registry.register(Histogram(
+    'connector_sink_write_seconds', 'Time to write a built batch to the database', labels=('table',)))
+rows_written = registry.register(Counter(
+    'connector_rows_written_total', 'Rows written to the database', labels=('table',)))
+write_failures = registry.register(Counter(
+    'connector_write_failures_total', 'Batch writes that raised', labels=('table',)))
+dead_rows = registry.register(Counter(
+    'connector_dead_letter_rows_total', 'Rows sent to the dead letter queue', labels=('table',)))
+consumer_lag = registry.register(Gauge(
+    'connector_consumer_lag', 'Records between the consumer position and the end of the partition',
+    labels=('topic', 'partition')))
+sessions_cached = registry.register(Gauge(
+    'connector_sessions_cached', 'Live sessions in the session cache'))
+writes_pending = registry.register(Gauge(
+    'connector_writes_pending', 'Batch writes queued or running'))
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # scraped every few seconds, not worth a line each time
+        pass
+
+
+def serve(port: int, host: str = '0.0.0.0', worker_id=None) -> ThreadingHTTPServer:
+    """
+    Serve the registry from a daemon thread
+    """
+    if worker_id is not None:
+        registry.const_labels = (f'worker="{worker_id}"',)
+        port += worker_id
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    print(f"Serving metrics on {host}:{port}/metrics")
+    return server
@@ -0,0 +1,82 @@
+"""
+Decoder microbenchmark: table driven MessageCodec against LegacyMessageCodec.
+
+    python -m msgcodec.benchmark [corpus files...] [-n N] [--repeat R] [--keep ID,ID,...]
+
+Without corpus files a synthetic DOM-heavy corpus is generated.
+Corpus files are in the `msgcodec.corpus` format.
+"""
+import argparse
+import time
+from collections import Counter
+
+from msgcodec.codec import MessageCodec
+from msgcodec.corpus import read_records, synthetic_records
+from msgcodec.legacy import LegacyMessageCodec
+
+
+def check_parity(values, codec, reference) -> int:
+    mismatches = 0
+    for v in values:
+        a, b = codec.decode(v), reference.decode(v)
+        if type(a) != type(b) or (a is not None and a.__dict__ != b.__dict__):
+            mismatches += 1
+    return mismatches
+
+
+def time_decode(codec, values, repeat: int) -> float:
+    decode = codec.decode
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for v in values:
+            decode(v)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus', nargs='*', help='recorded corpus files')
+    parser.add_argument('-n', type=int, default=200000, help='synthetic corpus size')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--keep', help='comma separated message ids, also time decode_batch skipping the rest')
+    args = parser.parse_args()
+
+    if args.corpus:
+        values = [v for path in args.corpus for _, v in read_records(path)]
+    else:
+        values = [v for _, v in synthetic_records(args.n)]
+
+    codec = MessageCodec()
+    legacy = LegacyMessageCodec()
+    ids = Counter(MessageCodec.check_message_id(v) for v in values)
+    print(f"{len(values)} messages, {sum(len(v) for v in values)} bytes, {len(ids)} message types")
+
+    mismatches = check_parity(values, codec, legacy)
+    if mismatches:
+        print(f"WARNING: {mismatches} messages decode differently")
+
+    results = {}
+    for name, c in (('legacy', legacy), ('table', codec)):
+        elapsed = time_decode(c, values, args.repeat)
+        results[name] = elapsed
+        print(f"{name:>8}: {elapsed:.3f}s  {len(values) / elapsed:,.0f} msg/s")
+    print(f" speedup: {results['legacy'] / results['table']:.2f}x")
+
+    if args.keep:
+        message_ids = {int(i) for i in args.keep.split(',')}
+        keys = [b''] * len(values)
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            codec.decode_batch(values, keys, message_ids=message_ids)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        kept = sum(n for i, n in ids.items() if i in message_ids)
+        print(f"filtered: {best:.3f}s  {len(values) / best:,.0f} msg/s  ({kept} of {len(values)} decoded)")
+
+
+if __name__ == '__main__':
+    main()
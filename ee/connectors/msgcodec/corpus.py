@@ -0,0 +1,81 @@
+"""
+Recorded Kafka records on disk.
+
+A corpus file is a plain sequence of records, each stored as
+<key length: uint32 LE><key bytes><value length: uint32 LE><value bytes>
+"""
+import random
+import struct
+from typing import Iterable, Iterator, Tuple
+
+from msgcodec.codec import MessageCodec
+from msgcodec.spec import MESSAGE_SPECS
+
+_LENGTH = struct.Struct('<I')
+
+
+def write_records(path, records: Iterable[Tuple[bytes, bytes]]) -> int:
+    n = 0
+    with open(path, 'wb') as f:
+        for key, value in records:
+            f.write(_LENGTH.pack(len(key)))
+            f.write(key)
+            f.write(_LENGTH.pack(len(value)))
+            f.write(value)
+            n += 1
+    return n
+
+
+def read_records(path) -> Iterator[Tuple[bytes, bytes]]:
+    with open(path, 'rb') as f:
+        data = f.read()
+    pos = 0
+    end = len(data)
+    while pos < end:
+        (key_length,) = _LENGTH.unpack_from(data, pos)
+        pos += 4
+        key = data[pos:pos + key_length]
+        pos += key_length
+        (value_length,) = _LENGTH.unpack_from(data, pos)
+        pos += 4
+        yield key, data[pos:pos + value_length]
+        pos += value_length
+
+
+# Rough shape of production traffic: DOM mutations and mouse moves dominate
+DEFAULT_WEIGHTS = {8: 20, 9: 10, 10: 5, 11: 10, 12: 20, 13: 3, 14: 10, 15: 2, 16: 2,
+                   20: 15, 37: 5, 38: 1, 21: 2, 22: 2, 53: 3, 31: 1, 35: 3, 32: 1,
+                   33: 1, 49: 1, 56: 1, 39: 1, 1: 1, 3: 1}
+
+
+def random_message(message_id: int, rnd: random.Random):
+    spec = MESSAGE_SPECS[message_id]
+    values = []
+    for t in spec.types:
+        if t == 's':
+            values.append(''.join(rnd.choice('abcdefghijklmnopqrstuvwxyz/.-_ ')
+                                  for _ in range(rnd.randint(0, 80))))
+        elif t == 'i':
+            values.append(rnd.randint(-100000, 100000))
+        elif t == 'b':
+            values.append(rnd.random() < 0.5)
+        elif t == 't':
+            values.append(rnd.randint(1600000000000, 1700000000000))
+        else:
+            values.append(rnd.choice((rnd.randint(0, 127), rnd.randint(0, 1 << 20), rnd.randint(0, 1 << 42))))
+    return spec.cls(*values)
+
+
+def synthetic_records(n: int, weights: dict = None, n_sessions: int = 100, seed: int = 0):
+    """
+    Generate `n` encoded (key, value) records with the given message id weights
+    """
+    weights = weights or DEFAULT_WEIGHTS
+    rnd = random.Random(seed)
+    codec = MessageCodec()
+    ids = list(weights)
+    cum_weights = list(weights.values())
+    session_ids = [rnd.randint(1, 1 << 62) for _ in range(n_sessions)]
+    for message_id in rnd.choices(ids, weights=cum_weights, k=n):
+        key = rnd.choice(session_ids).to_bytes(8, 'little')
+        yield key, codec.encode(random_message(message_id, rnd))
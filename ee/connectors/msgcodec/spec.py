@@ -0,0 +1,125 @@
+"""
+Wire layout of every message, keyed by message id.
+
+Field names and their order are taken from the constructors in
+`msgcodec.messages`; only the wire type of each field is declared here,
+one character per field:
+
+    u - unsigned varint
+    i - zig-zag encoded signed varint
+    s - varint length followed by utf-8 bytes
+    b - single byte boolean
+    t - unsigned varint timestamp, decoded as None when out of range
+"""
+import inspect
+from collections import namedtuple
+
+from msgcodec.messages import *
+
+UINT = 'u'
+INT = 'i'
+STRING = 's'
+BOOLEAN = 'b'
+TIMESTAMP = 't'
+
+# Timestamps above this value are garbage sent by old trackers
+MAX_TIMESTAMP = 9999999999999
+
+MessageSpec = namedtuple('MessageSpec', ['message_id', 'cls', 'fields', 'types'])
+
+FIELD_TYPES = {
+    Timestamp: 'u',
+    SessionStart: 'uussssssssssuus',
+    SessionDisconnect: 'u',
+    SessionEnd: 'u',
+    SetPageLocation: 'ssu',
+    SetViewportSize: 'uu',
+    SetViewportScroll: 'ii',
+    CreateDocument: '',
+    CreateElementNode: 'uuusb',
+    CreateTextNode: 'uuu',
+    MoveNode: 'uuu',
+    RemoveNode: 'u',
+    SetNodeAttribute: 'uss',
+    RemoveNodeAttribute: 'us',
+    SetNodeData: 'us',
+    SetCSSData: 'us',
+    SetNodeScroll: 'uii',
+    SetInputTarget: 'us',
+    SetInputValue: 'usi',
+    SetInputChecked: 'ub',
+    MouseMove: 'uu',
+    MouseClick: 'uus',
+    ConsoleLog: 'ss',
+    PageLoadTiming: 'uuuuuuuuu',
+    PageRenderTiming: 'uuu',
+    JSException: 'sss',
+    RawErrorEvent: 'ussss',
+    RawCustomEvent: 'ss',
+    UserID: 's',
+    UserAnonymousID: 's',
+    Metadata: 'ss',
+    PageEvent: 'uussbuuuuuuuuuuuu',
+    InputEvent: 'uusbs',
+    ClickEvent: 'uuus',
+    ErrorEvent: 'uussss',
+    ResourceEvent: 'utuuuuussbsu',
+    CustomEvent: 'uuss',
+    CSSInsertRule: 'usu',
+    CSSDeleteRule: 'uu',
+    Fetch: 'ssssuuu',
+    Profiler: 'suss',
+    OTable: 'ss',
+    StateAction: 's',
+    StateActionEvent: 'uus',
+    Redux: 'ssu',
+    Vuex: 'ss',
+    MobX: 'ss',
+    NgRx: 'ssu',
+    GraphQL: 'ssss',
+    PerformanceTrack: 'iiuu',
+    GraphQLEvent: 'uus',
+    DomDrop: 'u',
+    ResourceTiming: 'uuuuuuss',
+    ConnectionInformation: 'us',
+    SetPageVisibility: 'b',
+    PerformanceTrackAggr: 'uuuuuuuuuuuuuu',
+    LongTask: 'uuuusss',
+    SetNodeURLBasedAttribute: 'usss',
+    SetStyleData: 'uss',
+    IssueEvent: 'uussss',
+    TechnicalInfo: 'ss',
+    CustomIssue: 'ss',
+    PageClose: '',
+    IOSSessionStart: 'uussssssss',
+    IOSSessionEnd: 'u',
+    IOSMetadata: 'uuss',
+    IOSUserID: 'uus',
+    IOSUserAnonymousID: 'uus',
+    IOSScreenLeave: 'uuss',
+    IOSLog: 'uuss',
+    IOSInternalError: 'uus',
+    IOSPerformanceAggregated: 'uuuuuuuuuuuuuu',
+}
+
+
+def get_fields(cls) -> tuple:
+    """
+    Constructor argument names of a message class, in wire order
+    """
+    if '__init__' not in cls.__dict__:
+        return ()
+    return tuple(list(inspect.signature(cls.__init__).parameters)[1:])
+
+
+def build_specs() -> dict:
+    specs = {}
+    for cls, types in FIELD_TYPES.items():
+        fields = get_fields(cls)
+        if len(fields) != len(types):
+            raise ValueError(f"{cls.__name__}: {len(fields)} fields but {len(types)} wire types")
+        specs[cls.__id__] = MessageSpec(message_id=cls.__id__, cls=cls, fields=fields, types=types)
+    return specs
+
+
+MESSAGE_SPECS = build_specs()
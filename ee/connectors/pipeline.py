@@ -0,0 +1,191 @@
+"""
+Turns decoded messages into event and session batches and hands them to a writer.
+
+Batches are flushed by a FlushPolicy (rows, bytes, age). Every flush carries
+per-partition offset watermarks: for each partition, the lowest offset whose
+data is not written yet, i.e. not past the first message of any session
+still being built or waiting in a batch, or of any event in the current batch.
+Committing those offsets after the flush never skips unwritten data.
+"""
+import time
+
+from msgcodec.messages import SessionEnd, SessionStart, IOSSessionStart
+from db.utils import get_columnar_batch, DETAILED_LAYOUT
+from handler import handle_message, handle_normal_message, handle_session
+from session_store import SessionStore
+
+
+class FlushPolicy:
+    """
+    A batch is flushed when it reaches max_rows, max_bytes of raw messages,
+    or when its first row is older than max_age_ms. None disables a limit.
+    """
+
+    def __init__(self, max_rows: int = None, max_bytes: int = None, max_age_ms: int = None):
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_age_ms = max_age_ms
+
+    def is_full(self, rows: int, n_bytes: int) -> bool:
+        return (self.max_rows is not None and rows >= self.max_rows) or \
+               (self.max_bytes is not None and n_bytes >= self.max_bytes)
+
+    def is_due(self, rows: int, started_at: float) -> bool:
+        return rows > 0 and self.max_age_ms is not None and \
+               (time.monotonic() - started_at) * 1000 >= self.max_age_ms
+
+
+class Pipeline:
+
+    def __init__(self, level, writer, insert_events, insert_sessions,
+                 events_policy: FlushPolicy, sessions_policy: FlushPolicy, batch_format='columnar',
+                 session_idle_timeout_s: float = 1800, max_sessions: int = 100000,
+                 ended_session_ttl_s: float = 1800):
+        """
+        :param writer: AsyncWriter the flushed batches are submitted to
+        :param insert_events: called by the writer with a batch of events and the
+            session id -> project id of its sessions, where known
+        :param insert_sessions: called by the writer with a list of finished or evicted sessions
+        """
+        self.level = level
+        self.writer = writer
+        self.insert_events = insert_events
+        self.insert_sessions = insert_sessions
+        self.events_policy = events_policy
+        self.sessions_policy = sessions_policy
+        self.batch_format = batch_format
+        if level == 'detailed' and DETAILED_LAYOUT == 'families' and batch_format != 'columnar':
+            raise ValueError("detailed_layout=families needs batch_format=columnar")
+        if level == 'detailed':
+            self.handle_event = handle_message
+        else:
+            self.handle_event = handle_normal_message
+
+        self.sessions = SessionStore(self._add_session, idle_timeout_s=session_idle_timeout_s,
+                                     max_sessions=max_sessions, ended_ttl_s=ended_session_ttl_s)
+        # partition -> offset after the last processed message
+        self.processed_offsets = {}
+
+        self._new_events_batch()
+        self._new_sessions_batch()
+
+    def _new_events_batch(self):
+        capacity = self.events_policy.max_rows or 4000
+        if self.batch_format == 'columnar':
+            self.batch = get_columnar_batch(self.level, capacity=capacity)
+        else:
+            self.batch = []
+        self.batch_bytes = 0
+        self.batch_started_at = time.monotonic()
+        # partition -> offset of the first message in the batch
+        self.batch_offsets = {}
+        self.batch_projects = {}
+
+    def _new_sessions_batch(self):
+        self.sessions_batch = []
+        self.sessions_batch_bytes = 0
+        self.sessions_batch_started_at = time.monotonic()
+
+    def process(self, messages, session_ids, positions, sizes, received_at: int):
+        """
+        Process one poll worth of decoded messages.
+        `positions` are (partition, offset) pairs and `sizes` the raw message sizes,
+        both parallel to `messages`; None messages were skipped.
+        """
+        batch_format = self.batch_format
+        handle_event = self.handle_event
+        sessions = self.sessions
+        processed_offsets = self.processed_offsets
+        now = time.monotonic()
+
+        for message, session_id, (tp, offset), size in zip(messages, session_ids, positions, sizes):
+            processed_offsets[tp] = offset + 1
+            if message is None:
+                continue
+
+            if batch_format == 'columnar':
+                n = handle_event(message, self.batch.row())
+            else:
+                n = handle_event(message)
+
+            session = sessions.touch(session_id, tp, offset, now)
+            if session is not None:
+                handle_session(session, message)
+                if isinstance(message, (SessionStart, IOSSessionStart)):
+                    session.project_id = message.project_id
+                project_id = session.project_id
+
+                # put in a batch for insertion if received a SessionEnd
+                if isinstance(message, SessionEnd) and not session.ended:
+                    session.ended = True
+                    self._add_session(session, size)
+            else:
+                # late message of a session already written, only its event is kept
+                project_id = sessions.get_ended_project_id(session_id)
+
+            if n:
+                if not self.batch:
+                    self.batch_started_at = time.monotonic()
+                if tp not in self.batch_offsets:
+                    self.batch_offsets[tp] = offset
+                if project_id is not None:
+                    self.batch_projects[session_id] = project_id
+                n.sessionid = session_id
+                n.received_at = received_at
+                n.batch_order_number = len(self.batch)
+                self.batch.append(n)
+                self.batch_bytes += size
+                if self.events_policy.is_full(len(self.batch), self.batch_bytes):
+                    self.flush_events()
+
+    def _add_session(self, session, size: int = 0):
+        if not self.sessions_batch:
+            self.sessions_batch_started_at = time.monotonic()
+        self.sessions_batch.append(session)
+        self.sessions_batch_bytes += size
+        if self.sessions_policy.is_full(len(self.sessions_batch), self.sessions_batch_bytes):
+            self.flush_sessions()
+
+    def flush_due(self):
+        """
+        Evict idle sessions and flush the batches that are older than their policy allows
+        """
+        self.sessions.evict_idle(time.monotonic())
+        if self.sessions_policy.is_due(len(self.sessions_batch), self.sessions_batch_started_at):
+            self.flush_sessions()
+        if self.events_policy.is_due(len(self.batch), self.batch_started_at):
+            self.flush_events()
+
+    def flush(self):
+        self.flush_sessions()
+        self.flush_events()
+
+    def flush_events(self):
+        batch = self.batch
+        projects = self.batch_projects
+        self._new_events_batch()
+        if len(batch):
+            self.writer.submit(self.insert_events, batch, projects, offsets=self.watermarks())
+
+    def flush_sessions(self):
+        sessions_batch = self.sessions_batch
+        self._new_sessions_batch()
+        for s in sessions_batch:
+            self.sessions.discard(s)
+        if sessions_batch:
+            self.writer.submit(self.insert_sessions, sessions_batch, offsets=self.watermarks())
+
+    def watermarks(self) -> dict:
+        """
+        Per partition offsets up to which everything processed is in a flushed batch
+        """
+        watermarks = dict(self.processed_offsets)
+        pending = [s.offsets for s in self.sessions.values()]
+        # evicted sessions are out of the store, waiting for the next flush
+        pending.extend(s.offsets for s in self.sessions_batch)
+        pending.append(self.batch_offsets)
+        for offsets in pending:
+            for tp, offset in offsets.items():
+                if offset < watermarks[tp]:
+                    watermarks[tp] = offset
+        return watermarks
@@ -0,0 +1,200 @@
+"""
+Replays recorded Kafka records through the connector pipeline, without Kafka
+or a warehouse, and reports where the time goes.
+
+    python replay.py [corpus files...] [-n N] [--level normal|detailed]
+                     [--format columnar|dataframe] [--sink null|sqlite|pg] [--sqlite-path PATH]
+
+Corpus files are in the `msgcodec.corpus` format. Without any, a synthetic
+corpus of N records is generated. Records are decoded with
+MessageCodec.decode_batch, turned into events and sessions by the same
+Pipeline the consumer runs, made into DataFrames by get_df_from_batch
+(get_df_from_columnar for columnar batches) and handed to the sink:
+
+    null     drops the DataFrames, measures everything up to the sink
+    sqlite   appends them to a local SQLite file with DataFrame.to_sql
+    pg       COPY into the Postgres of the usual connector env (DATABASE_NAME=pg, address, ...)
+
+With detailed_layout=families, detailed events go to one table per message family.
+
+Writes are done synchronously, so each stage is timed on its own.
+"""
+import argparse
+import os
+import sqlite3
+import time
+from collections import defaultdict
+
+os.environ.setdefault('DATABASE_NAME', 'pg')
+os.environ.setdefault('sessions_table', 'connector_user_sessions')
+os.environ.setdefault('events_table_name', 'connector_events')
+os.environ.setdefault('events_detailed_table_name', 'connector_events_detailed')
+
+from msgcodec.codec import MessageCodec
+from msgcodec.corpus import read_records, synthetic_records
+from db.columnar import ColumnarBatch, FamilyBatch
+from db.models import events_table_name, events_detailed_table_name, sessions_table_name
+from db.utils import get_df_from_batch, get_df_from_columnar
+from handler import get_message_ids
+from pipeline import Pipeline, FlushPolicy
+
+REPLAY_TOPIC = 'replay'
+
+
+class NullSink:
+
+    def write(self, df, table):
+        pass
+
+
+class SQLiteSink:
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+
+    def write(self, df, table):
+        # SQLite has no array type, lists are stored as their text
+        for name in df.columns:
+            if df[name].dtype == object:
+                df[name] = df[name].map(lambda v: str(v) if isinstance(v, list) else v)
+        df.to_sql(table, self.conn, if_exists='append', index=False)
+        self.conn.commit()
+
+
+class PostgresSink:
+
+    def __init__(self):
+        from db.api import DBConnection
+        from db.tables import create_tables_postgres
+        self.db = DBConnection('pg')
+        create_tables_postgres(self.db)
+
+    def write(self, df, table):
+        from db.loaders.postgres_loader import copy_to_postgres
+        from db.utils import get_columns_from_df
+        copy_to_postgres(self.db, get_columns_from_df(df), table)
+
+
+class SyncWriter:
+    """
+    Stands in for AsyncWriter: runs every write as soon as it is submitted
+    """
+
+    def __init__(self):
+        self.write_time = 0
+
+    def submit(self, write, *args, offsets=None):
+        start = time.perf_counter()
+        write(*args)
+        self.write_time += time.perf_counter() - start
+
+
+class Replay:
+
+    def __init__(self, level, sink, batch_format='columnar', batch_size=4000):
+        self.level = level
+        self.sink = sink
+        self.table = events_detailed_table_name if level == 'detailed' else events_table_name
+        self.timings = defaultdict(float)
+        self.rows = defaultdict(int)
+        self.writer = SyncWriter()
+        self.pipeline = Pipeline(level, self.writer, self.insert_events, self.insert_sessions,
+                                 events_policy=FlushPolicy(max_rows=batch_size),
+                                 sessions_policy=FlushPolicy(max_rows=batch_size // 10),
+                                 batch_format=batch_format)
+
+    def _write(self, df, table):
+        start = time.perf_counter()
+        self.sink.write(df, table)
+        self.timings['sink'] += time.perf_counter() - start
+        self.rows[table] += len(df)
+
+    def insert_events(self, batch, projects=None, table=None):
+        if isinstance(batch, FamilyBatch):
+            for family, family_batch in batch.batches.items():
+                if len(family_batch):
+                    self.insert_events(family_batch, table=f"{self.table}_{family}")
+            return
+        start = time.perf_counter()
+        if isinstance(batch, ColumnarBatch):
+            df = get_df_from_columnar(batch, level=self.level)
+        else:
+            df = get_df_from_batch(batch, level=self.level)
+        self.timings['build'] += time.perf_counter() - start
+        self._write(df, table or self.table)
+
+    def insert_sessions(self, sessions):
+        start = time.perf_counter()
+        df = get_df_from_batch(sessions, level='sessions')
+        self.timings['build'] += time.perf_counter() - start
+        self._write(df, sessions_table_name)
+
+    def run(self, records, poll_size=500):
+        codec = MessageCodec()
+        message_ids = get_message_ids(self.level)
+        pipeline = self.pipeline
+        n = 0
+        start = time.perf_counter()
+        for i in range(0, len(records), poll_size):
+            poll = records[i:i + poll_size]
+            keys = [k for k, _ in poll]
+            values = [v for _, v in poll]
+
+            t = time.perf_counter()
+            messages, session_ids = codec.decode_batch(values, keys, message_ids=message_ids)
+            self.timings['decode'] += time.perf_counter() - t
+
+            positions = [(REPLAY_TOPIC, offset) for offset in range(i, i + len(poll))]
+            sizes = [len(v) for v in values]
+            t = time.perf_counter()
+            written = self.writer.write_time
+            pipeline.process(messages, session_ids, positions, sizes, received_at=int(time.time() * 1000))
+            # batches filled up during process are written inline, that time belongs to build and sink
+            self.timings['handle'] += time.perf_counter() - t - (self.writer.write_time - written)
+            n += len(poll)
+
+        pipeline.flush()
+        self.timings['total'] = time.perf_counter() - start
+        return n, codec
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus', nargs='*', help='recorded corpus files')
+    parser.add_argument('-n', type=int, default=100000, help='synthetic corpus size')
+    parser.add_argument('--level', default='normal', choices=('normal', 'detailed'))
+    parser.add_argument('--format', default='columnar', choices=('columnar', 'dataframe'))
+    parser.add_argument('--sink', default='null', choices=('null', 'sqlite', 'pg'))
+    parser.add_argument('--sqlite-path', default='replay.sqlite')
+    parser.add_argument('--batch', type=int, default=4000, help='events per batch')
+    args = parser.parse_args()
+
+    if args.corpus:
+        records = [r for path in args.corpus for r in read_records(path)]
+    else:
+        records = list(synthetic_records(args.n))
+
+    if args.sink == 'sqlite':
+        sink = SQLiteSink(args.sqlite_path)
+    elif args.sink == 'pg':
+        sink = PostgresSink()
+    else:
+        sink = NullSink()
+
+    replay = Replay(args.level, sink, batch_format=args.format, batch_size=args.batch)
+    n, codec = replay.run(records)
+
+    timings = replay.timings
+    total = timings['total']
+    print(f"{n} records, {sum(len(v) for _, v in records)} bytes, "
+          f"decoded: {codec.n_decoded}, skipped: {codec.n_skipped}")
+    for stage in ('decode', 'handle', 'build', 'sink'):
+        print(f"{stage:>8}: {timings[stage]:.3f}s  {timings[stage] / total:6.1%}  "
+              f"{n / max(timings[stage], 1e-9):,.0f} msg/s")
+    print(f"{'total':>8}: {total:.3f}s  {n / total:,.0f} msg/s")
+    for table, rows in replay.rows.items():
+        print(f"{table}: {rows} rows")
+
+
+if __name__ == '__main__':
+    main()
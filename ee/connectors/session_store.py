@@ -0,0 +1,146 @@
+"""
+In-flight session state of the connector.
+
+Sessions are kept from their first message until they are flushed. A session
+that stops sending messages without a SessionEnd is evicted after an idle
+timeout, and the least recently seen sessions are evicted when the store is
+full. Evicted sessions are handed to `on_evict` so they are written as they
+are instead of being lost.
+
+Messages keep coming after a SessionEnd: retries, other partitions. The ids
+of the sessions flushed after their SessionEnd are remembered for
+ended_ttl_s, and their late messages don't start a second, partial row.
+"""
+import time
+from collections import OrderedDict
+
+from db.models import Session
+
+SESSION_FIELDS = tuple(c for c in Session.__dict__ if not c.startswith('_'))
+
+
+class SessionState:
+    """
+    Session row being built, with the same attributes as the Session model
+    """
+    __slots__ = SESSION_FIELDS + ('project_id', 'last_seen', 'offsets', 'ended')
+
+    def __init__(self, sessionid: int):
+        for field in SESSION_FIELDS:
+            setattr(self, field, None)
+        self.sessionid = sessionid
+        # not a column of the sessions table, known once SessionStart is seen
+        self.project_id = None
+        self.last_seen = 0
+        # partition -> offset of the first message of the session
+        self.offsets = {}
+        self.ended = False
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in SESSION_FIELDS}
+
+
+class SessionStore:
+
+    def __init__(self, on_evict, idle_timeout_s: float = 1800, max_sessions: int = 100000,
+                 ended_ttl_s: float = 1800):
+        """
+        :param ended_ttl_s: time the late messages of an ended session are ignored for,
+            at most max_sessions ended sessions are remembered
+        """
+        self.on_evict = on_evict
+        self.idle_timeout_s = idle_timeout_s
+        self.max_sessions = max_sessions
+        self.ended_ttl_s = ended_ttl_s
+        self._sessions = OrderedDict()
+        # session id -> (forgotten at, project id) of the ended sessions, the oldest first
+        self._ended = OrderedDict()
+        self.evicted_idle = 0
+        self.evicted_capacity = 0
+        self.late_messages = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def values(self):
+        return self._sessions.values()
+
+    def touch(self, session_id: int, tp, offset: int, now: float):
+        """
+        The state of a session that just received a message at (tp, offset),
+        None if the session already ended and was flushed
+        """
+        sessions = self._sessions
+        state = sessions.get(session_id)
+        if state is None:
+            ended = self._ended.get(session_id)
+            if ended is not None and ended[0] > now:
+                self.late_messages += 1
+                return None
+            if len(sessions) >= self.max_sessions:
+                self._evict_oldest()
+            state = SessionState(session_id)
+            state.offsets[tp] = offset
+            sessions[session_id] = state
+        else:
+            sessions.move_to_end(session_id)
+            if tp not in state.offsets:
+                state.offsets[tp] = offset
+        state.last_seen = now
+        return state
+
+    def discard(self, state: SessionState):
+        """
+        Remove a flushed session, unless it was evicted and a newer state replaced it
+        """
+        if self._sessions.get(state.sessionid) is state:
+            del self._sessions[state.sessionid]
+        if state.ended:
+            self._remember_ended(state)
+
+    def _remember_ended(self, state: SessionState):
+        ended = self._ended
+        ended.pop(state.sessionid, None)
+        ended[state.sessionid] = (time.monotonic() + self.ended_ttl_s, state.project_id)
+        if len(ended) > self.max_sessions:
+            ended.popitem(last=False)
+
+    def get_ended_project_id(self, session_id: int):
+        """
+        Project id of a flushed ended session, if it is still remembered
+        """
+        ended = self._ended.get(session_id)
+        return ended[1] if ended is not None else None
+
+    def evict_idle(self, now: float):
+        """
+        Evict the sessions that got no message for idle_timeout_s.
+        Ended sessions are left alone, they are already waiting for their flush.
+        """
+        cutoff = now - self.idle_timeout_s
+        idle = []
+        for session_id, state in self._sessions.items():
+            if state.last_seen > cutoff:
+                break
+            if not state.ended:
+                idle.append(session_id)
+        for session_id in idle:
+            self.evicted_idle += 1
+            self.on_evict(self._sessions.pop(session_id))
+        ended = self._ended
+        while ended and next(iter(ended.values()))[0] <= now:
+            ended.popitem(last=False)
+
+    def _evict_oldest(self):
+        for session_id, state in self._sessions.items():
+            if not state.ended:
+                break
+        else:
+            # every session is ended and already in the sessions batch, which
+            # keeps it until the flush: forget the oldest instead of growing
+            session_id, state = next(iter(self._sessions.items()))
+            del self._sessions[session_id]
+            self._remember_ended(state)
+            return
+        self.evicted_capacity += 1
+        self.on_evict(self._sessions.pop(session_id))
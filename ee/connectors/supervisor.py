@@ -0,0 +1,88 @@
+"""
+Runs the connector as several worker processes, one core each.
+
+    workers=4 python supervisor.py
+
+Worker i consumes partition p of both topics when p % workers == i (see
+consumer.get_worker_partitions), so all the messages of a session go to one
+worker and session state stays local to it. Every worker has its own session
+store, writer threads and database connection. Workers are spawned, not
+forked, so none of them inherits a connection or a Kafka client.
+
+Workers send their periodic stats to the supervisor, which prints the totals.
+Partition ownership is static: if a worker exits, the others are stopped and
+the supervisor exits with an error so that the whole group is restarted.
+"""
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import time
+
+n_workers = int(os.environ.get('workers', 1))
+report_interval_s = int(os.environ.get('report_interval_s', 30))
+
+
+def _stop(signum, frame):
+    # raises SystemExit in the main thread, so the consumer flushes and commits on the way out
+    sys.exit(0)
+
+
+def run_worker(worker_id, workers, stats):
+    signal.signal(signal.SIGTERM, _stop)
+    from consumer import main
+    main(worker_id=worker_id, n_workers=workers, stats=stats)
+
+
+def print_totals(reports, n_processed, elapsed):
+    print(f"[supervisor] {len(reports)} workers reporting, processed {n_processed} messages in {elapsed:.0f}s "
+          f"({n_processed / elapsed:.0f} msg/s)")
+    print(f"[supervisor] sessions in cache: {sum(r['sessions'] for r in reports)}, "
+          f"writes pending: {sum(r['writes_pending'] for r in reports)}, "
+          f"failed: {sum(r['writes_failed'] for r in reports)}, "
+          f"dead lettered: {sum(r['dead_rows'] for r in reports)}, "
+          f"decoded: {sum(r['decoded'] for r in reports)}, skipped: {sum(r['skipped'] for r in reports)}")
+
+
+def supervise(workers: int) -> int:
+    ctx = multiprocessing.get_context('spawn')
+    stats = ctx.Queue()
+    processes = [ctx.Process(target=run_worker, args=(i, workers, stats), name=f"worker-{i}")
+                 for i in range(workers)]
+    for p in processes:
+        p.start()
+    signal.signal(signal.SIGTERM, _stop)
+
+    latest = {}
+    n_processed = 0
+    last_report = time.monotonic()
+    try:
+        while all(p.is_alive() for p in processes):
+            try:
+                report = stats.get(timeout=1)
+                latest[report['worker']] = report
+                n_processed += report['processed']
+            except queue.Empty:
+                pass
+            elapsed = time.monotonic() - last_report
+            if elapsed >= report_interval_s:
+                print_totals(latest.values(), n_processed, elapsed)
+                n_processed = 0
+                last_report = time.monotonic()
+        exited = [p.name for p in processes if not p.is_alive()]
+        print(f"[supervisor] {', '.join(exited)} exited, stopping the other workers")
+        return 1
+    finally:
+        for p in processes:
+            if p.is_alive():
+                p.terminate()
+        for p in processes:
+            p.join()
+
+
+if __name__ == '__main__':
+    if n_workers > 1:
+        sys.exit(supervise(n_workers))
+    from consumer import main
+    main()
@@ -0,0 +1,13 @@
+"""
+Tests of the connector, run from ee/connectors:
+
+    python -m unittest discover -s tests -t .
+
+They need the packages of the loaders they cover (pyarrow, pandas, SQLAlchemy), not Kafka or a warehouse.
+"""
+import os
+
+os.environ.setdefault('DATABASE_NAME', 'parquet')
+os.environ.setdefault('sessions_table', 'connector_user_sessions')
+os.environ.setdefault('events_table_name', 'connector_events')
+os.environ.setdefault('events_detailed_table_name', 'connector_events_detailed')
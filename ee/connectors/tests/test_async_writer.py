@@ -0,0 +1,35 @@
+import unittest
+
+from db.async_writer import AsyncWriter, WriteFailed
+
+
+class AsyncWriterTest(unittest.TestCase):
+
+    def test_failure_then_successes(self):
+        writer = AsyncWriter(workers=2, queue_size=4)
+
+        def write(fail):
+            if fail:
+                raise ValueError('rejected')
+
+        writer.submit(write, False, offsets={'p0': 10})
+        writer.submit(write, True, offsets={'p0': 20})
+        writer.submit(write, False, offsets={'p0': 30})
+        writer.submit(write, False, offsets={'p0': 40})
+        writer.flush()
+
+        self.assertEqual(writer.failed, 1)
+        self.assertEqual(writer.committable_offsets(), {'p0': 10})
+        self.assertIsNone(writer.committable_offsets())
+        # nothing is kept past the failed write
+        self.assertEqual(list(writer._done), [1])
+        with self.assertRaises(WriteFailed):
+            writer.check()
+        with self.assertRaises(WriteFailed):
+            writer.submit(write, False, offsets={'p0': 50})
+        writer.close()
+        self.assertEqual(writer.pending(), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+from db.dead_letter import BatchRejected, DeadLetterQueue
+
+
+class DataError(Exception):
+    pass
+
+
+class Row:
+
+    def __init__(self, i):
+        self.i = i
+
+
+class DeadLetterQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'dead_letter.jsonl')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_always_failing_writer(self):
+        calls = []
+
+        def write(batch):
+            calls.append(len(batch))
+            raise DataError('permission denied for relation connector_events')
+
+        queue = DeadLetterQueue(self.path, max_attempts=20)
+        with self.assertRaises(BatchRejected):
+            queue.write(write, list(range(10000)), 'connector_events')
+        self.assertEqual(len(calls), 20)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_malformed_rows(self):
+        written = []
+
+        def write(batch):
+            if any(r.i in (13, 7000) for r in batch):
+                raise DataError('invalid input syntax')
+            written.extend(r.i for r in batch)
+
+        queue = DeadLetterQueue(self.path, max_attempts=100)
+        queue.write(write, [Row(i) for i in range(10000)], 'connector_events')
+        self.assertEqual(sorted(written), [i for i in range(10000) if i not in (13, 7000)])
+        self.assertEqual(queue.dead_rows, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import glob
+import os
+import tempfile
+import unittest
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from db.loaders.parquet_loader import ParquetSink, get_arrow_schema
+from db.models import sessions_table_name
+
+
+class ParquetSinkTest(unittest.TestCase):
+
+    def test_session_lists(self):
+        schema = get_arrow_schema(sessions_table_name)
+        self.assertEqual(schema.field('issues').type, pa.list_(pa.string()))
+        self.assertEqual(schema.field('urls').type, pa.list_(pa.string()))
+        self.assertEqual(get_arrow_schema(sessions_table_name, arrays_as_strings=True).field('urls').type,
+                         pa.string())
+
+        with tempfile.TemporaryDirectory() as root:
+            sink = ParquetSink(root)
+            sink.write(sessions_table_name,
+                       {'sessionid': [1, 2], 'session_start_timestamp': [1650000000000, 1650000000000],
+                        'issues': [['click_rage'], None], 'urls': [['/a', '/b'], []]},
+                       {1: 7, 2: 7}, 'session_start_timestamp')
+            sink.close()
+            files = glob.glob(os.path.join(root, sessions_table_name, '*', '*', '*.parquet'))
+            self.assertEqual(len(files), 1)
+            written = pq.read_table(files[0])
+        self.assertEqual(written.column('issues').to_pylist(), [['click_rage'], None])
+        self.assertEqual(written.column('urls').to_pylist(), [['/a', '/b'], []])
+
+
+if __name__ == '__main__':
+    unittest.main()
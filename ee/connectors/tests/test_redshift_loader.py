@@ -0,0 +1,33 @@
+import re
+import unittest
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from db.loaders.redshift_loader import columns_to_parquet
+from db.models import sessions_table_name
+
+
+def get_ddl_columns(file):
+    ddl = (Path(__file__).parent.parent / 'sql' / file).read_text()
+    return re.findall(r'^\s+(\w+)\s+(?:bigint|VARCHAR)', ddl, re.MULTILINE)
+
+
+class ColumnsToParquetTest(unittest.TestCase):
+
+    def test_sessions_in_ddl_order(self):
+        columns = {'sessionid': [1, 2], 'issues': [['click_rage'], None], 'urls': [['/a'], []],
+                   'user_id': ['u1', None]}
+        staged = pq.read_table(pa.BufferReader(columns_to_parquet(columns, 0, 2, sessions_table_name)))
+        self.assertEqual(staged.column_names, get_ddl_columns('redshift_sessions.sql'))
+        self.assertEqual(staged.column('issues').to_pylist(), ["['click_rage']", None])
+        self.assertEqual(staged.column('urls').to_pylist(), ["['/a']", '[]'])
+
+    def test_unknown_column(self):
+        with self.assertRaises(ValueError):
+            columns_to_parquet({'sessionid': [1], 'not_a_column': [1]}, 0, 1, sessions_table_name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import time
+import unittest
+
+from session_store import SessionStore
+
+
+class SessionStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.evicted = []
+        self.store = SessionStore(self.evicted.append, idle_timeout_s=60, max_sessions=3, ended_ttl_s=60)
+
+    def end(self, session_id, now):
+        state = self.store.touch(session_id, 0, session_id, now)
+        state.project_id = 7
+        state.ended = True
+        return state
+
+    def test_late_message(self):
+        now = time.monotonic()
+        self.store.discard(self.end(1, now))
+        self.assertIsNone(self.store.touch(1, 1, 100, now))
+        self.assertEqual(self.store.late_messages, 1)
+        self.assertEqual(self.store.get_ended_project_id(1), 7)
+        self.assertEqual(len(self.store), 0)
+
+        # long after its end, the id is a new session
+        later = now + 120
+        self.store.evict_idle(later)
+        self.assertIsNone(self.store.get_ended_project_id(1))
+        self.assertIsNotNone(self.store.touch(1, 1, 101, later))
+
+    def test_full_of_ended_sessions(self):
+        now = time.monotonic()
+        for session_id in range(3):
+            self.end(session_id, now)
+        self.store.touch(3, 0, 3, now)
+        self.assertEqual(len(self.store), 3)
+        # ended sessions wait in the sessions batch, they aren't written again
+        self.assertEqual(self.evicted, [])
+        self.assertIsNone(self.store.touch(0, 0, 4, now))
+
+
+if __name__ == '__main__':
+    unittest.main()